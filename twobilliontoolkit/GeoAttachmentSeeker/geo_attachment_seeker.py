@@ -23,14 +23,36 @@ Description:
     attachment files from each table and exports them to a specified output directory. Attachments are organized by project IDs and 
     exported with a prefix (e.g., "ATT{attachment_id}_") to distinguish them.
 
+    Several attachment tables can be exported at the same time, and the attachment files of each table are written by a 
+    small pool of writer threads, so the time spent waiting on the disk overlaps with reading the next attachments.
+    The attachments are written straight from the blobs in chunks, optionally hashing them on the way so attachments 
+    with identical contents are only stored once.
+
+    The attachment tables are read with arcpy when it is installed, or with GDAL's OpenFileGDB driver (through fiona) 
+    otherwise, so the tool can also run outside of an ArcGIS Pro environment.
+
+    Exporting is incremental, an attachment whose file is already in the output with the same size (ie. from an earlier 
+    run) is not written again. The number of attachments written and skipped is logged.
+
+    Instead of a folder of files, the attachments of each project can be packed into a single uncompressed .zip file 
+    with an index of where each attachment's data starts, so a pack is copied as one file and any attachment can be 
+    read by its ID with a single seek (see read_attachment).
+
 Usage:
-    python path/to/geo_attachment_seeker.py --gdb <gdb_path> --output <output_path> --log <log_file_path> [--ps_script <script_path>]
+    python path/to/geo_attachment_seeker.py --gdb <gdb_path> --output <output_path> --log <log_file_path> [--ps_script <script_path>] [--table_workers <count>] [--write_workers <count>] [--hash <algorithm>] [--skip_duplicates] [--backend {auto,arcpy,gdal}] [--overwrite] [--pack]
 
 Arguments:
     --gdb           Path to the input GDB.
     --output        Path to the directory where attachments will be exported.
     --log           Path to the log file.
     --ps_script     Optional path to a PowerShell script for additional operations.
+    --table_workers Optional number of attachment tables to export at the same time, only with the gdal backend (arcpy is not thread safe). Defaults to 1.
+    --write_workers Optional number of threads writing the attachment files of each table. Defaults to 4.
+    --hash          Optional hashlib algorithm (ie. sha256) to hash each attachment with while it is written.
+    --skip_duplicates Optional flag to hard link attachments with the same contents as one already written instead of writing them again.
+    --backend       Optional library reading the attachment tables, arcpy or gdal. Defaults to auto (arcpy when it is installed).
+    --overwrite     Optional flag to write every attachment again, even the ones already exported with the same size.
+    --pack          Optional flag to pack the attachments of each project into a single proj_<id>.zip file with an index instead of a folder.
 
 Example:
     python geo_attachment_seeker.py --gdb my_geodatabase.gdb --output output_dir --log geo_attachment_seeker.txt
@@ -41,26 +63,145 @@ Example:
 #========================================================
 import os
 import sys
+import json
 import time
-import arcpy
+import fiona
+import struct
+import hashlib
 import argparse
 import datetime
+from threading import BoundedSemaphore, Lock
+from contextlib import contextmanager
+from zipfile import ZipFile, ZIP_STORED, ZIP64_LIMIT
+from concurrent.futures import ThreadPoolExecutor
  
 from twobilliontoolkit.Logger.Logger import Logger
 
+try:
+    import arcpy
+except ImportError:
+    # arcpy only exists in an ArcGIS Pro environment, the attachments are read through GDAL without it
+    arcpy = None
+
+#========================================================
+# Globals
+#========================================================
+# How many attachments each writer thread can have waiting, bounding the memory held by read but unwritten attachments
+PENDING_WRITES_PER_WORKER = 2
+
+# Size of the slices of an attachment blob written at a time
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+# The libraries the attachment tables can be read with
+ATTACHMENT_BACKENDS = ('arcpy', 'gdal')
+
+# The extension of an attachment pack and the name of the index member inside of it
+PACK_EXTENSION = '.zip'
+PACK_INDEX_MEMBER = 'attachment_index.json'
+
+#========================================================
+# Classes
+#========================================================
+class AttachmentWriter:
+    """
+    Writes attachment blobs to files, shared by every writer thread of a run.
+    
+    The blob is written in slices of its buffer instead of being copied into a bytes object first. When asked, each 
+    attachment is hashed as it is written, and attachments identical to one already written are hard linked to it.
+    Attachments already exported with the same size are skipped unless overwriting.
+    """
+    
+    def __init__(self, hash_algorithm: str = None, skip_duplicates: bool = False, incremental: bool = True) -> None:
+        """
+        Initializes the AttachmentWriter class.
+
+        Args:
+            hash_algorithm (str, optional): The hashlib algorithm to hash each attachment with. Defaults to None, or 'sha256' when skipping duplicates.
+            skip_duplicates (bool, optional): Hard link attachments identical to one already written instead of writing them again. Defaults to False.
+            incremental (bool, optional): Skip attachments whose file already exists with the same size. Defaults to True.
+        """
+        self.hash_algorithm = hash_algorithm or ('sha256' if skip_duplicates else None)
+        self.skip_duplicates = skip_duplicates
+        self.incremental = incremental
+        
+        # The first file written for each hash, and the number of attachments written, already exported, and linked to a duplicate
+        self.written_hashes = {}
+        self.written = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.lock = Lock()
+        
+    def count(self, counter: str) -> None:
+        """
+        Adds one to a counter, from any writer thread.
+
+        Args:
+            counter (str): The name of the counter ('written', 'skipped' or 'duplicates').
+        """
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        
+    def write(self, filename: str, attachment: memoryview) -> str:
+        """
+        Writes the data of an attachment to a file.
+
+        Args:
+            filename (str): The path of the file to write.
+            attachment (memoryview): The DATA blob of the attachment.
+
+        Returns:
+            str: The hex digest of the attachment, or None if it is not being hashed.
+        """
+        view = memoryview(attachment if attachment is not None else b'').cast('B')
+        
+        # Skip the attachments that were already exported by an earlier run
+        exported = self.incremental and os.path.isfile(filename) and os.path.getsize(filename) == len(view)
+        
+        if not self.skip_duplicates:
+            if exported:
+                self.count('skipped')
+                return None
+            
+            file_hash = hashlib.new(self.hash_algorithm) if self.hash_algorithm else None
+            write_chunks(filename, view, file_hash)
+            self.count('written')
+            return file_hash.hexdigest() if file_hash else None
+        
+        # The whole blob is already in memory, hash it before writing to know if it is a duplicate
+        digest = hashlib.new(self.hash_algorithm, view).hexdigest()
+        with self.lock:
+            original = self.written_hashes.setdefault(digest, filename)
+        
+        if exported:
+            self.count('skipped')
+        elif original != filename and link_file(original, filename):
+            self.count('duplicates')
+        else:
+            write_chunks(filename, view)
+            self.count('written')
+        return digest
+
 #========================================================
 # Functions
 #========================================================
-def find_attachments(gdb_path: str, output_path: str) -> dict:
+def find_attachments(gdb_path: str, output_path: str, table_workers: int = 1, write_workers: int = 4, hash_algorithm: str = None, skip_duplicates: bool = False, backend: str = 'auto', incremental: bool = True, logger: Logger = None, pack: bool = False) -> dict:
     """
     Searches through the GDB and finds all relevant attachments.
 
     Args:
         gdb_path (str): Path to input GDB.
         output_path (str): Path to export the attachments to.
+        table_workers (int, optional): Number of attachment tables to export at the same time, each with its own cursor. Only used with the gdal backend, arcpy cursors are not thread safe so those tables are read one at a time. Defaults to 1.
+        write_workers (int, optional): Number of threads writing the attachment files of each table. Defaults to 4.
+        hash_algorithm (str, optional): The hashlib algorithm to hash each attachment with while it is written. Defaults to None.
+        skip_duplicates (bool, optional): Hard link attachments with the same contents as one already written, in any table, instead of writing them again. Defaults to False.
+        backend (str, optional): The library to read the attachment tables with, 'arcpy' or 'gdal' (the OpenFileGDB driver). Defaults to 'auto', arcpy when it is installed.
+        incremental (bool, optional): Skip the attachments whose ATT{id}_{name} file is already in the output with the same size. Defaults to True.
+        logger (Logger, optional): The Logger object to log the number of attachments written and skipped to. Defaults to None.
+        pack (bool, optional): Pack the attachments of each project into a single indexed .zip file instead of a folder of files. Defaults to False.
 
     Returns:
-        dict: A dictionary of key-value pairs tying each project ID that had attachments to the path they were extracted to.
+        dict: A dictionary of key-value pairs tying each project ID that had attachments to the path they were extracted to (the pack file when packing).
     """ 
     # validate the gdb_path
     if not isinstance(gdb_path, str) or not gdb_path.strip():
@@ -72,51 +213,258 @@ def find_attachments(gdb_path: str, output_path: str) -> dict:
     if not os.path.exists(gdb_path):
         raise ValueError(f'The provided gdb_path path does not exist.')
     
+    # Pick the library to read the attachment tables with
+    if backend == 'auto':
+        backend = 'arcpy' if arcpy is not None else 'gdal'
+    if backend not in ATTACHMENT_BACKENDS:
+        raise ValueError(f'The provided backend must be one of: auto, {", ".join(ATTACHMENT_BACKENDS)}.')
+    if backend == 'arcpy' and arcpy is None:
+        raise ValueError(f'The arcpy backend needs an ArcGIS Pro environment, use the gdal backend instead.')
+    
     # Set the arc environment
-    arcpy.env.workspace = gdb_path
+    if backend == 'arcpy':
+        arcpy.env.workspace = gdb_path
+        tables = arcpy.ListTables()
+        
+        # arcpy is not thread safe, so its cursors are only opened from one thread, the writes are still spread over the writer pool
+        if table_workers > 1 and logger is not None:
+            logger.log(message=f'The arcpy backend reads one attachment table at a time, ignoring table_workers={table_workers}.', tag='WARNING')
+        table_workers = 1
+    else:
+        tables = fiona.listlayers(gdb_path)
+    
+    # Create the writer shared by every table
+    writer = AttachmentWriter(hash_algorithm, skip_duplicates, incremental)
     
     # Work all attach tables
     attachment_dict = {}
-    for table in arcpy.ListTables(): 
-        # Filter out non attachment tables   
-        if '__ATTACH' not in table:
-            continue
-        
-        # Build the output project paths
-        project_id = table.replace('__ATTACH', '')
-        output_project_path = os.path.abspath(os.path.join(output_path, project_id))
-        table_path = os.path.join(gdb_path, table)
-        
-        # Call the processing function
-        process_attachment(output_project_path, table_path)
+    with ThreadPoolExecutor(max_workers=max(1, table_workers)) as table_pool:
+        futures = []
+        for table in tables: 
+            # Filter out non attachment tables   
+            if '__ATTACH' not in table:
+                continue
+            
+            # Build the output project paths
+            project_id = table.replace('__ATTACH', '')
+            output_project_path = os.path.abspath(os.path.join(output_path, project_id)) + (PACK_EXTENSION if pack else '')
+            table_path = os.path.join(gdb_path, table)
+            
+            # Call the processing function
+            futures.append((project_id, output_project_path, table_pool.submit(process_attachment, output_project_path, table_path, write_workers, writer, backend, pack)))
         
-        # Add to the dictionary
-        attachment_dict[project_id] = output_project_path
+        # Add to the dictionary in the order of the tables, raising any error from the processing
+        for project_id, output_project_path, future in futures:
+            future.result()
+            attachment_dict[project_id] = output_project_path
+    
+    # Report what was written and what was already there
+    if logger is not None:
+        logger.log(message=f'Attachments from {gdb_path}: {writer.written} written, {writer.skipped} skipped because they were already exported, {writer.duplicates} linked to an identical attachment.', tag='INFO')
             
     # Return the attachement dictionary
     return attachment_dict
 
-def process_attachment(output_project_path: str, table_path : str) -> None:
+def process_attachment(output_project_path: str, table_path : str, write_workers: int = 1, writer: AttachmentWriter = None, backend: str = 'arcpy', pack: bool = False) -> None:
     """
     Processes any attachments handed to it.
 
     Args:
         output_project_path (str): The path where the attachments will be exported.
         table_path (str): The path to a __ATTACH table in a GDB.
+        write_workers (int, optional): Number of threads writing the attachment files while the table is read. Defaults to 1 (written as they are read).
+        writer (AttachmentWriter, optional): The writer of the attachment files. Defaults to writing without hashing.
+        backend (str, optional): The library to read the table with, 'arcpy' or 'gdal'. Defaults to 'arcpy'.
+        pack (bool, optional): Write the attachments into a single pack file at the output path instead of a folder. Defaults to False.
     """                
+    writer = writer or AttachmentWriter()
+    
     # Check if the directory exists, if not, create it
-    if not os.path.exists(output_project_path):
-        os.makedirs(output_project_path)
+    os.makedirs(os.path.dirname(output_project_path) if pack else output_project_path, exist_ok=True)
     
     # Extract the attachment files from each table
+    rows = read_arcpy_attachments(table_path) if backend == 'arcpy' else read_gdal_attachments(table_path)
+    with rows as cursor:
+        if pack:
+            pack_attachments(output_project_path, cursor, writer)
+            return
+        
+        if write_workers <= 1:
+            for attachment, att_name, attachment_id in cursor:
+                writer.write(os.path.join(output_project_path, f"ATT{attachment_id}_" + att_name), attachment)
+            return
+        
+        # Hand the writes to the writer pool, waiting when too many attachments are waiting to be written
+        pending_writes = BoundedSemaphore(write_workers * PENDING_WRITES_PER_WORKER)
+        with ThreadPoolExecutor(max_workers=write_workers) as writer_pool:
+            futures = []
+            for attachment, att_name, attachment_id in cursor:
+                pending_writes.acquire()
+                future = writer_pool.submit(writer.write, os.path.join(output_project_path, f"ATT{attachment_id}_" + att_name), attachment)
+                future.add_done_callback(lambda _: pending_writes.release())
+                futures.append(future)
+            
+            # Raise any error from the writes
+            for future in futures:
+                future.result()
+
+@contextmanager
+def read_arcpy_attachments(table_path: str):
+    """
+    Reads the (DATA, ATT_NAME, ATTACHMENTID) rows of an attachment table with an arcpy cursor.
+
+    Args:
+        table_path (str): The path to a __ATTACH table in a GDB.
+    """
     # Credits: A Modified version of the method Andrea found at https://support.esri.com/en-us/knowledge-base/how-to-batch-export-attachments-from-a-feature-class-in-000011912
     with arcpy.da.SearchCursor(table_path, ['DATA', 'ATT_NAME', 'ATTACHMENTID']) as cursor:
-        for attachment, att_name, attachment_id in cursor:
-            filenum = f"ATT{attachment_id}_"
-            filename = os.path.join(output_project_path, filenum + att_name)
+        yield cursor
+
+@contextmanager
+def read_gdal_attachments(table_path: str):
+    """
+    Reads the (DATA, ATT_NAME, ATTACHMENTID) rows of an attachment table with GDAL's OpenFileGDB driver, one row at a time.
+    
+    The ATTACHMENTID is the object ID of the table, which GDAL gives as the feature ID.
+
+    Args:
+        table_path (str): The path to a __ATTACH table in a GDB.
+    """
+    gdb_path, table = os.path.split(table_path)
+    with fiona.open(gdb_path, layer=table) as table_ref:
+        yield (
+            (feature.properties['DATA'], feature.properties['ATT_NAME'], int(feature.id))
+            for feature in table_ref
+        )
+
+def pack_attachments(pack_path: str, rows, writer: AttachmentWriter) -> None:
+    """
+    Packs the attachments of a table into a single uncompressed .zip file, followed by an index of the attachments.
+    
+    The index maps each attachment ID to its ATT{id}_{name} file name, the offset its data starts at in the pack, and 
+    its size (and hash when hashing). Identical attachments are only stored once when skipping duplicates, their 
+    index entries point at the same data. The pack is written under a temporary name and then replaced in one step.
+
+    Args:
+        pack_path (str): The path of the pack file to write.
+        rows (Iterable): The (DATA, ATT_NAME, ATTACHMENTID) rows of the attachment table.
+        writer (AttachmentWriter): The settings (hashing, duplicates) and counters of the run.
+    """
+    temporary_path = pack_path + '.tmp'
+    index = {}
+    members_by_hash = {}
+    with ZipFile(temporary_path, 'w', compression=ZIP_STORED, allowZip64=True) as pack_ref:
+        for attachment, att_name, attachment_id in rows:
+            view = memoryview(attachment if attachment is not None else b'').cast('B')
+            name = f"ATT{attachment_id}_" + att_name
+            entry = {'name': name, 'member': name, 'size': len(view)}
+            
+            # Point identical attachments at the data already in the pack
+            if writer.skip_duplicates:
+                entry['hash'] = hashlib.new(writer.hash_algorithm, view).hexdigest()
+                if entry['hash'] in members_by_hash:
+                    entry['member'] = members_by_hash[entry['hash']]
+                    index[str(attachment_id)] = entry
+                    writer.count('duplicates')
+                    continue
+                members_by_hash[entry['hash']] = name
             
-            with open(filename, 'wb') as file:
-                file.write(attachment.tobytes())
+            # Write the attachment in slices, hashing it on the way when asked
+            file_hash = hashlib.new(writer.hash_algorithm) if writer.hash_algorithm and not writer.skip_duplicates else None
+            with pack_ref.open(name, 'w', force_zip64=len(view) > ZIP64_LIMIT) as member:
+                for offset in range(0, len(view), WRITE_CHUNK_SIZE):
+                    chunk = view[offset:offset + WRITE_CHUNK_SIZE]
+                    member.write(chunk)
+                    if file_hash is not None:
+                        file_hash.update(chunk)
+            
+            if file_hash is not None:
+                entry['hash'] = file_hash.hexdigest()
+            index[str(attachment_id)] = entry
+            writer.count('written')
+    
+    # Find where the data of each member starts, past its local header, so it can be read with a single seek
+    data_offsets = {}
+    with ZipFile(temporary_path, 'r') as pack_ref, open(temporary_path, 'rb') as file:
+        for info in pack_ref.infolist():
+            file.seek(info.header_offset)
+            header = struct.unpack('<4s5HL2L2H', file.read(30))
+            data_offsets[info.filename] = info.header_offset + 30 + header[9] + header[10]
+    
+    for entry in index.values():
+        entry['offset'] = data_offsets[entry['member']]
+    
+    with ZipFile(temporary_path, 'a', compression=ZIP_STORED) as pack_ref:
+        pack_ref.writestr(PACK_INDEX_MEMBER, json.dumps(index, indent=4))
+    os.replace(temporary_path, pack_path)
+
+def load_pack_index(pack_path: str) -> dict:
+    """
+    Loads the index of an attachment pack.
+
+    Args:
+        pack_path (str): The path of the pack file.
+
+    Returns:
+        dict: Each attachment ID (as a string) mapped to its name, member, offset, size and hash.
+    """
+    with ZipFile(pack_path, 'r') as pack_ref:
+        return json.loads(pack_ref.read(PACK_INDEX_MEMBER))
+
+def read_attachment(pack_path: str, attachment_id, index: dict = None) -> bytes:
+    """
+    Reads a single attachment out of an attachment pack by its ID.
+
+    Args:
+        pack_path (str): The path of the pack file.
+        attachment_id (int | str): The ATTACHMENTID of the attachment.
+        index (dict, optional): The index of the pack, from load_pack_index, to avoid reading it again when reading several attachments. Defaults to None.
+
+    Returns:
+        bytes: The data of the attachment.
+    """
+    entry = (index or load_pack_index(pack_path))[str(attachment_id)]
+    
+    with open(pack_path, 'rb') as file:
+        file.seek(entry['offset'])
+        return file.read(entry['size'])
+
+def write_chunks(filename: str, view: memoryview, file_hash = None) -> None:
+    """
+    Writes a buffer to a file in slices, which are views into the buffer and are never copied.
+
+    Args:
+        filename (str): The path of the file to write.
+        view (memoryview): The bytes to write.
+        file_hash (hashlib._Hash, optional): A hash to update with each slice as it is written. Defaults to None.
+    """
+    with open(filename, 'wb') as file:
+        for offset in range(0, len(view), WRITE_CHUNK_SIZE):
+            chunk = view[offset:offset + WRITE_CHUNK_SIZE]
+            file.write(chunk)
+            if file_hash is not None:
+                file_hash.update(chunk)
+
+def link_file(original_path: str, link_path: str) -> bool:
+    """
+    Hard links a file to an identical one, replacing any file already at the link path.
+
+    Args:
+        original_path (str): The path of the file already written.
+        link_path (str): The path of the link.
+
+    Returns:
+        bool: True if the link was made, False if the original is not written yet or hard links are not supported.
+    """
+    temporary_path = link_path + '.link'
+    try:
+        os.link(original_path, temporary_path)
+        os.replace(temporary_path, link_path)
+        return True
+    except OSError:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        return False
             
 #========================================================
 # Main
@@ -131,6 +479,13 @@ def main():#
     parser.add_argument('--output', help='Path to the directory where attachments will be exported.')
     parser.add_argument('--log', required=True, help='Path to the log file.')
     parser.add_argument('--ps_script', default='', help='Optional path to a PowerShell script for additional operations.')
+    parser.add_argument('--table_workers', type=int, default=1, help='Number of attachment tables to export at the same time, only with the gdal backend.')
+    parser.add_argument('--write_workers', type=int, default=4, help='Number of threads writing the attachment files of each table.')
+    parser.add_argument('--hash', default=None, help='Hashlib algorithm (ie. sha256) to hash each attachment with while it is written.')
+    parser.add_argument('--backend', choices=['auto', *ATTACHMENT_BACKENDS], default='auto', help='The library reading the attachment tables, auto uses arcpy when it is installed and GDAL otherwise.')
+    parser.add_argument('--overwrite', action='store_true', default=False, help='Write every attachment again, even the ones already exported with the same size.')
+    parser.add_argument('--pack', action='store_true', default=False, help='Pack the attachments of each project into a single indexed .zip file instead of a folder of files.')
+    parser.add_argument('--skip_duplicates', action='store_true', default=False, help='Hard link attachments with the same contents as one already written instead of writing them again.')
     
     # Parse the command-line arguments
     args = parser.parse_args()
@@ -143,7 +498,7 @@ def main():#
     logger.log(message=f'Tool is starting... Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
     
     # Call the function to perform the processing
-    find_attachments(args.gdb, args.output)
+    find_attachments(args.gdb, args.output, args.table_workers, args.write_workers, args.hash, args.skip_duplicates, args.backend, not args.overwrite, logger, args.pack)
         
     # Get the end time of the script and calculate the elapsed time
     end_time = time.time()
@@ -20,6 +20,13 @@ Team:             Carbon Accounting Team
 
 Description: 
     This module defines a Logger class that handles logging messages with different severity levels (INFO, WARNING, ERROR) for the TwoBillionToolkit. Users can provide a log file path to store logs, otherwise, logs are written to the terminal. The logger supports features such as separating logs by type, suppressing warnings, auto-committing logs to a file, and including metadata such as tool name and script path.
+    
+    Committed entries are handed to a background writer that keeps each log file open and flushes them once enough has 
+    been written or a second has passed, so logging thousands of messages does not reopen the files for every message. 
+    The writer is drained when the tool completes (commit(close=True)) and when the interpreter exits.
+    
+    Worker processes log through a QueueLogger, which sends every record over a multiprocessing queue to a listener 
+    thread of the Logger in the parent process, so only the parent prints and writes the log files.
 
 
 Usage:
@@ -30,7 +37,13 @@ Usage:
 # Imports
 #========================================================
 import os
+import json
+import time
+import queue
+import atexit
 import datetime
+import multiprocessing
+from threading import Event, RLock, Thread
 from importlib.metadata import version
 
 #========================================================
@@ -48,10 +61,187 @@ class Colors:
 #========================================================
 LOCAL_DIR = r'C:\LocalTwoBillionToolkit\\'
 FILE_EXT = '.txt'    
+METRICS_EXT = '.jsonl'
+
+# The background writer flushes the log files once this many characters are written or this many seconds have passed
+FLUSH_SIZE = 64 * 1024
+FLUSH_INTERVAL = 1.0
         
 #========================================================
 # Class
 #========================================================
+class LogWriter:
+    """
+    Writes text to log files on a background thread, keeping one open handle per log file and flushing them by size or time.
+    """
+    
+    def __init__(self, flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL) -> None:
+        """
+        Initialize a new LogWriter instance and start its thread.
+
+        Args:
+            flush_size (int, optional): Number of characters written after which the files are flushed. Defaults to FLUSH_SIZE.
+            flush_interval (float, optional): Seconds after which written text is flushed. Defaults to FLUSH_INTERVAL.
+        """
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        
+        self.queue = queue.Queue()
+        self.handles = {}
+        self.pending = 0
+        self.closed = False
+        
+        self.thread = Thread(target=self._run, name='log_writer', daemon=True)
+        self.thread.start()
+        
+        # Make sure everything queued reaches the files before the interpreter exits
+        atexit.register(self.close)
+    
+    def write(self, log_file: str, text: str) -> None:
+        """
+        Queue text to be appended to a log file.
+
+        Args:
+            log_file (str): Path to the log file.
+            text (str): The text to append.
+        """
+        self.queue.put((log_file, text))
+    
+    def drain(self) -> None:
+        """
+        Wait until everything queued so far has been written and flushed to the log files.
+        """
+        if self.closed:
+            return
+        
+        drained = Event()
+        self.queue.put(drained)
+        drained.wait()
+    
+    def close(self) -> None:
+        """
+        Drain the queue, close the log files and stop the thread.
+        """
+        if self.closed:
+            return
+        
+        self.queue.put(None)
+        self.thread.join()
+        self.closed = True
+        atexit.unregister(self.close)
+    
+    def _run(self) -> None:
+        """
+        Write the queued text until the writer is closed.
+        """
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = Event()
+            
+            # A drain or the end of the writer, flush everything written so far
+            if item is None or isinstance(item, Event):
+                self._flush()
+                last_flush = time.monotonic()
+                
+                if item is None:
+                    for handle in self.handles.values():
+                        handle.close()
+                    self.handles = {}
+                    return
+                
+                item.set()
+                continue
+            
+            log_file, text = item
+            try:
+                self._get_handle(log_file).write(text)
+                self.pending += len(text)
+            except OSError as error:
+                print(f"Logger Error: Could not write to file {log_file}. Error: {error}\n")
+            
+            if self.pending >= self.flush_size or time.monotonic() - last_flush >= self.flush_interval:
+                self._flush()
+                last_flush = time.monotonic()
+    
+    def _get_handle(self, log_file: str):
+        """
+        Get the open handle of a log file, creating the file and its directory the first time it is written to.
+
+        Args:
+            log_file (str): Path to the log file.
+
+        Returns:
+            The file handle, opened in append mode.
+        """
+        if log_file not in self.handles:
+            # Check if the directory exists, if not, create it
+            directory = os.path.dirname(log_file)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            
+            self.handles[log_file] = open(log_file, 'a')
+        
+        return self.handles[log_file]
+    
+    def _flush(self) -> None:
+        """
+        Flush every open log file.
+        """
+        for log_file, handle in self.handles.items():
+            try:
+                handle.flush()
+            except OSError as error:
+                print(f"Logger Error: Could not flush file {log_file}. Error: {error}\n")
+        self.pending = 0
+
+class QueueLogger:
+    """
+    Stands in for the Logger inside of a worker process, sending each record through a multiprocessing queue to the 
+    listener started by Logger.start_listener in the parent process.
+    """
+    
+    def __init__(self, log_queue: multiprocessing.Queue) -> None:
+        """
+        Initialize a new QueueLogger instance.
+
+        Args:
+            log_queue (multiprocessing.Queue): The queue returned by Logger.start_listener in the parent process.
+        """
+        self.queue = log_queue
+        
+    def log(self, message: str, tag: str = 'ERROR', override: bool = False) -> None:
+        """
+        Send a message with a specified severity level (ERROR, WARNING, INFO) to the parent Logger.
+
+        Args:
+            message (str): The message to log.
+            tag (str, optional): Severity level of the log message. Can be 'ERROR', 'WARNING', or 'INFO'. Defaults to 'ERROR'.
+            override (bool, optional): Override the check of only printing warnings and errors and log info as well. Defaults to False.
+        """
+        self.queue.put(('log', datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"), message, tag, override))
+        
+    def metric(self, name: str, **values) -> None:
+        """
+        Send a structured metric record to the parent Logger.
+
+        Args:
+            name (str): The name of the metric.
+            **values: The values of the record, they must be JSON serializable.
+        """
+        self.queue.put(('metric', datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"), name, values))
+        
+    def commit(self, close: bool = False) -> None:
+        """
+        Ask the parent Logger to write its stored entries, only the parent closes the log when the tool completes.
+
+        Args:
+            close (bool, optional): Ignored, kept so the QueueLogger can be used in place of a Logger. Defaults to False.
+        """
+        self.queue.put(('commit',))
+
 class Logger:
     """
     A class for logging informational, warning, and error messages to a file or the console.
@@ -60,7 +250,7 @@ class Logger:
     optional separation of logs by type (INFO, WARNING, ERROR).
     """
     
-    def __init__(self, log_file: str, is_absolute_path: bool = True, seperate_logs: bool = False, suppress_warnings: bool = False, script_path: str = 'N/A', auto_commit: bool = False, tool_name: str = None) -> None:
+    def __init__(self, log_file: str, is_absolute_path: bool = True, seperate_logs: bool = False, suppress_warnings: bool = False, script_path: str = 'N/A', auto_commit: bool = False, tool_name: str = None, buffered: bool = True) -> None:
         """
         Initialize a new Logger instance.
 
@@ -72,6 +262,7 @@ class Logger:
             script_path (str, optional): Path to the PowerShell script used to run the spatial transformer. Defaults to 'N/A'.
             auto_commit (bool, optional): If True, logs are automatically written to the file without needing manual commits. Defaults to False.
             tool_name (str, optional): Name of the tool generating the logs. Optional.
+            buffered (bool, optional): If True, committed entries are written by the background writer and only waited for when the tool completes. If False, every commit waits for its entries to be written. Defaults to True.
         """
         self.created = datetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S")
         
@@ -82,7 +273,19 @@ class Logger:
         self.auto_commit = auto_commit
         self.tool_name = tool_name
         self.log_entries = []  # To store log messages before committing them to file
-        self.generated_header = False
+        self.metric_entries = []  # To store structured metric records before committing them to file
+        self.buffered = buffered
+        self.headers = set()  # The log files this logger has written a header to
+        
+        # Guards the stored entries and the log files, the logger can be shared with background threads (ie. a network transfer)
+        self.lock = RLock()
+        
+        # The background writer of the log files, started on the first commit
+        self.writer = None
+        
+        # The queue and thread receiving the records of worker processes, started by start_listener
+        self.listener_queue = None
+        self.listener = None
         
         if not self.log_file:
             print("Logger Error: No file path provided.")
@@ -91,7 +294,7 @@ class Logger:
         if not is_absolute_path:
             self.log_file = LOCAL_DIR + self.log_file[:-4] + FILE_EXT
         
-    def log(self, message: str, tag: str = 'ERROR', override: bool = False) -> None:
+    def log(self, message: str, tag: str = 'ERROR', override: bool = False, timestamp: str = None) -> None:
         """
         Log a message with a specified severity level (ERROR, WARNING, INFO), and store it in memory.
 
@@ -99,28 +302,103 @@ class Logger:
             message (str): The message to log.
             tag (str, optional): Severity level of the log message. Can be 'ERROR', 'WARNING', or 'INFO'. Defaults to 'ERROR'.
             override (bool, optional): Override the check of only printing warnings and errors and log info as well. Defaults to False.
+            timestamp (str, optional): The time the message was logged at, given for the records of worker processes. Defaults to now.
         """
         # Set the tag and print to the console
         log_type = self._get_log_type(tag)
                 
-        # Store the message in the log_entries list
-        if tag != 'INFO' or override:
-            self.log_entries.append({
-                'timestamp': datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
-                'tag': tag,
-                'message': message,
-                'log_type': log_type
+        with self.lock:
+            # Store the message in the log_entries list
+            if tag != 'INFO' or override:
+                self.log_entries.append({
+                    'timestamp': timestamp or datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+                    'tag': tag,
+                    'message': message,
+                    'log_type': log_type
+                })
+            
+            # If suppress is turned on, don't print warnings to command-line
+            if tag == 'WARNING' and self.suppress_warnings:
+                return
+            
+            # Print to console immediately
+            print(f'{log_type}[{tag}] {message}{Colors.END}')
+            
+            if self.auto_commit:
+                self.commit()
+    
+    def metric(self, name: str, timestamp: str = None, **values) -> None:
+        """
+        Store a structured metric record (ie. the throughput of a transfer), it is written as one JSON line to the 
+        _METRICS log file when committed.
+
+        Args:
+            name (str): The name of the metric.
+            timestamp (str, optional): The time the record was made at, given for the records of worker processes. Defaults to now.
+            **values: The values of the record, they must be JSON serializable.
+        """
+        with self.lock:
+            self.metric_entries.append({
+                'timestamp': timestamp or datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+                'metric': name,
+                **values
             })
-        
-        # If suppress is turned on, don't print warnings to command-line
-        if tag == 'WARNING' and self.suppress_warnings:
+            
+            if self.auto_commit:
+                self.commit()
+    
+    def start_listener(self) -> multiprocessing.Queue:
+        """
+        Start a thread receiving the records of worker processes, which log through a QueueLogger made from the 
+        returned queue (ie. passed to the initializer of a ProcessPoolExecutor). The records are printed and written 
+        like the messages logged in this process.
+
+        Returns:
+            multiprocessing.Queue: The queue to hand to the worker processes.
+        """
+        with self.lock:
+            if self.listener is None:
+                self.listener_queue = multiprocessing.Queue()
+                self.listener = Thread(target=self._listen, name='log_listener', daemon=True)
+                self.listener.start()
+                atexit.register(self.stop_listener)
+            
+            return self.listener_queue
+    
+    def stop_listener(self) -> None:
+        """
+        Handle every record the worker processes have sent so far and stop the listener, once it returns the records are in the log files.
+        """
+        if self.listener is None:
             return
         
-        # Print to console immediately
-        print(f'{log_type}[{tag}] {message}{Colors.END}')
+        self.listener_queue.put(None)
+        self.listener.join()
+        self.listener = None
+        self.commit()
         
-        if self.auto_commit:
-            self.commit()
+        # Wait for the records to be written, the writer may have been closed and started again after the exit handlers were registered
+        with self.lock:
+            if self.writer:
+                self.writer.drain()
+    
+    def _listen(self) -> None:
+        """
+        Log the records sent by worker processes until the listener is stopped.
+        """
+        while True:
+            record = self.listener_queue.get()
+            if record is None:
+                return
+            
+            if record[0] == 'log':
+                _, timestamp, message, tag, override = record
+                self.log(message, tag, override, timestamp)
+            elif record[0] == 'metric':
+                _, timestamp, name, values = record
+                self.metric(name, timestamp, **values)
+            else:
+                self.commit()
     
     def commit(self, close: bool = False) -> None:
         """
@@ -129,6 +407,16 @@ class Logger:
         Args:
             close (bool, optional): If True, writes a final closing log entry to the file when a tool completes. Defaults to False.
         """      
+        with self.lock:
+            self._commit(close)
+    
+    def _commit(self, close: bool = False) -> None:
+        """
+        Write all stored log entries to the designated log file, called while holding the lock.
+
+        Args:
+            close (bool, optional): If True, writes a final closing log entry to the file when a tool completes. Defaults to False.
+        """
         # Iterate through the stored log entries
         for log_entry in self.log_entries:
             tag = log_entry['tag']
@@ -144,6 +432,11 @@ class Logger:
         # Empty the list of log entries after they have all been written to the file
         self.log_entries = []
         
+        # Write the metric records to their own file
+        if self.metric_entries:
+            self._metrics_to_file(self.log_file[:-4] + '_METRICS' + METRICS_EXT, self.metric_entries)
+            self.metric_entries = []
+        
         # Write closing log for the tool
         if close:
             log_entry = {
@@ -159,6 +452,14 @@ class Logger:
                 self._log_to_file(self.log_file[:-4] + f'_WARNING' + FILE_EXT, log_entry)
             else:
                 self._log_to_file(self.log_file, log_entry)
+        
+        # Close the log files when the tool completes so they can be moved or deleted, the next write opens them again
+        if self.writer and close:
+            self.writer.close()
+        
+        # Wait for the entries to be written when the logger is not buffered
+        elif self.writer and not self.buffered:
+            self.writer.drain()
     
     def _get_tag(self, log_type: str) -> str:
         """
@@ -194,6 +495,28 @@ class Logger:
         else:
             return Colors.ERROR
     
+    def _write(self, log_file: str, text: str) -> None:
+        """
+        Hand text to the background writer, starting it if needed.
+
+        Args:
+            log_file (str): Path to the log file.
+            text (str): The text to append.
+        """
+        self._get_writer().write(log_file, text)
+    
+    def _get_writer(self) -> LogWriter:
+        """
+        Get the background writer of the log files, starting it if needed or if the last one was closed.
+
+        Returns:
+            LogWriter: The running writer.
+        """
+        if self.writer is None or self.writer.closed:
+            self.writer = LogWriter()
+        
+        return self.writer
+    
     def _log_to_file(self, log_file: str, log_entry: dict) -> None:
         """
         Write a single log entry to the specified log file.
@@ -202,22 +525,22 @@ class Logger:
             log_file (str): Path to the log file.
             log_entry (dict): A dictionary containing the log details (timestamp, tag, message, log_type).
         """       
-        # Check if the directory exists, if not, create it
-        directory = os.path.dirname(log_file)
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        
-        # Generate header if the file doesn't exist
-        if not os.path.exists(log_file) or not self.generated_header:
+        # Generate header the first time this logger writes to the file
+        if log_file not in self.headers:
             self._generate_header(log_file)
-            self.generated_header = True
+            self.headers.add(log_file)
         
-        try:
-            # Open the file in append mode and write the log entry
-            with open(log_file, 'a') as file:
-                file.write(f"{log_entry['timestamp']} [{log_entry['tag']}] {log_entry['message']}\n\n")
-        except PermissionError as error:
-            print(f"Logger Error: Permission denied to write to file {log_file}. Error: {error}\n")
+        self._write(log_file, f"{log_entry['timestamp']} [{log_entry['tag']}] {log_entry['message']}\n\n")
+    
+    def _metrics_to_file(self, metrics_file: str, metric_entries: list[dict]) -> None:
+        """
+        Append metric records to the specified file, one JSON object per line.
+
+        Args:
+            metrics_file (str): Path to the metrics file.
+            metric_entries (list[dict]): The metric records to write.
+        """
+        self._write(metrics_file, ''.join(json.dumps(metric_entry) + '\n' for metric_entry in metric_entries))
     
     def _generate_header(self, log_file: str,) -> None:
         """
@@ -227,16 +550,18 @@ class Logger:
             log_file (str): Path to the log file.
         """
         try:
-            with open(log_file, 'a') as log_file_o:
-                log_file_o.write("___________________________________________________________\n")
-                log_file_o.write(f"{os.path.basename(log_file)} file header\n")
-                log_file_o.write("___________________________________________________________\n")
-                log_file_o.write(f"User: {os.getlogin()}\n")
-                log_file_o.write(f"Log Header Created: {self.created} \n")
-                log_file_o.write(f"Script Path: {self.script_path}\n")
-                log_file_o.write(f"twobilliontoolkit package version: {version('twobilliontoolkit')} \n")
-                log_file_o.write("___________________________________________________________\n")
-                
-                log_file_o.write(f"{self.created} [INFO] Starting tool {self.tool_name}\n\n")
+            header = "___________________________________________________________\n"
+            header += f"{os.path.basename(log_file)} file header\n"
+            header += "___________________________________________________________\n"
+            header += f"User: {os.getlogin()}\n"
+            header += f"Log Header Created: {self.created} \n"
+            header += f"Script Path: {self.script_path}\n"
+            header += f"twobilliontoolkit package version: {version('twobilliontoolkit')} \n"
+            header += "___________________________________________________________\n"
+            
+            header += f"{self.created} [INFO] Starting tool {self.tool_name}\n\n"
         except Exception as error:
             print(f'An unexpected error occured when creating the log header: {error}\n')
+            return
+        
+        self._write(log_file, header)
@@ -22,9 +22,19 @@ Description:
     A tool to transfer all files or specific files from a source directory to a destination. It is designed to handle the transfer of data, 
     especially for the Two Billion Trees Toolkit processing.
 
+    Files are copied by a pool of threads so several streams share the network link, each file is retried a few times 
+    before it is reported as failed, and a summary of the files and bytes per second is logged once the transfer is done.
+    With --delta, files that already have an identical copy at the destination are skipped. With --chunked, large files
+    are copied in chunks to a temporary name that a later run resumes from, and are checksummed before being renamed into place.
+    
+    With --bandwidth, the copies share a token bucket that caps the transfer rate. The bytes, duration and MB/s of each
+    item transferred are written as structured records to the _METRICS file of the log.
+    
+    A geodatabase that is new at the destination is copied file by file like any other directory. When it already exists, 
+    its catalog is read once and only the feature classes it is missing are copied over with arcpy.
 
 Usage:
-    python path/to/network_transfer.py --source <local_path> --destination <network_path> --log <log_file_path> [--ps_script <script_path>] [--files <[...list of files...]>] 
+    python path/to/network_transfer.py --source <local_path> --destination <network_path> --log <log_file_path> [--ps_script <script_path>]  [--files <[...list of files...]>] [--workers <count>] [--retries <count>] [--delta <stat|hash>] [--chunked] [--gdb_catalog <arcpy|gdal>] [--bandwidth <MB/s>]
 
 Arguments:
     --source            Path to the source location to transfer files from.
@@ -32,6 +42,12 @@ Arguments:
     --log               Path to the log file.
     --ps_script         Optional path to a PowerShell script for additional operations.
     --files             Optional list of files in the source path to transfer over to the destination path.
+    --workers           Optional number of files to copy at the same time. Defaults to 4.
+    --retries           Optional number of times to retry a file that failed to copy. Defaults to 2.
+    --delta             Optional, only transfer new or changed files. 'stat' compares the size and modified time, 'hash' compares the size and contents.
+    --chunked           Optional, copy large files in resumable chunks and verify their checksum before renaming them into place.
+    --gdb_catalog       Optional library reading the catalog of a destination geodatabase, arcpy or gdal (the OpenFileGDB driver). Defaults to arcpy.
+    --bandwidth         Optional cap on the transfer rate in MB/s, shared by all the workers. Defaults to no cap.
 
 Example:
     python network_transfer.py --source local/drive/path --destination network/drive/path --log network_transfer.txt --files transfer_file.gdb
@@ -41,18 +57,399 @@ Example:
 #========================================================
 import os
 import sys
+import json
 import time
 import arcpy
+import fiona
 import shutil
+import hashlib
 import argparse
 import datetime
+from threading import Lock
+from concurrent.futures import Future, ThreadPoolExecutor
  
 from twobilliontoolkit.Logger.Logger import Logger
 
+#========================================================
+# Globals
+#========================================================
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 2
+
+# Seconds to wait before the first retry of a failed copy, doubled for each retry after that
+RETRY_DELAY = 1.0
+
+# The ways files can be compared with their copy at the destination
+DELTA_MODES = ('stat', 'hash')
+
+# Seconds the modified times can differ by, network shares can round them to 2 seconds
+MTIME_TOLERANCE = 2.0
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Size of each chunk of a chunked copy, files no larger than one chunk are copied in one go
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# A chunked copy is written to the destination path plus this extension, next to a record of its progress
+PARTIAL_EXTENSION = '.partial'
+PROGRESS_EXTENSION = '.partial.json'
+
+# The libraries that can read the catalog of a geodatabase
+GDB_CATALOG_BACKENDS = ('arcpy', 'gdal')
+
+# Schema and edit locks are left behind when a geodatabase is copied file by file
+GDB_LOCK_EXTENSION = '.lock'
+
+# Size of the blocks a file is copied in when the bandwidth is capped
+THROTTLE_BLOCK_SIZE = 256 * 1024
+
+#========================================================
+# Classes
+#========================================================
+class TokenBucket:
+    """
+    Caps the rate bytes are transferred at across threads. The bucket starts empty and fills up at the rate, up to 
+    one second worth of bytes, and each block waits until there are enough tokens for it.
+    """
+    
+    def __init__(self, rate: float) -> None:
+        """
+        Initializes the TokenBucket class.
+
+        Args:
+            rate (float): The cap in bytes per second.
+        """
+        self.rate = rate
+        self.capacity = rate
+        self.tokens = 0
+        self.updated = time.monotonic()
+        self.lock = Lock()
+        
+    def consume(self, amount: int) -> None:
+        """
+        Wait until the given number of bytes can be transferred under the cap.
+
+        Args:
+            amount (int): The number of bytes about to be transferred.
+        """
+        while amount > 0:
+            with self.lock:
+                # Refill the tokens for the time that has passed
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                # Blocks larger than the bucket are taken in parts
+                part = min(amount, self.capacity)
+                if self.tokens >= part:
+                    self.tokens -= part
+                    amount -= part
+                    continue
+                
+                delay = (part - self.tokens) / self.rate
+            
+            time.sleep(delay)
+
+class TransferEngine:
+    """
+    Copies files with a pool of threads, retrying the files that fail and keeping count of what was transferred.
+    
+    Use it as a context manager, files are submitted as they are found, and leaving the block waits for every copy 
+    to finish and logs a summary of the transfer. The throughput of each item (a file or a directory handed to 
+    merge_directories) is also recorded as a metric.
+    """
+    
+    def __init__(self, logger: Logger, workers: int = DEFAULT_WORKERS, retries: int = DEFAULT_RETRIES, delta: str = None, chunked: bool = False, bandwidth: float = None) -> None:
+        """
+        Initializes the TransferEngine class.
+
+        Args:
+            logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+            workers (int, optional): Number of files to copy at the same time. Defaults to DEFAULT_WORKERS.
+            retries (int, optional): Number of times to retry a file that failed to copy. Defaults to DEFAULT_RETRIES.
+            delta (str, optional): One of DELTA_MODES to skip the files that are unchanged at the destination. Defaults to None, every file is copied.
+            chunked (bool, optional): Copy files larger than CHUNK_SIZE in resumable, checksummed chunks. Defaults to False.
+            bandwidth (float, optional): Cap on the transfer rate in MB/s, shared by all the workers. Defaults to None, no cap.
+        """
+        if delta is not None and delta not in DELTA_MODES:
+            raise ValueError(f'The delta mode {delta} is not one of {", ".join(DELTA_MODES)}.')
+        
+        self.logger = logger
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.delta = delta
+        self.chunked = chunked
+        self.bucket = TokenBucket(bandwidth * 1024 * 1024) if bandwidth else None
+        
+        # The statistics of the transfer, in total and for each item
+        self.files = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.skipped_bytes = 0
+        self.failed = []
+        self.items = {}
+        self.lock = Lock()
+        
+        self.pool = None
+        self.futures = []
+        self.start_time = None
+        
+    def __enter__(self):
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.start_time = time.time()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.wait()
+        finally:
+            self.pool.shutdown()
+        
+    @property
+    def success(self) -> bool:
+        """ True if no file has failed to copy. """
+        return not self.failed
+        
+    def submit(self, src_path: str, dst_path: str, item: str = None) -> None:
+        """
+        Queue a file to be copied.
+
+        Args:
+            src_path (str): Path to the source file.
+            dst_path (str): Path to copy the file to.
+            item (str, optional): The item the metrics of the file are recorded under. Defaults to the source file.
+        """
+        self.futures.append(self.pool.submit(self.run, item or src_path, src_path, dst_path, self.transfer_file, src_path, dst_path))
+        
+    def wait(self) -> bool:
+        """
+        Wait for every queued copy to finish, log the summary of the transfer and record the metrics of each item.
+
+        Returns:
+            bool: True if every file was copied.
+        """
+        for future in self.futures:
+            future.result()
+        self.futures = []
+        
+        elapsed = max(time.time() - self.start_time, 1e-6)
+        self.logger.log(message=f'Transferred {self.files} file(s), {self.bytes / (1024 * 1024):.2f} MB in {elapsed:.2f} seconds ({self.bytes / (1024 * 1024) / elapsed:.2f} MB/s, {self.files / elapsed:.2f} files/s) with {self.workers} worker(s). {len(self.failed)} file(s) failed.', tag='INFO')
+        if self.delta:
+            self.logger.log(message=f'Skipped {self.skipped} unchanged file(s), {self.skipped_bytes / (1024 * 1024):.2f} MB were not transferred.', tag='INFO')
+        
+        for item, stats in self.items.items():
+            seconds = max(stats.pop('end') - stats.pop('start'), 1e-6)
+            self.logger.metric('transfer_item', item=item, **stats, seconds=round(seconds, 3), mb_per_s=round(stats['bytes'] / (1024 * 1024) / seconds, 3))
+        self.items = {}
+        
+        return self.success
+        
+    def run(self, item: str, src_path: str, dst_path: str, transfer, *args) -> bool:
+        """
+        Run a queued transfer and add what it moved to the statistics of the transfer and of its item.
+
+        Args:
+            item (str): The item the metrics of the transfer are recorded under.
+            src_path (str): Path to the source, used to report the failure.
+            dst_path (str): Path to the destination, used to report the failure.
+            transfer (Callable): The transfer to run, returning the number of files and bytes copied and skipped.
+            *args: The arguments of the transfer.
+
+        Returns:
+            bool: True if the transfer succeeded.
+        """
+        start = time.time()
+        result = self.retry(src_path, dst_path, transfer, *args)
+        end = time.time()
+        
+        with self.lock:
+            stats = self.items.setdefault(item, {'files': 0, 'bytes': 0, 'skipped_files': 0, 'skipped_bytes': 0, 'failed': 0, 'start': start, 'end': end})
+            stats['start'] = min(stats['start'], start)
+            stats['end'] = max(stats['end'], end)
+            
+            if result is None:
+                stats['failed'] += 1
+                return False
+            
+            files, size, skipped_files, skipped_size = result
+            stats['files'] += files
+            stats['bytes'] += size
+            stats['skipped_files'] += skipped_files
+            stats['skipped_bytes'] += skipped_size
+            
+            self.files += files
+            self.bytes += size
+            self.skipped += skipped_files
+            self.skipped_bytes += skipped_size
+        
+        return True
+        
+    def retry(self, src_path: str, dst_path: str, transfer, *args) -> bool:
+        """
+        Run a transfer, retrying it with an increasing delay if it fails.
+
+        Args:
+            src_path (str): Path to the source, used to report the failure.
+            dst_path (str): Path to the destination, used to report the failure.
+            transfer (Callable): The transfer to run, raising an OSError when it fails.
+            *args: The arguments of the transfer.
+
+        Returns:
+            tuple: The result of the transfer, or None if it failed every attempt.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return transfer(*args)
+            except OSError as error:
+                if attempt == self.retries:
+                    self.logger.log(message=f'An error has been caught while trying to copy {src_path} to {dst_path} after {attempt + 1} attempt(s): {error}', tag='ERROR')
+                    with self.lock:
+                        self.failed.append(src_path)
+                    return None
+                
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+        
+    def throttle(self, amount: int) -> None:
+        """
+        Wait for the bandwidth cap, if there is one, before transferring a number of bytes.
+
+        Args:
+            amount (int): The number of bytes about to be transferred.
+        """
+        if self.bucket:
+            self.bucket.consume(amount)
+        
+    def transfer_file(self, src_path: str, dst_path: str) -> tuple:
+        """
+        Copy a single file, preserving its metadata.
+
+        Args:
+            src_path (str): Path to the source file.
+            dst_path (str): Path to copy the file to.
+            
+        Returns:
+            tuple: The number of files and bytes copied, and the number of files and bytes skipped as unchanged.
+        """
+        size = os.path.getsize(src_path)
+        
+        # Check if there is already an identical copy at the destination
+        if self.delta and self.is_unchanged(src_path, dst_path):
+            return 0, 0, 1, size
+        
+        if self.chunked and size > CHUNK_SIZE:
+            self.copy_chunked(src_path, dst_path)
+        elif self.bucket:
+            self.copy_throttled(src_path, dst_path)
+        else:
+            shutil.copy2(src_path, dst_path)
+        
+        return 1, size, 0, 0
+        
+    def copy_throttled(self, src_path: str, dst_path: str) -> None:
+        """
+        Copy a file in blocks, waiting for the bandwidth cap before each block, and preserve its metadata.
+
+        Args:
+            src_path (str): Path to the source file.
+            dst_path (str): Path to copy the file to.
+        """
+        with open(src_path, 'rb') as src_file, open(dst_path, 'wb') as dst_file:
+            for block in iter(lambda: src_file.read(THROTTLE_BLOCK_SIZE), b''):
+                self.throttle(len(block))
+                dst_file.write(block)
+        
+        shutil.copystat(src_path, dst_path)
+    
+    def copy_chunked(self, src_path: str, dst_path: str) -> None:
+        """
+        Copy a file in chunks to a temporary name next to the destination, recording the offset reached after each chunk 
+        is flushed to disk. A copy that was interrupted resumes from the recorded offset as long as the source has not 
+        changed. Once every chunk is written the temporary file is read back and its checksum compared with the source 
+        before it is renamed into place.
+
+        Args:
+            src_path (str): Path to the source file.
+            dst_path (str): Path to copy the file to.
+            
+        Raises:
+            OSError: If the copy fails or the checksum of the copy does not match the source.
+        """
+        partial_path = dst_path + PARTIAL_EXTENSION
+        progress_path = dst_path + PROGRESS_EXTENSION
+        
+        src_stat = os.stat(src_path)
+        fingerprint = [src_stat.st_size, int(src_stat.st_mtime)]
+        
+        # Check if there is an earlier copy of the same source to resume from
+        offset = 0
+        try:
+            with open(progress_path, 'r') as progress_file:
+                progress = json.load(progress_file)
+            if progress['source'] == fingerprint and os.path.getsize(partial_path) >= progress['offset']:
+                offset = progress['offset']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        src_hash = hashlib.sha256()
+        with open(src_path, 'rb') as src_file, open(partial_path, 'r+b' if offset else 'wb') as partial_file:
+            # Hash the part of the source that was already copied and drop anything written after the recorded offset
+            for chunk in iter(lambda: src_file.read(min(HASH_CHUNK_SIZE, offset - src_file.tell())), b''):
+                src_hash.update(chunk)
+            partial_file.truncate(offset)
+            partial_file.seek(offset)
+            
+            if offset:
+                self.logger.log(message=f'Resuming the copy of {src_path} from {offset / (1024 * 1024):.2f} MB', tag='INFO')
+            
+            for chunk in iter(lambda: src_file.read(CHUNK_SIZE), b''):
+                self.throttle(len(chunk))
+                src_hash.update(chunk)
+                partial_file.write(chunk)
+                partial_file.flush()
+                os.fsync(partial_file.fileno())
+                
+                offset += len(chunk)
+                with open(progress_path, 'w') as progress_file:
+                    json.dump({'source': fingerprint, 'offset': offset}, progress_file)
+        
+        # Verify the copy before it replaces the destination, starting over if it does not match
+        if hash_file(partial_path) != src_hash.hexdigest():
+            os.remove(partial_path)
+            os.remove(progress_path)
+            raise OSError(f'The checksum of the copy does not match {src_path}')
+        
+        shutil.copystat(src_path, partial_path)
+        os.replace(partial_path, dst_path)
+        os.remove(progress_path)
+    
+    def is_unchanged(self, src_path: str, dst_path: str) -> bool:
+        """
+        Check if the destination file is the same as the source file, by size and modified time or by size and contents.
+
+        Args:
+            src_path (str): Path to the source file.
+            dst_path (str): Path to the destination file.
+
+        Returns:
+            bool: True if the destination does not need to be transferred again.
+        """
+        if not os.path.isfile(dst_path):
+            return False
+        
+        src_stat = os.stat(src_path)
+        dst_stat = os.stat(dst_path)
+        if src_stat.st_size != dst_stat.st_size:
+            return False
+        
+        if self.delta == 'hash':
+            return hash_file(src_path) == hash_file(dst_path)
+        
+        return abs(src_stat.st_mtime - dst_stat.st_mtime) <= MTIME_TOLERANCE
+
 #========================================================
 # Entry Function
 #========================================================
-def network_transfer(local_path: str, network_path: str, logger: Logger, list_files: list[str] = None) -> bool:
+def network_transfer(local_path: str, network_path: str, logger: Logger, list_files: list[str] = None, workers: int = DEFAULT_WORKERS, retries: int = DEFAULT_RETRIES, delta: str = None, chunked: bool = False, gdb_catalog: str = 'arcpy', bandwidth: float = None) -> bool:
     """
     Transfer files from local directory to network directory.
     
@@ -61,6 +458,12 @@ def network_transfer(local_path: str, network_path: str, logger: Logger, list_fi
         network_path (str): Path to the network directory.
         logger (Logger): The Logger object to store and write to log files and the command line uniformly.
         list_files (list): Optional. A provided list of files to transfew instead of all.
+        workers (int, optional): Number of files to copy at the same time. Defaults to DEFAULT_WORKERS.
+        retries (int, optional): Number of times to retry a file that failed to copy. Defaults to DEFAULT_RETRIES.
+        delta (str, optional): One of DELTA_MODES to only transfer new or changed files. Defaults to None.
+        chunked (bool, optional): Copy large files in resumable, checksummed chunks. Defaults to False.
+        gdb_catalog (str, optional): The library reading the catalog of an existing destination geodatabase, one of GDB_CATALOG_BACKENDS. Defaults to 'arcpy'.
+        bandwidth (float, optional): Cap on the transfer rate in MB/s, shared by all the workers. Defaults to None, no cap.
         
     Return:
         (bool): success flag of the operation.
@@ -72,33 +475,38 @@ def network_transfer(local_path: str, network_path: str, logger: Logger, list_fi
         else:
             items = list_files
         
-        # Iterate over files in the local directory
-        for item in items:            
-            # Build full paths for source and destination
-            src_path = os.path.join(local_path, item)
-            dest_path = os.path.join(network_path, item)
-
-            # Skip processing files that do not exist in the source directory
-            if not os.path.exists(src_path):
-                continue
-
-            # Transfer files or directories
-            if os.path.isdir(src_path):
-                # Merge Geodatabases if destination exists
-                if item.endswith(".gdb"):
-                    success = merge_gdbs(src_path, dest_path, logger)
-                    if not success:
-                        return False
+        # Iterate over files in the local directory, the plain files and directories are copied by the transfer engine
+        with TransferEngine(logger, workers, retries, delta, chunked, bandwidth) as engine:
+            for item in items:            
+                # Build full paths for source and destination
+                src_path = os.path.join(local_path, item)
+                dest_path = os.path.join(network_path, item)
+
+                # Skip processing files that do not exist in the source directory
+                if not os.path.exists(src_path):
+                    continue
+
+                # Transfer files or directories
+                if os.path.isdir(src_path):
+                    # Merge Geodatabases if destination exists
+                    if item.endswith(".gdb"):
+                        success = merge_gdbs(src_path, dest_path, logger, engine, gdb_catalog)
+                        if not success:
+                            return False
+                    else:
+                        merge_directories(src_path, dest_path, logger, engine)
                 else:
-                    merge_directories(src_path, dest_path, logger)
-            else:
-                if item.endswith(".txt") and os.path.exists(dest_path):
-                    # Append text files if destination file exists
-                    with open(dest_path, "a") as dest_file:
-                        with open(src_path, "r") as src_file:
-                            shutil.copyfileobj(src_file, dest_file)
-                else:      
-                    shutil.copy2(src_path, dest_path)  # preserves metadata              
+                    if item.endswith(".txt") and os.path.exists(dest_path):
+                        # Append text files if destination file exists
+                        with open(dest_path, "a") as dest_file:
+                            with open(src_path, "r") as src_file:
+                                shutil.copyfileobj(src_file, dest_file)
+                    else:      
+                        engine.submit(src_path, dest_path)  # preserves metadata
+                
+        if not engine.success:
+            logger.log(message=f'{len(engine.failed)} file(s) could not be transferred from {local_path} to {network_path}', tag='ERROR')
+            return False
                 
         logger.log(message=f'The transfer of files has been completed', tag='INFO')
     except Exception as error:
@@ -108,50 +516,81 @@ def network_transfer(local_path: str, network_path: str, logger: Logger, list_fi
     
     return True
 
+def network_transfer_background(local_path: str, network_path: str, logger: Logger, **kwargs) -> Future:
+    """
+    Start a network_transfer on a background thread so the caller can carry on with other work.
+    
+    Args:
+        local_path (str): Path to the local directory.
+        network_path (str): Path to the network directory.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly, any errors of the transfer are logged to it.
+        **kwargs: The optional arguments of network_transfer.
+        
+    Return:
+        (Future): The completion handle of the transfer, its result is the success flag of network_transfer.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='network_transfer')
+    future = executor.submit(network_transfer, local_path, network_path, logger, **kwargs)
+    
+    # Let the thread exit once the transfer is done without waiting for it here
+    executor.shutdown(wait=False)
+    
+    return future
+
 #========================================================
 # Helper Functions
 #========================================================
-def merge_gdbs(src_gdb: str, dest_gdb: str, logger: Logger) -> bool:
+def merge_gdbs(src_gdb: str, dest_gdb: str, logger: Logger, engine: TransferEngine = None, gdb_catalog: str = 'arcpy', bandwidth: float = None) -> bool:
     """
     Merge source Geodatabase into destination Geodatabase.
+    
+    A destination that does not exist yet gets a raw copy of the files of the source geodatabase. Otherwise the catalog 
+    of the destination is read once and only the feature classes it is missing are copied.
  
     Args:
         src_gdb (str): Path to the source Geodatabase.
         dest_gdb (str): Path to the destination Geodatabase.
         logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+        engine (TransferEngine, optional): The transfer engine to queue the raw copy on, the caller waits for it. Defaults to a new engine that is waited for before returning.
+        gdb_catalog (str, optional): The library reading the catalog of the destination, one of GDB_CATALOG_BACKENDS. Defaults to 'arcpy'.
+        bandwidth (float, optional): Cap on the transfer rate in MB/s of the raw copy, only when no engine is given (the engine has its own cap). Copies made with arcpy are not capped. Defaults to None.
         
     Return:
         (bool): success flag of the operation.
+        
+    Raises:
+        ValueError: If both an engine and a bandwidth are given.
     """    
-    # Set the workplace for the source geodatabase
-    arcpy.env.workspace = src_gdb
+    if engine is not None and bandwidth is not None:
+        raise ValueError('The bandwidth cap of a merge into an existing transfer engine is set on the engine, not on merge_gdbs.')
+    
     try:
-        # Copy the whole GDB if it does not exist
-        if not arcpy.Exists(dest_gdb):
-            if not os.path.exists(os.path.dirname(dest_gdb)):
-                os.mkdir(os.path.dirname(dest_gdb))
-               
-            # Copy over the whole gdb
-            arcpy.management.Copy(
-                src_gdb,
-                dest_gdb
-            )
+        # Copy the files of the whole GDB if it does not exist, leaving out its locks
+        if not os.path.exists(dest_gdb):
+            if engine is None:
+                with TransferEngine(logger, bandwidth=bandwidth) as engine:
+                    merge_directories(src_gdb, dest_gdb, logger, engine, exclude=(GDB_LOCK_EXTENSION,))
+                
+                if engine.success:
+                    logger.log(message=f'Copy to {dest_gdb} has completed.', tag='INFO')
+                else:
+                    logger.log(message=f'Copy to {dest_gdb} has failed for {len(engine.failed)} file(s).', tag='ERROR')
+                return engine.success
             
-            logger.log(message=f'Copy to {dest_gdb} has completed.', tag='INFO')
+            merge_directories(src_gdb, dest_gdb, logger, engine, exclude=(GDB_LOCK_EXTENSION,))
             return True
-           
+        
+        # Find the feature classes the destination is missing
+        start = time.time()
+        feature_classes = plan_gdb_merge(src_gdb, dest_gdb, gdb_catalog)
     except Exception as error:
         logger.log(message=f'An error has been caught while trying to copy the geodatabase to {dest_gdb}: {error}', tag='ERROR')
         return False
        
-    # Get a list of feature classes in the source geodatabase
-    feature_classes = arcpy.ListFeatureClasses()
+    # Copy every missing feature class, a failed one does not stop the others from being copied
+    failed = []
     for feature_class in feature_classes:
         try:
-            # Skip if already exists in destination
-            if arcpy.Exists(os.path.join(dest_gdb, feature_class)):
-                continue      
-             
             # Copy over the specified feature
             arcpy.management.Copy(
                 os.path.join(src_gdb, feature_class),
@@ -159,14 +598,60 @@ def merge_gdbs(src_gdb: str, dest_gdb: str, logger: Logger) -> bool:
             )            
         except Exception as error:
             # Log the exception
-            logger.log(message=f'An error has been caught while trying to merge the geodatabase to {dest_gdb}: {error}', tag='ERROR')
-            return False
-        
-        logger.log(message=f'Merging to {dest_gdb} has completed.', tag='INFO')
+            logger.log(message=f'An error has been caught while trying to merge {feature_class} into the geodatabase {dest_gdb}: {error}', tag='ERROR')
+            failed.append(feature_class)
+    
+    if failed:
+        logger.log(message=f'Merging {len(feature_classes)} missing feature class(es) to {dest_gdb} has failed for {len(failed)} of them: {", ".join(failed)}', tag='ERROR')
+    else:
+        logger.log(message=f'Merging {len(feature_classes)} missing feature class(es) to {dest_gdb} has completed.', tag='INFO')
+    logger.metric('gdb_merge', item=src_gdb, feature_classes=len(feature_classes) - len(failed), failed=len(failed), seconds=round(time.time() - start, 3))
         
-    return True
+    return not failed
 
-def merge_directories(src_dir: str, dst_dir: str, logger: Logger):
+def plan_gdb_merge(src_gdb: str, dest_gdb: str, gdb_catalog: str = 'arcpy') -> list[str]:
+    """
+    Find the feature classes of the source geodatabase that are missing from the destination, reading each catalog once.
+
+    Args:
+        src_gdb (str): Path to the source Geodatabase.
+        dest_gdb (str): Path to the destination Geodatabase.
+        gdb_catalog (str, optional): The library reading the catalog of the destination, one of GDB_CATALOG_BACKENDS. Defaults to 'arcpy'.
+
+    Returns:
+        list[str]: The names of the feature classes to copy, in the order of the source catalog.
+    """
+    if gdb_catalog not in GDB_CATALOG_BACKENDS:
+        raise ValueError(f'The gdb catalog backend {gdb_catalog} is not one of {", ".join(GDB_CATALOG_BACKENDS)}.')
+    
+    # The source is always read with arcpy since the copy is made with arcpy, geodatabase names are not case sensitive
+    existing = {name.lower() for name in read_gdb_catalog(dest_gdb, gdb_catalog)}
+    
+    return [feature_class for feature_class in read_gdb_catalog(src_gdb) if feature_class.lower() not in existing]
+
+def read_gdb_catalog(gdb_path: str, gdb_catalog: str = 'arcpy') -> list[str]:
+    """
+    List the items at the top level of a geodatabase in a single pass.
+    
+    With arcpy this is the feature classes, GDAL's OpenFileGDB driver also lists the tables (ie. the attachment tables).
+
+    Args:
+        gdb_path (str): Path to the Geodatabase.
+        gdb_catalog (str, optional): The library reading the catalog, one of GDB_CATALOG_BACKENDS. Defaults to 'arcpy'.
+
+    Returns:
+        list[str]: The names in the catalog.
+    """
+    if gdb_catalog == 'gdal':
+        return fiona.listlayers(gdb_path)
+    
+    # Only take the first level of the walk, it does not change the arcpy workspace of the other threads
+    for _, _, feature_classes in arcpy.da.Walk(gdb_path, datatype='FeatureClass'):
+        return list(feature_classes)
+    
+    return []
+
+def merge_directories(src_dir: str, dst_dir: str, logger: Logger, engine: TransferEngine = None, delta: str = None, chunked: bool = False, exclude: tuple[str] = (), bandwidth: float = None) -> None:
     """
     Merge source directory into destination directory.
 
@@ -174,26 +659,55 @@ def merge_directories(src_dir: str, dst_dir: str, logger: Logger):
         src_dir (str): Path to the source directory.
         dst_dir (str): Path to the destination directory.
         logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+        engine (TransferEngine, optional): The transfer engine to queue the files on, the caller waits for it. Defaults to a new engine that is waited for before returning.
+        delta (str, optional): One of DELTA_MODES to only transfer new or changed files, used when no engine is given. Defaults to None.
+        chunked (bool, optional): Copy large files in resumable, checksummed chunks, used when no engine is given. Defaults to False.
+        exclude (tuple[str], optional): File extensions to leave out of the merge. Defaults to none.
+        bandwidth (float, optional): Cap on the transfer rate in MB/s, only when no engine is given (the engine has its own cap). Defaults to None, no cap.
+        
+    Raises:
+        ValueError: If both an engine and a bandwidth are given.
     """
+    if engine is not None and bandwidth is not None:
+        raise ValueError('The bandwidth cap of a merge into an existing transfer engine is set on the engine, not on merge_directories.')
+    
+    # Copy the files with an engine of its own when none was handed over
+    if engine is None:
+        with TransferEngine(logger, delta=delta, chunked=chunked, bandwidth=bandwidth) as engine:
+            merge_directories(src_dir, dst_dir, logger, engine, exclude=exclude)
+        return
+    
     try:
-        if not os.path.exists(dst_dir):
-            shutil.copytree(src_dir, dst_dir)
-        
-        # Iterate over files and subdirectories in the source directory
-        for item in os.listdir(src_dir):
-            src_item = os.path.join(src_dir, item)
-            dst_item = os.path.join(dst_dir, item)
-
-            # If the item is a file, copy it to the destination directory
-            if os.path.isfile(src_item):
-                shutil.copy2(src_item, dst_item)
+        # Walk the source directory once, creating each directory in the destination and queueing its files
+        for root, dirs, files in os.walk(src_dir):
+            dst_root = os.path.normpath(os.path.join(dst_dir, os.path.relpath(root, src_dir)))
+            os.makedirs(dst_root, exist_ok=True)
+            
+            for file in files:
+                if file.lower().endswith(exclude):
+                    continue
                 
-            # If the item is a directory, recursively merge it with the corresponding directory in the destination
-            elif os.path.isdir(src_item):
-                merge_directories(src_item, dst_item, logger)
+                engine.submit(os.path.join(root, file), os.path.join(dst_root, file), item=src_dir)
     except Exception as error:
         # Log the exception
         logger.log(message=f'An error has been caught while trying to merge the {src_dir} to {dst_dir}: {error}', tag='ERROR')
+
+def hash_file(file_path: str) -> str:
+    """
+    Hash the contents of a file, reading it in chunks.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: The SHA-256 hex digest of the file.
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    
+    return file_hash.hexdigest()
                         
 #========================================================
 # Main
@@ -209,6 +723,12 @@ def main():
     parser.add_argument('--log', required=True, help='Path to the log file.')
     parser.add_argument('--ps_script', default='', help='Optional path to a PowerShell script for additional operations.')
     parser.add_argument("--files", nargs="*", help="Optional list of files in the source path to transfer over to the destination path.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Number of files to copy at the same time.')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='Number of times to retry a file that failed to copy.')
+    parser.add_argument('--delta', choices=DELTA_MODES, default=None, help='Only transfer new or changed files, compared by size and modified time (stat) or by contents (hash).')
+    parser.add_argument('--bandwidth', type=float, default=None, help='Cap on the transfer rate in MB/s, shared by all the workers.')
+    parser.add_argument('--gdb_catalog', choices=GDB_CATALOG_BACKENDS, default='arcpy', help='The library reading the catalog of an existing destination geodatabase, arcpy or gdal (the OpenFileGDB driver).')
+    parser.add_argument('--chunked', action='store_true', default=False, help='Copy large files in resumable chunks and verify their checksum before renaming them into place.')
           
     # Parse the command-line arguments
     args = parser.parse_args()
@@ -221,7 +741,7 @@ def main():
     logger.log(message=f'Tool is starting... Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
     
     # Call the entry function
-    _ = network_transfer(args.source, args.destination, logger, args.files or None)
+    _ = network_transfer(args.source, args.destination, logger, args.files or None, args.workers, args.retries, args.delta, args.chunked, args.gdb_catalog, args.bandwidth)
     
     # Get the end time of the script and calculate the elapsed time
     end_time = time.time()
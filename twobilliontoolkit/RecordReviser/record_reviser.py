@@ -36,9 +36,10 @@ import arcpy
 import argparse
 import datetime
 import pandas as pd
+from concurrent.futures import Future
 
 from PyQt5.QtWidgets import QApplication, QTableWidget, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QTableWidgetItem
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QColor, QIcon
 
 from twobilliontoolkit.Logger.Logger import Logger
@@ -54,7 +55,10 @@ session_added_entries = []
 # Classes
 #========================================================
 class DataTableApp(QWidget):
-    def __init__(self, data: Datatracker2BT, logger: Logger, gdb: str = None, filter: dict = None) -> None:
+    # Emitted from the transfer thread once the background network transfer is done, delivered on the GUI thread
+    transfer_done = pyqtSignal()
+    
+    def __init__(self, data: Datatracker2BT, logger: Logger, gdb: str = None, filter: dict = None, transfer: Future = None) -> None:
         """
         Initialize the DataTableApp with the provided data.
 
@@ -63,6 +67,7 @@ class DataTableApp(QWidget):
             logger (Logger): The Logger object to store and write to log files and the command line uniformly.
             gdb (str, optional): The path to the gdb that changes will be made to if applicable.
             filter (dict, optional): The dictionary of filters for the display data.
+            transfer (Future, optional): The handle of a background network transfer of the gdb and datatracker, changes saved before it is done are held until it finishes.
         """        
         super().__init__()
         
@@ -77,10 +82,18 @@ class DataTableApp(QWidget):
         self.filter = filter
         self.refresh_data(data)
         self.gdb = gdb
+        self.transfer = transfer
+        
+        # Changes saved while the transfer is still running, applied once it is done so the GUI never waits on it
+        self.pending_changes = {}
+        self.transfer_done.connect(self.apply_pending_changes)
         
         # Initialize the user interface
         self.init_ui()
         
+        if transfer is not None:
+            transfer.add_done_callback(lambda future: self.transfer_done.emit())
+        
     def init_ui(self) -> None:
         """
         Initialize the user interface components.
@@ -294,6 +307,13 @@ class DataTableApp(QWidget):
 
                 self.original_dataframe.loc[self.original_dataframe[self.key] == project_spatial_id, column] = value
 
+        # Hold the changes until the geodatabase and datatracker are done transferring
+        if self.transfer is not None and not self.transfer.done():
+            for project_spatial_id, changes in changes_dict.items():
+                self.pending_changes.setdefault(project_spatial_id, {}).update(changes)
+            self.logger.log(message='The network transfer is still running, the changes will be saved once it is done.', tag='INFO')
+            return
+
         # Update the records in the original data class
         update_records(self.data, changes_dict, self.gdb)
 
@@ -301,6 +321,21 @@ class DataTableApp(QWidget):
         self.refresh_data(self.data)
         self.reset_changes()
         
+    def apply_pending_changes(self) -> None:
+        """
+        Save the changes that were held while the network transfer was running.
+        """
+        if not self.pending_changes:
+            return
+        
+        changes_dict, self.pending_changes = self.pending_changes, {}
+        self.logger.log(message=f'The network transfer is done, saving the held changes: {changes_dict}', tag='INFO')
+        update_records(self.data, changes_dict, self.gdb)
+
+        # Refresh the data being put into the table and reset the table to the current state
+        self.refresh_data(self.data)
+        self.reset_changes()
+        
     def reset_changes(self) -> None:
         """
         Reset the data in the table to its original state.
@@ -371,7 +406,7 @@ def create_duplicate(data: Datatracker2BT, project_spatial_id: str, new_project_
 
     return new_project_spatial_id
 
-def update_records(data: Datatracker2BT, changes_dict: dict, gdb: str = None) -> None:
+def update_records(data: Datatracker2BT, changes_dict: dict, gdb: str = None, transfer: Future = None) -> None:
     """
     Update records in the data based on the changes provided in the dictionary.
 
@@ -379,7 +414,12 @@ def update_records(data: Datatracker2BT, changes_dict: dict, gdb: str = None) ->
         data (Datatracker2BT): An instance of Datatracker2BT.
         changes_dict (dict): A dictionary containing changes for each project.
         gdb (str, optional): The geodatabase path. If provided, updates are applied to the geodatabase.
+        transfer (Future, optional): The handle of a background network transfer of the gdb and datatracker to wait on before changing them.
     """
+    # Wait for the geodatabase and datatracker to finish transferring before changing them
+    if transfer is not None:
+        transfer.result()
+    
     for project_spatial_id, value in changes_dict.items():
         # Check if the current change updated the project number
         new_project_number = value.get('project_number')
@@ -410,8 +450,9 @@ def update_records(data: Datatracker2BT, changes_dict: dict, gdb: str = None) ->
                 # Rename attachments path if it exists
                 attachments_path = str(data.get_data(project_spatial_id).get('extracted_attachments_path'))
                 if attachments_path not in ['nan', None, 'None']:
-                    # update the attachment path
-                    new_attachments_path = attachments_path.split('proj_')[0] + 'proj_' + project_spatial_id
+                    # update the attachment path, keeping the extension of a packed project (proj_<id>.zip)
+                    extension = os.path.splitext(attachments_path)[1] if os.path.isfile(attachments_path) else ''
+                    new_attachments_path = attachments_path.split('proj_')[0] + 'proj_' + project_spatial_id + extension
                     
                     # Rename the path to the attachments
                     os.rename(
@@ -445,7 +486,7 @@ def update_records(data: Datatracker2BT, changes_dict: dict, gdb: str = None) ->
     # Save the updated data
     data.save_data(update=True)
     
-def record_reviser(logger: Logger, data: Datatracker2BT = None, database_config: str = None, gdb: str = None, load_from: str = 'database', save_to: str = 'database', datatracker: str = None, filter: dict = None, changes: str = None) -> None:
+def record_reviser(logger: Logger, data: Datatracker2BT = None, database_config: str = None, gdb: str = None, load_from: str = 'database', save_to: str = 'database', datatracker: str = None, filter: dict = None, changes: str = None, transfer: Future = None) -> None:
     """
     Handles calling the record reviser parts so the tool can be used outside of command-line as well.
 
@@ -459,6 +500,7 @@ def record_reviser(logger: Logger, data: Datatracker2BT = None, database_config:
         datatracker (str, optional): Path to the datatracker if load_from or save_to is specified as 'datatracker'.
         filter (dict, optional): A dictionary containing filters for the data to be displayed.
         changes (str, optional): A string dictionary containing changes for each project. If provided, no GUI will appear and only process the changes in the dictionary, else a GUI will appear and the user can alter the data as they see fit.
+        transfer (Future, optional): The handle of a background network transfer of the gdb and datatracker, changes are only saved once it is done.
     """
     try:
         if database_config == "...":
@@ -485,12 +527,16 @@ def record_reviser(logger: Logger, data: Datatracker2BT = None, database_config:
         if changes:
             # Parse the changes argument and update records
             changes_dict = ast.literal_eval(changes)
-            update_records(data=data, changes_dict=changes_dict, gdb=gdb)
+            update_records(data=data, changes_dict=changes_dict, gdb=gdb, transfer=transfer)
         else:
             # If no changes dict is provided, open a PyQt application for data visualization
             app = QApplication([])
-            window = DataTableApp(data=data, gdb=gdb, filter=filter, logger=logger)
+            window = DataTableApp(data=data, gdb=gdb, filter=filter, logger=logger, transfer=transfer)
             app.exec_()  
+            
+            # Save the changes still held when the window was closed before the transfer was done
+            if window.pending_changes:
+                update_records(data=data, changes_dict=window.pending_changes, gdb=gdb, transfer=transfer)
     except ValueError as error:
         logger.log(message=f"{error}", tag='ERROR')
     except Exception as error:
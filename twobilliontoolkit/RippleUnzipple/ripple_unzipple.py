@@ -23,23 +23,40 @@ Description:
     It can process both individual compressed files and entire directories, creating corresponding output structures.
 
     - If the input is a directory, the script copies the directory structure to the output location, then unzips all 
-      compressed files recursively within the copied directory.
+      compressed files recursively within the copied directory. In single pass mode the input is only walked once, 
+      archives are extracted straight into the output and only the other files are copied (or hard linked).
     - If the input is a compressed file (.zip or .7z), it extracts the content directly to the output location.
 
     Any compressed files within extracted directories are also recursively extracted. The script logs all actions
     to a specified log file, including any errors or issues encountered.
 
+    The archives extracted from the input are recorded in ripple_unzipple_manifest.json in the output (size, modified 
+    time, destination and status). Running the script again into the same output only extracts the archives that are 
+    new, changed, or were not finished by an interrupted run.
+
 Usage:
-    python ripple_unzipple.py --input <input_path> --output <output_path> [--log <log_file_path>] [--ps_script <script_path>]
+    python ripple_unzipple.py --input <input_path> --output <output_path> [--log <log_file_path>] [--ps_script <script_path>] [--workers <count>] [--single_pass] [--link] [--memory_threshold <MB>] [--include <globs>] [--exclude <globs>] [--catalog_only_size <MB>] [--dedupe {link,alias}] [--backend {auto,python,7z,bsdtar,libarchive}]
+    python ripple_unzipple.py --input <input_path> --catalog <index_path> [--log <log_file_path>]
 
 Arguments:
     --input:        Path to the input directory or compressed file (.zip or .7z).
-    --output:       Path to the output directory where extracted files will be saved.
+    --output:       Path to the output directory where extracted files will be saved. Not needed with --catalog.
     --log:          Path to the log file.
     --ps_script:    Optional path to a PowerShell script for additional operations.
+    --workers:      Optional number of archives to extract concurrently (.zip in threads, .7z in processes). Defaults to 1.
+    --single_pass:  Optional flag to walk an input directory once, extracting archives straight from it instead of copying it first.
+    --link:         Optional flag to hard link non-archive files into the output in single pass mode when on the same filesystem.
+    --memory_threshold: Optional size in MB under which nested archives are extracted in memory without touching disk. Defaults to 0 (disabled).
+    --include:      Optional glob patterns of the archive members to extract.
+    --exclude:      Optional glob patterns of the archive members to never extract.
+    --catalog_only_size: Optional size in MB from which non-spatial archive members are only catalogued (listed in ripple_unzipple_skipped.json) instead of extracted.
+    --dedupe:       Optional, hard link (link) or only record (alias) the extracted files with identical contents in ripple_unzipple_aliases.json.
+    --backend:      Optional tool extracting whole archives. Defaults to auto, which extracts .7z files with a 7z or bsdtar binary or libarchive when one is installed and falls back to py7zr.
+    --catalog:      Optional path of an index file (.json or .parquet) to list every archive member (size, nesting depth, virtual path) in, with a summary, without extracting anything.
 
 Examples:
     python ripple_unzipple.py --input /path/to/input --output /path/to/output --log ripple_unzipple.txt
+    python ripple_unzipple.py --input /path/to/input --catalog /path/to/index.json
 """
 
 #========================================================
@@ -47,19 +64,530 @@ Examples:
 #========================================================
 import os
 import sys
+import json
 import time
+import hashlib
+import shutil
 import argparse
+import subprocess
 import datetime
+from io import BytesIO
+from fnmatch import fnmatchcase
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from zipfile import ZipFile, BadZipFile
 from py7zr import SevenZipFile, Bad7zFile
-from distutils.dir_util import copy_tree
  
-from twobilliontoolkit.Logger.Logger import Logger
+from twobilliontoolkit.Logger.Logger import Logger, QueueLogger
+
+#========================================================
+# Globals
+#========================================================
+ARCHIVE_EXTENSIONS = ('.zip', '.7z')
+SPATIAL_MEMBER_EXTENSIONS = ('.shp', '.shx', '.dbf', '.prj', '.cpg', '.sbn', '.sbx', '.qix', '.shp.xml', '.kml', '.kmz', '.geojson', '.gpkg', '.sqlite')
+SKIPPED_MEMBERS_FILE = 'ripple_unzipple_skipped.json'
+MANIFEST_FILE = 'ripple_unzipple_manifest.json'
+ALIASES_FILE = 'ripple_unzipple_aliases.json'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# The logger of an extraction worker process, sending its records to the listener of the parent's Logger (see init_worker)
+worker_logger = None
+  
+#========================================================
+# Classes
+#========================================================
+class ExtractionPolicy:
+    """
+    Decides which members of an archive are extracted.
+    
+    Members can be filtered with include and exclude glob patterns, and large non-spatial members can be catalogued 
+    (recorded with their size and path inside of the archive) instead of being extracted. Nested archives are always 
+    extracted unless they are excluded, so the members inside of them can be checked as well.
+    """
+    
+    def __init__(self, include: list[str] = None, exclude: list[str] = None, catalog_only_size: int = None) -> None:
+        """
+        Initializes the ExtractionPolicy class.
+
+        Args:
+            include (list[str], optional): Glob patterns of the members to extract, matched against the member path or name. Defaults to every member.
+            exclude (list[str], optional): Glob patterns of the members to never extract. Defaults to none.
+            catalog_only_size (int, optional): Non-spatial members of this size in bytes or larger are only catalogued. Defaults to None (disabled).
+        """
+        self.include = [pattern.lower() for pattern in include or []]
+        self.exclude = [pattern.lower() for pattern in exclude or []]
+        self.catalog_only_size = catalog_only_size
+        
+    def decide(self, name: str, size: int) -> str:
+        """
+        Decide what to do with a member of an archive.
+
+        Args:
+            name (str): The path of the member inside of the archive.
+            size (int): The uncompressed size of the member in bytes.
+
+        Returns:
+            str: 'extract' to extract the member, or the reason it is being skipped ('excluded' or 'catalog_only').
+        """
+        lowercase_name = name.lower().replace('\\', '/')
+        
+        if self.matches(lowercase_name, self.exclude):
+            return 'excluded'
+        
+        if lowercase_name.endswith(ARCHIVE_EXTENSIONS):
+            return 'extract'
+        
+        if self.include and not self.matches(lowercase_name, self.include):
+            return 'excluded'
+        
+        if self.catalog_only_size is not None and size >= self.catalog_only_size and not is_spatial_member(lowercase_name):
+            return 'catalog_only'
+        
+        return 'extract'
+    
+    @staticmethod
+    def matches(lowercase_name: str, patterns: list[str]) -> bool:
+        """
+        Check if a member path or its file name matches any of the glob patterns.
+        """
+        basename = lowercase_name.rstrip('/').rsplit('/', 1)[-1]
+        return any(fnmatchcase(lowercase_name, pattern) or fnmatchcase(basename, pattern) for pattern in patterns)
+
+class PythonBackend:
+    """
+    Extracts whole archives with the zipfile module and py7zr, the archive is already opened by the ArchiveExtractor.
+    """
+    name = 'python'
+    
+    @classmethod
+    def available(cls) -> bool:
+        """ The Python libraries are always installed with the package. """
+        return True
+    
+    def extract(self, archive_ref, file_path: str, extract_path: str) -> None:
+        """
+        Extract every member of an archive.
+
+        Args:
+            archive_ref (ZipFile | SevenZipFile): The opened archive.
+            file_path (str): Path to the compressed file.
+            extract_path (str): Path to extract the compressed file to.
+        """
+        archive_ref.extractall(extract_path)
+
+class CommandBackend(PythonBackend, ABC):
+    """
+    Extracts whole archives by running a local archiver binary, which is much faster than py7zr for .7z files.
+    
+    The binary only reports an exit code, so when it fails the archive is extracted again with the Python libraries. 
+    Corrupt archives, paths that are too long and permission errors are then raised and logged like they always were.
+    """
+    executables = ()
+    
+    # Return codes from this one up are errors, lower ones are only warnings
+    error_code = 1
+    
+    @classmethod
+    def find_executable(cls) -> str:
+        """
+        Find the first of the backend's binaries on the PATH.
+
+        Returns:
+            str: The path to the binary, or None if it is not installed.
+        """
+        return next(filter(None, map(shutil.which, cls.executables)), None)
+    
+    @classmethod
+    def available(cls) -> bool:
+        """ Check if the backend's binary is installed. """
+        return cls.find_executable() is not None
+    
+    @abstractmethod
+    def command(self, executable: str, file_path: str, extract_path: str) -> list[str]:
+        """
+        Build the command line that extracts an archive.
+
+        Args:
+            executable (str): Path to the binary.
+            file_path (str): Path to the compressed file.
+            extract_path (str): Path to extract the compressed file to.
+
+        Returns:
+            list[str]: The command and its arguments.
+        """
+    
+    def extract(self, archive_ref, file_path: str, extract_path: str) -> None:
+        """
+        Extract every member of an archive with the binary.
+
+        Args:
+            archive_ref (ZipFile | SevenZipFile): The opened archive, not used other than to check the archive is valid.
+            file_path (str): Path to the compressed file.
+            extract_path (str): Path to extract the compressed file to.
+        """
+        os.makedirs(extract_path, exist_ok=True)
+        
+        result = subprocess.run(self.command(self.find_executable(), file_path, extract_path), capture_output=True, text=True)
+        if result.returncode >= self.error_code:
+            super().extract(archive_ref, file_path, extract_path)
+
+class SevenZipBackend(CommandBackend):
+    """ Extracts archives with the 7-Zip command line (7z, 7za or 7zz). """
+    name = '7z'
+    executables = ('7z', '7za', '7zz')
+    error_code = 2
+    
+    def command(self, executable: str, file_path: str, extract_path: str) -> list[str]:
+        return [executable, 'x', '-y', '-bd', f'-o{extract_path}', file_path]
+
+class BsdtarBackend(CommandBackend):
+    """ Extracts archives with bsdtar (libarchive's command line, tar.exe on Windows 10 and later). """
+    name = 'bsdtar'
+    executables = ('bsdtar', 'tar.exe') if sys.platform == 'win32' else ('bsdtar',)
+    
+    def command(self, executable: str, file_path: str, extract_path: str) -> list[str]:
+        return [executable, '-x', '-f', file_path, '-C', extract_path]
+
+class LibarchiveBackend(PythonBackend):
+    """ Extracts archives through the libarchive bindings (libarchive-c) without starting a process. """
+    name = 'libarchive'
+    
+    @classmethod
+    def available(cls) -> bool:
+        """ Check if the libarchive bindings and library are installed. """
+        try:
+            import libarchive
+        except (ImportError, OSError):
+            return False
+        return True
+    
+    def extract(self, archive_ref, file_path: str, extract_path: str) -> None:
+        """
+        Extract every member of an archive, writing each one below the extract path.
+
+        Args:
+            archive_ref (ZipFile | SevenZipFile): The opened archive, not used other than to check the archive is valid.
+            file_path (str): Path to the compressed file.
+            extract_path (str): Path to extract the compressed file to.
+        """
+        import libarchive
+        
+        try:
+            with libarchive.file_reader(file_path) as archive:
+                for entry in archive:
+                    target_path = member_target(extract_path, entry.pathname)
+                    if entry.isdir:
+                        os.makedirs(target_path, exist_ok=True)
+                        continue
+                    
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    with open(target_path, 'wb') as file:
+                        for block in entry.get_blocks():
+                            file.write(block)
+        except libarchive.ArchiveError as error:
+            raise archive_error(file_path, f"{self.name}: {error}")
+
+EXTRACTOR_BACKENDS = {backend.name: backend for backend in (PythonBackend, SevenZipBackend, BsdtarBackend, LibarchiveBackend)}
+
+class ArchiveExtractor:
+    """
+    Extracts single .zip and .7z files with a set of extraction settings.
+    
+    The object is handed to the worker pools, so it only holds plain settings.
+    """
+    
+    def __init__(self, memory_threshold: int = 0, policy: ExtractionPolicy = None, backend: str = 'auto') -> None:
+        """
+        Initializes the ArchiveExtractor class.
+
+        Args:
+            memory_threshold (int, optional): Nested archives up to this size in bytes are opened straight from their parent archive in memory instead of being written to disk. Defaults to 0 (disabled).
+            policy (ExtractionPolicy, optional): The policy deciding which members are extracted. Defaults to extracting every member.
+            backend (str, optional): The name of the backend extracting whole archives from disk, or 'auto' to pick the fastest one installed. Defaults to 'auto'.
+        """
+        self.memory_threshold = memory_threshold
+        self.policy = policy
+        self.backend = backend
+        
+    def unzip_file(self, file_path: str, extract_path: str, remove: bool = True, buffer: BytesIO = None, logger: Logger = None) -> tuple[list[tuple], list[dict]]:
+        """
+        Extract a single .zip or .7z file and remove the compressed file afterwards if asked.
+        
+        This runs inside of the worker pools, so errors are raised for the caller to log.
+
+        Args:
+            file_path (str): Path to the compressed file, or its name when a buffer is given.
+            extract_path (str): Path to extract the compressed file to.
+            remove (bool, optional): Remove the compressed file once it has been extracted. Defaults to True.
+            buffer (BytesIO, optional): The contents of the compressed file when it is being read from memory.
+            logger (Logger, optional): The Logger (or the QueueLogger of a worker process) to log warnings to. Defaults to None.
+
+        Returns:
+            tuple[list[tuple], list[dict]]: The queue entries of any compressed files that were written out while extracting the archive, 
+            and the records of the members that were skipped by the extraction policy.
+        """
+        source = buffer if buffer is not None else file_path
+        
+        with ZipFile(source, mode='r') if file_path.endswith(".zip") else SevenZipFile(source, mode='r') as archive_ref:
+            # Get the members before extracting, the 7z reader can only be read through once
+            members = list_members(archive_ref)
+            
+            # Sort the members into the ones written to disk, the nested archives read in memory, and the skipped ones
+            on_disk, in_memory, skipped_members = [], [], []
+            for name, size, is_dir in members:
+                decision = self.policy.decide(name, size) if self.policy and not is_dir else 'extract'
+                
+                if decision != 'extract':
+                    skipped_members.append({
+                        'archive': file_path,
+                        'member': name,
+                        'size': size,
+                        'path': os.path.join(extract_path, os.path.normpath(name)),
+                        'reason': decision
+                    })
+                elif name.endswith(ARCHIVE_EXTENSIONS) and self.memory_threshold > 0 and size <= self.memory_threshold:
+                    in_memory.append(name)
+                else:
+                    on_disk.append(name)
+            
+            # unzip the file to the location
+            buffers = {}
+            if len(on_disk) == len(members) and buffer is None:
+                find_backend(self.backend, os.path.splitext(file_path)[1]).extract(archive_ref, file_path, extract_path)
+            elif len(on_disk) == len(members):
+                archive_ref.extractall(extract_path)
+            elif isinstance(archive_ref, ZipFile):
+                archive_ref.extractall(extract_path, members=on_disk)
+                buffers = {name: BytesIO(archive_ref.read(name)) for name in in_memory}
+            else:
+                if on_disk:
+                    archive_ref.extract(extract_path, targets=on_disk)
+                    archive_ref.reset()
+                if in_memory:
+                    buffers = archive_ref.read(in_memory)
+        
+        # Remove the original compressed file from the new output folder
+        if remove and buffer is None and os.path.exists(file_path):
+            os.remove(file_path)
+        
+        # Return the nested compressed files so they can be extracted in turn
+        nested_archives = []
+        for name in on_disk + in_memory:
+            if not name.endswith(ARCHIVE_EXTENSIONS):
+                continue
+            
+            nested_path = os.path.join(extract_path, os.path.normpath(name))
+            nested_extract_path = os.path.splitext(nested_path)[0]
+            
+            if name not in buffers:
+                nested_archives.append((nested_path, nested_extract_path, True))
+                continue
+            
+            # Extract the nested archive straight from memory
+            try:
+                nested_in_memory, nested_skipped = self.unzip_file(nested_path, nested_extract_path, buffer=buffers[name], logger=logger)
+                nested_archives.extend(nested_in_memory)
+                skipped_members.extend(nested_skipped)
+            except (BadZipFile, Bad7zFile) as error:
+                # Write it out so it is extracted, or logged and placed for manual extraction, like any other archive
+                if logger is not None:
+                    logger.log(message=f'{nested_path} could not be read from memory ({error}), it is written out and extracted from disk instead.', tag='WARNING')
+                os.makedirs(os.path.dirname(nested_path), exist_ok=True)
+                with open(nested_path, 'wb') as file:
+                    file.write(buffers[name].getbuffer())
+                nested_archives.append((nested_path, nested_extract_path, True))
+        
+        return nested_archives, skipped_members
+  
+class ExtractionManifest:
+    """
+    Records the archives of an input that were extracted into an output, so a re-run only extracts new or changed archives.
+    
+    Each archive from the input is recorded with its size, modified time, destination and status. The status is 
+    'pending' until the archive and every archive nested inside of it are extracted, then 'extracted' (or 'failed'). 
+    The manifest is saved once the archives are queued and again as each one is finished, so an interrupted run picks up 
+    again at the archives that were not finished.
+    """
+    
+    def __init__(self, output_path: str) -> None:
+        """
+        Initializes the ExtractionManifest class, loading the manifest already in the output if there is one.
+
+        Args:
+            output_path (str): Path to the output directory the manifest is kept in.
+        """
+        self.path = os.path.join(output_path, MANIFEST_FILE)
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as file:
+                self.entries = json.load(file)
+        
+        # The root archive of each queued archive, and the number of archives still queued for each root archive
+        self.owners = {}
+        self.outstanding = {}
+        
+    @staticmethod
+    def fingerprint(file_path: str) -> dict:
+        """
+        Get the size and modified time (to the second) of a file.
+
+        Args:
+            file_path (str): Path to the file.
+
+        Returns:
+            dict: The size and mtime of the file.
+        """
+        stat = os.stat(file_path)
+        return {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+        
+    def is_current(self, key: str, file_path: str) -> bool:
+        """
+        Check if an archive was already extracted and has not changed since.
+
+        Args:
+            key (str): The path of the archive relative to the input.
+            file_path (str): Path to the archive.
+
+        Returns:
+            bool: True if the archive can be skipped.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry['status'] != 'extracted':
+            return False
+        
+        return {'size': entry['size'], 'mtime': entry['mtime']} == self.fingerprint(file_path) and os.path.exists(entry['destination'])
+    
+    def skipped_members(self, key: str) -> list[dict]:
+        """
+        Get the members the extraction policy skipped the last time an archive was extracted.
+
+        Args:
+            key (str): The path of the archive relative to the input.
+
+        Returns:
+            list[dict]: The records of the skipped members.
+        """
+        return self.entries[key].get('skipped_members', [])
+        
+    def start(self, key: str, file_path: str, destination: str) -> None:
+        """
+        Record that an archive from the input is about to be extracted, the entry is only kept in memory until the next save.
+
+        Args:
+            key (str): The path of the archive relative to the input.
+            file_path (str): Path to the archive being extracted.
+            destination (str): Path the archive is extracted to.
+        """
+        # Files deduplicated by a previous run may share their data with files from other archives, so they are split up before being overwritten
+        if key in self.entries and os.path.exists(destination):
+            break_links(destination)
+        
+        self.entries[key] = {**self.fingerprint(file_path), 'destination': destination, 'status': 'pending', 'skipped_members': []}
+        self.owners[file_path] = key
+        self.outstanding[key] = 1
+        
+    def finish(self, file_path: str, nested_archives: list[tuple] = None, skipped_members: list[dict] = None, failed: bool = False) -> None:
+        """
+        Record that a queued archive was extracted, marking its root archive as done once nothing nested in it is left.
+
+        Args:
+            file_path (str): Path to the archive that was extracted.
+            nested_archives (list[tuple], optional): The queue entries of the archives found inside of it.
+            skipped_members (list[dict], optional): The records of the members that were skipped by the extraction policy.
+            failed (bool, optional): The archive could not be extracted. Defaults to False.
+        """
+        key = self.owners.pop(file_path, None)
+        if key is None:
+            return
+        
+        nested_archives = nested_archives or []
+        for nested_archive in nested_archives:
+            self.owners[nested_archive[0]] = key
+        
+        entry = self.entries[key]
+        entry['skipped_members'].extend(skipped_members or [])
+        if failed:
+            entry['status'] = 'failed'
+        
+        self.outstanding[key] += len(nested_archives) - 1
+        if self.outstanding[key] == 0:
+            del self.outstanding[key]
+            if entry['status'] == 'pending':
+                entry['status'] = 'extracted'
+            self.save()
+    
+    def save(self) -> None:
+        """
+        Write the manifest to the output, replacing the old one in a single step so an interruption never leaves it half written.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(self.entries, file, indent=4)
+        os.replace(temporary_path, self.path)
   
+#========================================================
+# Backend Functions
+#========================================================
+@lru_cache(maxsize=None)
+def find_backend(name: str, extension: str) -> PythonBackend:
+    """
+    Get the backend that extracts whole archives of a type, looked up once per process.
+    
+    With 'auto', .7z files go to the first installed of the 7-Zip binary, bsdtar or libarchive, since py7zr is pure Python. 
+    .zip files stay with the zipfile module, which already decompresses in C and does not pay for starting a process.
+
+    Args:
+        name (str): The name of the backend, or 'auto'.
+        extension (str): The extension of the archive ('.zip' or '.7z').
+
+    Returns:
+        PythonBackend: The backend to extract with.
+    """
+    if name != 'auto':
+        return EXTRACTOR_BACKENDS[name]()
+    
+    if extension == '.7z':
+        for backend in (SevenZipBackend, BsdtarBackend, LibarchiveBackend):
+            if backend.available():
+                return backend()
+    
+    return PythonBackend()
+
+def archive_error(file_path: str, message: str) -> Exception:
+    """
+    Build the error the Python library would raise for a corrupt archive of the same type.
+
+    Args:
+        file_path (str): Path to the compressed file.
+        message (str): The description of the error.
+
+    Returns:
+        Exception: A BadZipFile for .zip files, or a Bad7zFile.
+    """
+    return BadZipFile(message) if file_path.endswith('.zip') else Bad7zFile(message)
+
+def member_target(extract_path: str, name: str) -> str:
+    """
+    Build the path an archive member is extracted to, dropping any parts that would place it outside of the extract path.
+
+    Args:
+        extract_path (str): Path the archive is extracted to.
+        name (str): The path of the member inside of the archive.
+
+    Returns:
+        str: The path to write the member to.
+    """
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.', '..') and not part.endswith(':')]
+    return os.path.join(extract_path, *parts)
+
 #========================================================
 # Unzipping Functions
 #========================================================
-def ripple_unzip(input_path: str, output_path: str, logger: Logger) -> None:
+def ripple_unzip(input_path: str, output_path: str, logger: Logger, workers: int = 1, single_pass: bool = False, link_files: bool = False, memory_threshold: int = 0, policy: ExtractionPolicy = None, dedupe: str = None, backend: str = 'auto') -> list[dict]:
     """
     Unzip .zip and .7z files either for a directory or a compressed file.
 
@@ -67,28 +595,73 @@ def ripple_unzip(input_path: str, output_path: str, logger: Logger) -> None:
         input_path (str): Path to the input directory or compressed file.
         output_path (str): Path to the output directory.
         logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+        workers (int, optional): Number of archives to extract concurrently. Defaults to 1.
+        single_pass (bool, optional): For a directory input, walk the input once and extract the archives straight from it instead of copying the whole directory first. Defaults to False.
+        link_files (bool, optional): In single pass mode, hard link the non-archive files into the output when on the same filesystem instead of copying them. Defaults to False.
+        memory_threshold (int, optional): Nested archives up to this size in bytes are extracted straight from their parent archive in memory without being written to disk. Defaults to 0 (disabled).
+        policy (ExtractionPolicy, optional): The policy deciding which archive members are extracted. Skipped members are recorded in the SKIPPED_MEMBERS_FILE of the output. Defaults to extracting every member.
+        dedupe (str, optional): Find the files with identical contents in the output once everything is extracted, and either hard link them to a single copy ('link') or only record them ('alias'). The duplicates are recorded in the ALIASES_FILE of the output. Defaults to None (disabled).
+        backend (str, optional): The backend extracting whole archives ('python', '7z', 'bsdtar' or 'libarchive'), or 'auto' to pick the fastest one installed. Partial extractions and archives read from memory always use the Python libraries. Defaults to 'auto'.
+        
+    Returns:
+        list[dict]: The records (archive, member, size, path, reason) of the archive members that were not extracted.
     """
+    # Create the extractor holding the settings for each archive
+    extractor = ArchiveExtractor(memory_threshold, policy, backend)
+    
     try:
         # Check if the provided path exists
         if not os.path.exists(input_path):
             raise ValueError(f"ValueError: The specified path ({input_path}) does not exist")
+        
+        # Check the extractor backend can be used
+        if backend != 'auto' and (backend not in EXTRACTOR_BACKENDS or not EXTRACTOR_BACKENDS[backend].available()):
+            raise ValueError(f"ValueError: The extractor backend ({backend}) is not supported or not installed. Please choose one of: auto, {', '.join(EXTRACTOR_BACKENDS)}")
+        
+        # Load the record of what was already extracted into the output
+        manifest = ExtractionManifest(output_path)
 
         # Handle different input extensions
-        if os.path.isdir(input_path):
+        if os.path.isdir(input_path) and single_pass:
+            skipped_members = single_pass_unzip(input_path, output_path, logger, workers, link_files, extractor, manifest)
+            
+        elif os.path.isdir(input_path):
             # First copy the directory to the new location 
-            copy_tree(input_path, output_path)
-            recursive_unzip(output_path, output_path, input_path, logger)
+            skipped_members = copy_input_tree(input_path, output_path, manifest)
+            skipped_members += recursive_unzip(output_path, output_path, input_path, logger, workers, extractor, manifest)
         
         elif input_path.endswith((".zip", ".7z")):
             os.makedirs(output_path, exist_ok=True)
-
-            with ZipFile(input_path, mode='r') if input_path.endswith(".zip") else SevenZipFile(input_path, mode='r') as archive_ref:
-                archive_ref.extractall(output_path)
-                recursive_unzip(output_path, output_path, input_path, logger)
+            key = os.path.basename(input_path)
+            
+            if manifest.is_current(key, input_path):
+                logger.log(message=f'{input_path} has not changed since it was extracted, skipping it.', tag='INFO')
+                skipped_members = manifest.skipped_members(key)
+            else:
+                # Extract the input archive and queue up the archives that were inside of it
+                manifest.start(key, input_path, output_path)
+                manifest.save()
+                nested_archives, skipped_members = extractor.unzip_file(input_path, output_path, remove=False, logger=logger)
+                manifest.finish(input_path, nested_archives, skipped_members)
+                skipped_members += extract_queue(deque(nested_archives), logger, workers, extractor, manifest)
         
         else:
             raise ValueError("ValueError: Unsupported input type. Please provide a directory or a compressed file.")
         
+        # Record the members that were not extracted so they can still be listed
+        if policy is not None:
+            with open(os.path.join(output_path, SKIPPED_MEMBERS_FILE), 'w') as file:
+                json.dump(skipped_members, file, indent=4)
+            
+            if skipped_members:
+                logger.log(message=f'{len(skipped_members)} archive member(s) were not extracted because of the extraction policy, they are listed in {SKIPPED_MEMBERS_FILE}.', tag='INFO')
+        
+        # Store the files that appear in several archives once
+        if dedupe is not None:
+            dedupe_output(output_path, logger, link_files=dedupe == 'link')
+        
+        return skipped_members
+        
     except ValueError as error:
         logger.log(message=error, tag='ERROR')
         raise ValueError(error)   
@@ -96,20 +669,70 @@ def ripple_unzip(input_path: str, output_path: str, logger: Logger) -> None:
         logger.log(message=error, tag='ERROR')
         raise Exception(error)  
     
-def recursive_unzip(input_path: str, output_path: str, original_input_path: str, logger: Logger) -> None:   
+def copy_input_tree(input_path: str, output_path: str, manifest: ExtractionManifest) -> list[dict]:
+    """
+    Copy an input directory to the output, leaving out the archives that were already extracted and have not changed, 
+    and any other file that is already in the output with the same size and modified time.
+
+    Args:
+        input_path (str): Path to the input directory.
+        output_path (str): Path to the output directory.
+        manifest (ExtractionManifest): The record of the archives already extracted into the output.
+        
+    Returns:
+        list[dict]: The records of the members the extraction policy skipped in the archives that were left out.
+    """
+    skipped_members = []
+    for root, dirs, files in os.walk(input_path):
+        # Mirror the directory in the output
+        output_root = os.path.normpath(os.path.join(output_path, os.path.relpath(root, input_path)))
+        os.makedirs(output_root, exist_ok=True)
+        
+        for file in files:
+            file_path = os.path.join(root, file)
+            output_file_path = os.path.join(output_root, file)
+            
+            # Leave out the archives that do not need to be extracted again
+            key = os.path.relpath(file_path, input_path)
+            if file.endswith(ARCHIVE_EXTENSIONS) and manifest.is_current(key, file_path):
+                skipped_members.extend(manifest.skipped_members(key))
+                continue
+            
+            if os.path.exists(output_file_path):
+                if manifest.fingerprint(output_file_path) == manifest.fingerprint(file_path):
+                    continue
+                
+                # Remove the old file first, it may be hard linked to other files
+                os.remove(output_file_path)
+            
+            shutil.copy2(file_path, output_file_path)
+            
+    return skipped_members
+
+def recursive_unzip(input_path: str, output_path: str, original_input_path: str, logger: Logger, workers: int = 1, extractor: ArchiveExtractor = None, manifest: ExtractionManifest = None) -> list[dict]:   
     """
     Recursively unzip .zip and .7z files in the input_path to the output_path.
 
+    The directory tree is walked once to find the archives already in it, after that every archive is extracted 
+    exactly once and any archives it contained are added to the queue, so extracted folders are never walked again.
+
     Args:
         input_path (str): Path to the input directory or compressed file.
         output_path (str): Path to the output directory.
         original_input_path (str): Path of the original input compress/directory.
         logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+        workers (int, optional): Number of archives to extract concurrently. Defaults to 1.
+        extractor (ArchiveExtractor, optional): The settings to extract each archive with. Defaults to the standard settings.
+        manifest (ExtractionManifest, optional): The record to add each archive found in the directory to. Defaults to None.
+        
+    Returns:
+        list[dict]: The records of the archive members that were skipped by the extraction policy.
     """
     # Create output_path if it doesn't exist
     os.makedirs(output_path, exist_ok=True)
     
-    # Iterate through the directory and unzip any compressed folders
+    # Walk the directory once to queue up any compressed folders
+    archive_queue = deque()
     for root, dirs, files in os.walk(input_path):
         for file in files:
             # Get the file path of the input 
@@ -119,31 +742,574 @@ def recursive_unzip(input_path: str, output_path: str, original_input_path: str,
             if file_path == original_input_path:
                 continue
 
-            file_to_remove = ''
-            if file.endswith((".zip", ".7z")):
-                try:    
-                    with ZipFile(file_path, mode='r') if file.endswith(".zip") else SevenZipFile(file_path, mode='r') as archive_ref:
-                        # Get the path that the file will be extracted to
-                        extract_path = os.path.join(output_path, os.path.splitext(file_path)[0]) 
-                        
-                        # unzip the file to the location
-                        archive_ref.extractall(extract_path)
-
-                        # Recursively call the function to check every file in the directory tree
-                        recursive_unzip(extract_path, extract_path, original_input_path, logger)
-
-                        # Flag the compressed file to be removed
-                        file_to_remove = extract_path + '.zip' if file.endswith(".zip") else extract_path + '.7z'
-                except FileNotFoundError as error:
-                    logger.log(message=f"FileNotFoundError: {error.strerror} in ({file_path})\n\nA common cause for this issue may be that the MAX_PATH_LENGTH for your machine's directory is surpassed. The compressed directory will be placed in the folder for you to extract manually. Please read the Configuration section in the README to resolve this issue.", tag='ERROR')
-                    continue
-                except (BadZipFile, Bad7zFile) as error:
-                    logger.log(message=f"BadZipFile or Bad7ZFile: {error.strerror} with ({file_path})\n\nContinuing the tool and placing file for manual extracting.", tag='ERROR')
+            if not file.endswith(ARCHIVE_EXTENSIONS):
+                continue
+            
+            if manifest is None:
+                archive_queue.append((file_path, os.path.splitext(file_path)[0], True))
+                continue
+            
+            # Nested archives left over from an interrupted run are extracted again with the archive they came from
+            key = os.path.relpath(file_path, input_path)
+            if not os.path.exists(os.path.join(original_input_path, key)):
+                continue
+            
+            archive_queue.append((file_path, os.path.splitext(file_path)[0], True))
+            manifest.start(key, file_path, os.path.splitext(file_path)[0])
+    
+    # Save the queued archives in one write before any of them are extracted
+    if manifest is not None:
+        manifest.save()
+    
+    # Extract each archive and queue up the archives that were inside of it
+    return extract_queue(archive_queue, logger, workers, extractor, manifest)
+
+def single_pass_unzip(input_path: str, output_path: str, logger: Logger, workers: int = 1, link_files: bool = False, extractor: ArchiveExtractor = None, manifest: ExtractionManifest = None) -> list[dict]:
+    """
+    Unzip a directory by walking the input once, archives are extracted straight from the input into the output and 
+    every other file is copied (or hard linked) across, so no copies of the archives are ever written.
+
+    Args:
+        input_path (str): Path to the input directory.
+        output_path (str): Path to the output directory.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+        workers (int, optional): Number of archives to extract concurrently. Defaults to 1.
+        link_files (bool, optional): Hard link the non-archive files instead of copying them when possible. Defaults to False.
+        extractor (ArchiveExtractor, optional): The settings to extract each archive with. Defaults to the standard settings.
+        manifest (ExtractionManifest, optional): The record of the archives already extracted into the output, unchanged ones are skipped. Defaults to None.
+        
+    Returns:
+        list[dict]: The records of the archive members that were skipped by the extraction policy.
+    """
+    skipped_members = []
+    archive_queue = deque()
+    for root, dirs, files in os.walk(input_path):
+        # Mirror the directory in the output
+        output_root = os.path.normpath(os.path.join(output_path, os.path.relpath(root, input_path)))
+        os.makedirs(output_root, exist_ok=True)
+        
+        for file in files:
+            file_path = os.path.join(root, file)
+            output_file_path = os.path.join(output_root, file)
+            
+            # Queue the archives to be extracted from where they are, the input archive is kept
+            if not file.endswith(ARCHIVE_EXTENSIONS):
+                # Leave the files already in the output with the same size and modified time alone
+                if manifest is not None and os.path.exists(output_file_path) and manifest.fingerprint(output_file_path) == manifest.fingerprint(file_path):
                     continue
+                
+                place_file(file_path, output_file_path, link_files)
+                continue
+            
+            if manifest is None:
+                archive_queue.append((file_path, os.path.splitext(output_file_path)[0], False))
+                continue
+            
+            # Skip the archives that were already extracted and have not changed
+            key = os.path.relpath(file_path, input_path)
+            if manifest.is_current(key, file_path):
+                skipped_members.extend(manifest.skipped_members(key))
+                continue
+            
+            archive_queue.append((file_path, os.path.splitext(output_file_path)[0], False))
+            manifest.start(key, file_path, os.path.splitext(output_file_path)[0])
+    
+    # Save the queued archives in one write before any of them are extracted
+    if manifest is not None:
+        manifest.save()
+    
+    # Extract each archive and queue up the archives that were inside of it
+    return skipped_members + extract_queue(archive_queue, logger, workers, extractor, manifest)
+
+def place_file(file_path: str, output_file_path: str, link_files: bool = False) -> None:
+    """
+    Place a copy of a file in the output, hard linking it instead when asked and the paths are on the same filesystem.
+
+    Args:
+        file_path (str): Path to the source file.
+        output_file_path (str): Path the file will be placed at.
+        link_files (bool, optional): Try to hard link the file before falling back to a copy. Defaults to False.
+    """
+    # Remove the old file first, it may be hard linked to other files
+    if os.path.exists(output_file_path):
+        os.remove(output_file_path)
+        
+    if link_files:
+        try:
+            os.link(file_path, output_file_path)
+            return
+        except OSError:
+            # Different filesystems or no hard link support, fall back to copying
+            pass
+    
+    shutil.copy2(file_path, output_file_path)
+
+def extract_queue(archive_queue: deque, logger: Logger, workers: int = 1, extractor: ArchiveExtractor = None, manifest: ExtractionManifest = None) -> list[dict]:
+    """
+    Extract every archive in the queue, adding the archives found inside each one to the queue until it is empty.
+
+    Args:
+        archive_queue (deque): The queue of (compressed file path, extract path, remove after) to extract.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+        workers (int, optional): Number of archives to extract concurrently. Defaults to 1.
+        extractor (ArchiveExtractor, optional): The settings to extract each archive with. Defaults to the standard settings.
+        manifest (ExtractionManifest, optional): The record to mark each archive as extracted in. Defaults to None.
+        
+    Returns:
+        list[dict]: The records of the archive members that were skipped by the extraction policy.
+    """
+    extractor = extractor or ArchiveExtractor()
+    
+    if workers > 1:
+        return parallel_unzip(archive_queue, logger, workers, extractor, manifest)
+    
+    skipped_members = []
+    while archive_queue:
+        nested_archives, skipped = extract_archive(*archive_queue.popleft(), logger, extractor, manifest)
+        archive_queue.extend(nested_archives)
+        skipped_members.extend(skipped)
+        
+    return skipped_members
+
+def parallel_unzip(archive_queue: deque, logger: Logger, workers: int, extractor: ArchiveExtractor, manifest: ExtractionManifest = None) -> list[dict]:
+    """
+    Extract the queued archives concurrently, .zip files in a thread pool and the CPU bound .7z files in a process pool 
+    that is only started once a .7z file is queued.
+    
+    Archives found inside of an extracted archive go back into the shared queue. The worker processes log through a 
+    QueueLogger to a listener started on the logger, which is stopped once the pool is done.
+
+    Args:
+        archive_queue (deque): The queue of (compressed file path, extract path, remove after) to extract.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+        workers (int): The number of workers in each pool.
+        extractor (ArchiveExtractor): The settings to extract each archive with.
+        manifest (ExtractionManifest, optional): The record to mark each archive as extracted in. Defaults to None.
+        
+    Returns:
+        list[dict]: The records of the archive members that were skipped by the extraction policy.
+    """
+    skipped_members = []
+    process_pool = None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as thread_pool:
+            pending = {}
+            while archive_queue or pending:
+                # Hand out every queued archive to the pool that suits it
+                while archive_queue:
+                    archive = archive_queue.popleft()
+                    if archive[0].endswith('.zip'):
+                        pending[thread_pool.submit(extractor.unzip_file, *archive, logger=logger)] = archive
+                        continue
+                    
+                    # Only start the worker processes once there is a .7z file for them
+                    if process_pool is None:
+                        process_pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(logger.start_listener(),))
+                    pending[process_pool.submit(unzip_in_worker, extractor, *archive)] = archive
+                
+                # Queue up the nested archives as soon as any extraction finishes
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    archive = pending.pop(future)
+                    try:
+                        nested_archives, skipped = future.result()
+                    except (FileNotFoundError, BadZipFile, Bad7zFile) as error:
+                        handle_extraction_error(error, *archive, logger)
+                        if manifest is not None:
+                            manifest.finish(archive[0], failed=True)
+                        continue
+                    
+                    if manifest is not None:
+                        manifest.finish(archive[0], nested_archives, skipped)
+                    archive_queue.extend(nested_archives)
+                    skipped_members.extend(skipped)
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+            logger.stop_listener()
+                    
+    return skipped_members
+
+def init_worker(log_queue) -> None:
+    """
+    Set up an extraction worker process to log through the queue of the parent's Logger.
+
+    Args:
+        log_queue (multiprocessing.Queue): The queue returned by Logger.start_listener.
+    """
+    global worker_logger
+    worker_logger = QueueLogger(log_queue)
+
+def unzip_in_worker(extractor: ArchiveExtractor, file_path: str, extract_path: str, remove: bool) -> tuple[list[tuple], list[dict]]:
+    """
+    Extract a single .zip or .7z file in a worker process, logging through the logger set up by init_worker.
+
+    Args:
+        extractor (ArchiveExtractor): The settings to extract the archive with.
+        file_path (str): Path to the compressed file.
+        extract_path (str): Path to extract the compressed file to.
+        remove (bool): Remove the compressed file once it has been extracted.
 
-                # Remove the original compressed file from the new output folder
-                if os.path.exists(file_to_remove):
-                    os.remove(file_to_remove)
+    Returns:
+        tuple[list[tuple], list[dict]]: The queue entries of the nested archives, and the records of the skipped members.
+    """
+    return extractor.unzip_file(file_path, extract_path, remove, logger=worker_logger)
+
+def extract_archive(file_path: str, extract_path: str, remove: bool, logger: Logger, extractor: ArchiveExtractor, manifest: ExtractionManifest = None) -> tuple[list[tuple], list[dict]]:
+    """
+    Extract a single .zip or .7z file, logging any problem with the compressed file instead of raising it.
+
+    Args:
+        file_path (str): Path to the compressed file.
+        extract_path (str): Path to extract the compressed file to.
+        remove (bool): Remove the compressed file once it has been extracted.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+        extractor (ArchiveExtractor): The settings to extract the archive with.
+        manifest (ExtractionManifest, optional): The record to mark the archive as extracted (or failed) in. Defaults to None.
+
+    Returns:
+        tuple[list[tuple], list[dict]]: The queue entries of any compressed files that were extracted from the archive, and the records of the skipped members.
+    """
+    try:
+        nested_archives, skipped_members = extractor.unzip_file(file_path, extract_path, remove, logger=logger)
+    except (FileNotFoundError, BadZipFile, Bad7zFile) as error:
+        handle_extraction_error(error, file_path, extract_path, remove, logger)
+        if manifest is not None:
+            manifest.finish(file_path, failed=True)
+        return [], []
+    
+    if manifest is not None:
+        manifest.finish(file_path, nested_archives, skipped_members)
+    return nested_archives, skipped_members
+
+def handle_extraction_error(error: Exception, file_path: str, extract_path: str, remove: bool, logger: Logger) -> None:
+    """
+    Log an error that stopped a compressed file from being extracted, and make sure the compressed file is placed in the output for manual extraction.
+
+    Args:
+        error (Exception): The error that was raised.
+        file_path (str): Path to the compressed file.
+        extract_path (str): Path the compressed file was being extracted to.
+        remove (bool): If False, the compressed file is not in the output yet and gets copied there.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+    """
+    if isinstance(error, FileNotFoundError):
+        logger.log(message=f"FileNotFoundError: {error.strerror} in ({file_path})\n\nA common cause for this issue may be that the MAX_PATH_LENGTH for your machine's directory is surpassed. The compressed directory will be placed in the folder for you to extract manually. Please read the Configuration section in the README to resolve this issue.", tag='ERROR')
+    else:
+        logger.log(message=f"BadZipFile or Bad7ZFile: {error} with ({file_path})\n\nContinuing the tool and placing file for manual extracting.", tag='ERROR')
+    
+    # Place the compressed file in the output when it was being extracted from the input
+    if not remove:
+        shutil.copy2(file_path, extract_path + os.path.splitext(file_path)[1])
+
+def list_members(archive_ref) -> list[tuple]:
+    """
+    List the files in an opened archive along with their uncompressed sizes.
+
+    Args:
+        archive_ref (ZipFile | SevenZipFile): The opened archive.
+
+    Returns:
+        list[tuple]: A (member name, uncompressed size, is directory) tuple for each member of the archive.
+    """
+    if isinstance(archive_ref, ZipFile):
+        return [(info.filename, info.file_size, info.is_dir()) for info in archive_ref.infolist()]
+    
+    return [(info.filename, info.uncompressed, info.is_directory) for info in archive_ref.list()]
+
+def is_spatial_member(name: str) -> bool:
+    """
+    Check if an archive member is part of a spatial dataset, including the files inside of a geodatabase.
+
+    Args:
+        name (str): The lowercase path of the member inside of the archive.
+
+    Returns:
+        bool: True if the member is spatial data.
+    """
+    return name.endswith(SPATIAL_MEMBER_EXTENSIONS) or '.gdb/' in name
+  
+#========================================================
+# Deduplication Functions
+#========================================================
+def dedupe_output(output_path: str, logger: Logger, link_files: bool = True) -> dict:
+    """
+    Find the files in the output with identical contents, and hard link each duplicate to the first copy so it is only stored once.
+    
+    Only files of the same size are hashed. The files inside of geodatabases are left alone, since they are opened and 
+    written to as a whole. The duplicates are recorded in the ALIASES_FILE of the output, for the Spatial Transformer to 
+    only convert each dataset once. The extracted files should not be edited in place once they are linked.
+
+    Args:
+        output_path (str): Path to the output directory.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+        link_files (bool, optional): Hard link the duplicates, if False (or hard links are not supported) they are only recorded. Defaults to True.
+
+    Returns:
+        dict: The path of each duplicate file relative to the output, mapped to the relative path of the file it duplicates.
+    """
+    # Group the files by size, only files of the same size can be identical
+    files_by_size = {}
+    for root, dirs, files in os.walk(output_path):
+        dirs[:] = [dir for dir in dirs if not dir.lower().endswith('.gdb')]
+        
+        for file in files:
+            if file in (SKIPPED_MEMBERS_FILE, MANIFEST_FILE, ALIASES_FILE):
+                continue
+            
+            file_path = os.path.join(root, file)
+            size = os.path.getsize(file_path)
+            if size:
+                files_by_size.setdefault(size, []).append(os.path.relpath(file_path, output_path))
+    
+    aliases = {}
+    saved_bytes = 0
+    for size, relative_paths in files_by_size.items():
+        if len(relative_paths) < 2:
+            continue
+        
+        # Hash each file once, files that are already hard linked together share the hash of their first copy
+        originals = {}
+        hashes_by_inode = {}
+        for relative_path in sorted(relative_paths):
+            file_path = os.path.join(output_path, relative_path)
+            stat = os.stat(file_path)
+            inode = (stat.st_dev, stat.st_ino)
+            
+            if inode not in hashes_by_inode:
+                hashes_by_inode[inode] = hash_file(file_path)
+            content_hash = hashes_by_inode[inode]
+            
+            if content_hash not in originals:
+                originals[content_hash] = (relative_path, inode)
+                continue
+            
+            original_path, original_inode = originals[content_hash]
+            aliases[relative_path] = original_path
+            if link_files and inode != original_inode and link_duplicate(os.path.join(output_path, original_path), file_path):
+                saved_bytes += size
+    
+    with open(os.path.join(output_path, ALIASES_FILE), 'w') as file:
+        json.dump(aliases, file, indent=4)
+    
+    if aliases:
+        logger.log(message=f'{len(aliases)} extracted file(s) are duplicates of other files, they are listed in {ALIASES_FILE}. {saved_bytes / (1024 * 1024):.2f} MB were saved by hard linking them.', tag='INFO')
+    
+    return aliases
+
+def hash_file(file_path: str) -> str:
+    """
+    Hash the contents of a file, reading it in chunks.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: The SHA-256 hex digest of the file.
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    
+    return file_hash.hexdigest()
+
+def link_duplicate(original_path: str, duplicate_path: str) -> bool:
+    """
+    Replace a duplicate file with a hard link to the original, in a single step so the duplicate is never missing.
+
+    Args:
+        original_path (str): Path to the file that is kept.
+        duplicate_path (str): Path to the identical file to replace.
+
+    Returns:
+        bool: True if the duplicate was linked, False if hard links are not supported there.
+    """
+    temporary_path = duplicate_path + '.link'
+    try:
+        os.link(original_path, temporary_path)
+        os.replace(temporary_path, duplicate_path)
+        return True
+    except OSError:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        return False
+
+def break_links(path: str) -> None:
+    """
+    Give every hard linked file under a directory its own copy of its data, so the file can be overwritten without changing the files it is linked to.
+
+    Args:
+        path (str): Path to the directory (or file).
+    """
+    file_paths = [path] if os.path.isfile(path) else [os.path.join(root, file) for root, _, files in os.walk(path) for file in files]
+    
+    for file_path in file_paths:
+        if os.stat(file_path).st_nlink < 2:
+            continue
+        
+        temporary_path = file_path + '.copy'
+        shutil.copy2(file_path, temporary_path)
+        os.replace(temporary_path, file_path)
+
+#========================================================
+# Catalog Functions
+#========================================================
+def catalog_archives(input_path: str, logger: Logger) -> list[dict]:
+    """
+    List every member of the .zip and .7z files in a directory or compressed file, including the members of nested archives, without extracting anything.
+    
+    Each member gets a GDAL virtual file system path (/vsizip/, /vsi7z/) so spatial data can be read straight from the archive.
+
+    Args:
+        input_path (str): Path to the input directory or compressed file.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+
+    Returns:
+        list[dict]: A record (archive, member, size, is_dir, depth, virtual_path) for each archive member.
+    """
+    # Check if the provided path exists
+    if not os.path.exists(input_path):
+        raise ValueError(f"ValueError: The specified path ({input_path}) does not exist")
+    
+    # Find the compressed files to catalog
+    if os.path.isdir(input_path):
+        archive_paths = [
+            os.path.join(root, file)
+            for root, _, files in os.walk(input_path)
+            for file in files
+            if file.endswith(ARCHIVE_EXTENSIONS)
+        ]
+    elif input_path.endswith(ARCHIVE_EXTENSIONS):
+        archive_paths = [input_path]
+    else:
+        raise ValueError("ValueError: Unsupported input type. Please provide a directory or a compressed file.")
+    
+    catalog = []
+    for archive_path in archive_paths:
+        archive_path = os.path.abspath(archive_path)
+        catalog.extend(catalog_archive(archive_path, archive_path, '', virtual_archive_path('{' + archive_path + '}', archive_path), 1, logger))
+        
+    return catalog
+
+def catalog_archive(source, archive_path: str, member_prefix: str, virtual_path: str, depth: int, logger: Logger) -> list[dict]:
+    """
+    Catalog the members of a single archive, recursing into the archives inside of it.
+
+    Args:
+        source (str | BinaryIO): Path to the compressed file, or a readable stream of it when it is nested in another archive.
+        archive_path (str): Path of the outermost compressed file on disk.
+        member_prefix (str): The path of this archive inside of the outermost archive followed by '/', or '' for the outermost archive.
+        virtual_path (str): The GDAL virtual file system path of this archive.
+        depth (int): How deeply this archive is nested, 1 being the outermost archive.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+
+    Returns:
+        list[dict]: The records of the members of the archive.
+    """
+    name_of_source = member_prefix.rstrip('/') or archive_path
+    catalog = []
+    try:
+        with ZipFile(source, mode='r') if name_of_source.endswith(".zip") else SevenZipFile(source, mode='r') as archive_ref:
+            members = list_members(archive_ref)
+            nested_names = [name for name, _, is_dir in members if name.endswith(ARCHIVE_EXTENSIONS) and not is_dir]
+            
+            for name, size, is_dir in members:
+                catalog.append({
+                    'archive': archive_path,
+                    'member': member_prefix + name,
+                    'size': size,
+                    'is_dir': is_dir,
+                    'depth': depth,
+                    'virtual_path': f"{virtual_path}/{name.rstrip('/')}"
+                })
+            
+            # Zip members can be streamed, 7z members have to be decompressed into memory
+            if isinstance(archive_ref, ZipFile):
+                nested_sources = {name: archive_ref.open(name) for name in nested_names}
+            else:
+                nested_sources = archive_ref.read(nested_names) if nested_names else {}
+            
+            for name in nested_names:
+                nested_virtual_path = virtual_archive_path('{' + f"{virtual_path}/{name}" + '}', name)
+                catalog.extend(catalog_archive(nested_sources[name], archive_path, member_prefix + name + '/', nested_virtual_path, depth + 1, logger))
+                nested_sources[name].close()
+    except (BadZipFile, Bad7zFile) as error:
+        logger.log(message=f"BadZipFile or Bad7ZFile: {error} with ({archive_path}{'/' + member_prefix.rstrip('/') if member_prefix else ''})\n\nContinuing the tool without cataloguing its contents.", tag='ERROR')
+        
+    return catalog
+
+def summarize_catalog(catalog: list[dict]) -> dict:
+    """
+    Summarize an archive catalog for planning an extraction.
+
+    Args:
+        catalog (list[dict]): The records returned by catalog_archives.
+
+    Returns:
+        dict: The number of archives and members, total uncompressed size, deepest nesting, and the member count and size per file type.
+    """
+    files = [record for record in catalog if not record['is_dir']]
+    
+    file_types = {}
+    for record in files:
+        extension = os.path.splitext(record['member'])[1].lower() or '(none)'
+        file_type = file_types.setdefault(extension, {'count': 0, 'size': 0})
+        file_type['count'] += 1
+        file_type['size'] += record['size']
+    
+    return {
+        'archives': len({record['archive'] for record in catalog}) + sum(1 for record in files if record['member'].endswith(ARCHIVE_EXTENSIONS)),
+        'members': len(files),
+        'uncompressed_size': sum(record['size'] for record in files),
+        'max_depth': max((record['depth'] for record in catalog), default=0),
+        'file_types': dict(sorted(file_types.items(), key=lambda item: item[1]['size'], reverse=True))
+    }
+
+def catalog_index(input_path: str, index_path: str, logger: Logger) -> dict:
+    """
+    Catalog every archive in the input without extracting anything, write the catalog to an index file and log a summary of it.
+
+    Args:
+        input_path (str): Path to the input directory or compressed file.
+        index_path (str): Path of the index file to write. A .parquet path is written with pandas (requires pyarrow), anything else as JSON.
+        logger (Logger): The Logger object to store and write to log files and the command line uniformly.
+
+    Returns:
+        dict: The summary of the catalog (see summarize_catalog).
+    """
+    catalog = catalog_archives(input_path, logger)
+    summary = summarize_catalog(catalog)
+    
+    # Create the folder of the index file if it does not exist yet
+    index_folder = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(index_folder, exist_ok=True)
+    
+    if index_path.endswith('.parquet'):
+        import pandas as pd
+        pd.DataFrame(catalog, columns=['archive', 'member', 'size', 'is_dir', 'depth', 'virtual_path']).to_parquet(index_path, index=False)
+    else:
+        with open(index_path, 'w') as index_file:
+            json.dump({'input': os.path.abspath(input_path), 'summary': summary, 'members': catalog}, index_file, indent=4)
+    
+    logger.log(message=f"Catalogued {summary['members']} members in {summary['archives']} archives ({summary['uncompressed_size'] / (1024 * 1024):.2f} MB uncompressed, nested up to {summary['max_depth']} deep) to: {index_path}", tag='INFO')
+    for extension, file_type in summary['file_types'].items():
+        logger.log(message=f"    {extension}: {file_type['count']} members, {file_type['size'] / (1024 * 1024):.2f} MB", tag='INFO')
+    
+    return summary
+
+def virtual_archive_path(path: str, name: str) -> str:
+    """
+    Build the GDAL virtual file system path of an archive.
+
+    Args:
+        path (str): The path of the archive, wrapped in curly braces so it can contain other virtual paths.
+        name (str): The file name of the archive, used to pick /vsizip/ or /vsi7z/.
+
+    Returns:
+        str: The virtual file system path of the archive.
+    """
+    return ('/vsizip/' if name.endswith('.zip') else '/vsi7z/') + path
   
 #========================================================
 # Main
@@ -155,12 +1321,24 @@ def main():
     
     # Define command-line arguments
     parser.add_argument('--input', required=True, help='Path to the input directory or compressed file (.zip or .7z).')
-    parser.add_argument('--output', required=True, help='Path to the output directory where extracted files will be saved.')
+    parser.add_argument('--output', default=None, help='Path to the output directory where extracted files will be saved. Required unless --catalog is given.')
     parser.add_argument('--log', default='', help='Path to the log file.')
     parser.add_argument('--ps_script', default='', help='Optional path to a PowerShell script for additional operations.')
+    parser.add_argument('--workers', type=int, default=1, help='Number of archives to extract concurrently.')
+    parser.add_argument('--single_pass', action='store_true', default=False, help='Walk an input directory once and extract its archives in place instead of copying the whole directory first.')
+    parser.add_argument('--memory_threshold', type=float, default=0, help='Extract nested archives up to this size (in MB) straight from their parent archive in memory instead of writing them to disk.')
+    parser.add_argument('--include', nargs='*', default=None, help='Glob patterns of the archive members to extract (ie. "*.shp" "*.kml"). Defaults to every member.')
+    parser.add_argument('--exclude', nargs='*', default=None, help='Glob patterns of the archive members to never extract (ie. "*.mp4").')
+    parser.add_argument('--catalog_only_size', type=float, default=None, help='Only catalog, instead of extracting, non-spatial archive members of this size (in MB) or larger.')
+    parser.add_argument('--link', action='store_true', default=False, help='With --single_pass, hard link the non-archive files into the output when on the same filesystem.')
+    parser.add_argument('--dedupe', choices=['link', 'alias'], default=None, help='Hard link (link) or only record (alias) the extracted files with identical contents, they are listed in ripple_unzipple_aliases.json.')
+    parser.add_argument('--backend', choices=['auto', *EXTRACTOR_BACKENDS], default='auto', help='The tool extracting whole archives, auto uses a 7z or bsdtar binary or libarchive for .7z files when one is installed.')
+    parser.add_argument('--catalog', default=None, help='Only catalog the archives, without extracting them, to this index file (.json, or .parquet if pandas and pyarrow are installed).')
     
     # Parse the command-line arguments
     args = parser.parse_args()
+    if not args.output and not args.catalog:
+        parser.error('--output is required unless --catalog is given.')
 
     # Initialize the Logger
     logger = Logger(log_file=args.log, script_path=args.ps_script, auto_commit=True, tool_name=os.path.abspath(__file__))
@@ -169,8 +1347,17 @@ def main():
     start_time = time.time()
     logger.log(message=f'Tool is starting... Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
 
+    # Build the extraction policy if any filtering was asked for
+    policy = None
+    if args.include or args.exclude or args.catalog_only_size is not None:
+        catalog_only_size = int(args.catalog_only_size * 1024 * 1024) if args.catalog_only_size is not None else None
+        policy = ExtractionPolicy(args.include, args.exclude, catalog_only_size)
+
     # Call the entry function
-    ripple_unzip(args.input, args.output, logger)
+    if args.catalog:
+        catalog_index(args.input, args.catalog, logger)
+    else:
+        ripple_unzip(args.input, args.output, logger, args.workers, args.single_pass, args.link, int(args.memory_threshold * 1024 * 1024), policy, args.dedupe, args.backend)
         
     # Get the end time of the script and calculate the elapsed time
     end_time = time.time()
@@ -9,13 +9,13 @@ import pandas as pd
 
 from twobilliontoolkit.Logger.Logger import Logger
 from twobilliontoolkit.SpatialTransformer.Database import Database
-from twobilliontoolkit.RippleUnzipple.ripple_unzipple import ripple_unzip
+from twobilliontoolkit.RippleUnzipple.ripple_unzipple import ripple_unzip, catalog_archives
 
 #========================================================
 # Classes
 #========================================================
 class Parameters:
-    def __init__(self, input_path: str, output_path: str, gdb_path: str, master_data_path: str, datatracker: str, attachments: str, logger: Logger, load_from: str = 'database', save_to: str = 'database', database_config: str = None, year:str = None, debug: bool = False, resume: bool = False) -> None:
+    def __init__(self, input_path: str, output_path: str, gdb_path: str, master_data_path: str, datatracker: str, attachments: str, logger: Logger, load_from: str = 'database', save_to: str = 'database', database_config: str = None, year:str = None, debug: bool = False, resume: bool = False, no_extract: bool = False, dedupe: str = None, pack_attachments: bool = False) -> None:
         """
         Initializes the Parameters class with input parameters.
 
@@ -33,6 +33,9 @@ class Parameters:
             attachments (str): Attachment folder name.
             debug (bool, optional): Determines if the program is in debug mode.
             resume (bool, optional): Determines if the program should resume from where a crash happened.
+            no_extract (bool, optional): Determines if the archives in the input are read in place instead of being extracted.
+            dedupe (str, optional): Determines if the extracted files with identical contents are hard linked ('link') or only recorded ('alias').
+            pack_attachments (bool, optional): Determines if the attachments of each project are packed into a single indexed .zip file instead of a folder.
         """
         self.local_dir = r'C:\LocalTwoBillionToolkit'
         
@@ -74,6 +77,10 @@ class Parameters:
         self.year = year
         self.debug = debug
         self.resume = resume
+        self.no_extract = no_extract
+        self.dedupe = dedupe
+        self.pack_attachments = pack_attachments
+        self.archive_catalog = None
         
         self.logger = logger
         
@@ -105,13 +112,18 @@ class Parameters:
         """
         Handles the unzipping process using ripple_unzip.
 
-        Calls the ripple_unzip function with input, output, and log paths.
+        Calls the ripple_unzip function with input, output, and log paths. When not extracting, the archives are 
+        catalogued instead so their members can be read in place, and the input is used as the output.
+        
+        The extraction manifest in the output makes re-running this cheap, only the archives that are new, changed or 
+        were not finished (ie. after a crash) are extracted, so it is also run when resuming.
         """
-        # If the resume after crash flag was specified, skip
-        if self.resume:
+        if self.no_extract:
+            self.archive_catalog = catalog_archives(self.input, self.logger)
+            self.output = self.input
             return
         
-        ripple_unzip(self.input, self.output, self.logger)
+        ripple_unzip(self.input, self.output, self.logger, dedupe=self.dedupe)
         
     def create_gdb(self) -> None:
         """
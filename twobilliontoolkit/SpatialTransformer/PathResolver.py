@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+#~-~ encoding: utf-8 ~-~
+# twobilliontoolkit/SpatialTransformer/PathResolver.py
+#========================================================
+# Organization:     Natural Resources of Canada
+# Team:             Carbon Accounting Team
+#========================================================
+# File Header
+#========================================================
+"""
+File: twobilliontoolkit/SpatialTransformer/PathResolver.py
+Organization:     Natural Resources of Canada
+Team:             Carbon Accounting Team
+
+Description: 
+    This module defines a DrivePathResolver class that converts paths on mapped drives (ie. M:\\, V:\\) to their network (UNC) 
+    paths for the datatracker. The UNC prefix of each drive is looked up once through the Windows networking API, or taken 
+    from a static mapping table, and every path after that is resolved with a string substitution.
+
+Usage:
+    This module is intended for use within the TwoBillionToolkit and is not callable from the command-line.
+"""
+
+#========================================================
+# Imports
+#========================================================
+import os
+import re
+import ntpath
+from typing import Callable
+
+from twobilliontoolkit.Logger.Logger import Logger
+
+#========================================================
+# Globals
+#========================================================
+DRIVE_LETTER_PATTERN = re.compile(r"^[A-Za-z]:$")
+VIRTUAL_ARCHIVE_PATTERN = re.compile(r"\{([^{}]+)\}")
+
+#========================================================
+# Lookup Functions
+#========================================================
+def win32_unc_lookup(drive: str) -> str:
+    """
+    Look up the UNC prefix of a mapped drive letter through the Windows networking API.
+
+    Args:
+        drive (str): The drive letter, including the colon (ie. 'M:').
+
+    Returns:
+        str: The UNC prefix of the drive (ie. '\\\\server\\share'), or None if the drive is not a mapped network drive.
+    """
+    import win32wnet
+
+    try:
+        universal_name = win32wnet.WNetGetUniversalName(drive + '\\', 1)
+    except Exception:
+        return None
+
+    return universal_name.rstrip('\\')
+
+#========================================================
+# Class
+#========================================================
+class DrivePathResolver:
+    """
+    Resolves paths on mapped drives (ie. M:\\, V:\\) to their actual network (UNC) paths.
+
+    The drive letter to UNC prefix mapping is looked up once per drive and cached, every path after that is
+    resolved with a string substitution. The lookup can be swapped out (ie. for a static mapping table on Linux or in tests).
+    """
+
+    def __init__(self, lookup: Callable[[str], str] = None, mapping: dict = None, logger: Logger = None) -> None:
+        """
+        Initializes the DrivePathResolver class.
+
+        Args:
+            lookup (Callable[[str], str], optional): Function taking a drive letter ('M:') and returning its UNC prefix or None. Defaults to the Windows networking API.
+            mapping (dict, optional): Static table of drive letter to UNC prefix, used instead of the lookup for the drives it contains.
+            logger (Logger, optional): The Logger object to report failed lookups to, the drive is then left as it is. Defaults to None, failed lookups are raised.
+        """
+        self.lookup = lookup or win32_unc_lookup
+        self.logger = logger
+        self.cache = {}
+
+        # Preload the cache with any static mapping
+        for drive, prefix in (mapping or {}).items():
+            self.cache[drive.upper()] = prefix.rstrip('\\/') if prefix else None
+
+    def get_prefix(self, drive: str) -> str:
+        """
+        Get the UNC prefix for a drive letter, calling the lookup only the first time the drive is seen.
+
+        Args:
+            drive (str): The drive letter, including the colon (ie. 'M:').
+
+        Returns:
+            str: The UNC prefix of the drive, or None if the drive is not mapped.
+            
+        Raises:
+            Exception: If the lookup fails and no logger was given.
+        """
+        drive = drive.upper()
+
+        if drive not in self.cache:
+            try:
+                self.cache[drive] = self.lookup(drive)
+            except Exception as error:
+                if self.logger is None:
+                    raise
+                
+                self.logger.log(message=f'The network path of the drive {drive} could not be looked up, its paths are left as they are: {error}', tag='WARNING')
+                self.cache[drive] = None
+
+        return self.cache[drive]
+
+    def resolve(self, file_path: str) -> str:
+        """
+        Converts a path with a mapped drive to the actual network drive path.
+
+        Args:
+            file_path (str): The path to convert.
+
+        Returns:
+            str: The absolute UNC path, or the absolute path if it is not on a mapped drive.
+        """
+        # Only resolve the archive on disk inside of a GDAL virtual file system path (ie. /vsizip/{M:\data.zip}/file.shp)
+        if file_path.startswith('/vsi'):
+            return VIRTUAL_ARCHIVE_PATTERN.sub(lambda match: '{' + self.resolve(match.group(1)) + '}', file_path)
+        
+        # Only make the path absolute if it does not already carry a drive letter
+        drive, rest = ntpath.splitdrive(file_path)
+        if DRIVE_LETTER_PATTERN.match(drive):
+            drive, rest = ntpath.splitdrive(ntpath.normpath(file_path))
+            file_path = drive + rest
+        else:
+            file_path = os.path.abspath(file_path)
+            drive, rest = ntpath.splitdrive(file_path)
+
+            if not DRIVE_LETTER_PATTERN.match(drive):
+                return file_path
+
+        # If the path starts with C:\, it is already in UNC format
+        if drive.upper() == 'C:':
+            return file_path
+
+        prefix = self.get_prefix(drive)
+        if not prefix:
+            return file_path
+
+        return prefix + rest
+
+    def resolve_all(self, file_paths: list[str]) -> dict:
+        """
+        Resolve a batch of paths, each distinct drive is only looked up once.
+
+        Args:
+            file_paths (list[str]): The paths to convert.
+
+        Returns:
+            dict: A dictionary of each given path to its resolved path.
+        """
+        return {file_path: self.resolve(file_path) for file_path in file_paths}
+
+    def resolve_under(self, root: str) -> Callable[[str], str]:
+        """
+        Resolve a directory once and get a function resolving the paths inside of it by substituting the resolved 
+        directory, so a whole walk of the directory is resolved from a single lookup.
+
+        Args:
+            root (str): The directory the paths are in (ie. the output being scanned).
+
+        Returns:
+            Callable[[str], str]: Resolves a path, paths outside of the directory are resolved on their own.
+        """
+        resolved_root = self.resolve(root)
+
+        def resolve_path(file_path: str) -> str:
+            # Fall back on a full resolve for anything that is not inside of the directory
+            suffix = file_path[len(root):]
+            if not file_path.startswith(root) or (suffix and suffix[0] not in '\\/' and not root.endswith(('\\', '/'))):
+                return self.resolve(file_path)
+
+            if not suffix.strip('\\/'):
+                return resolved_root
+
+            return resolved_root + ntpath.normpath('\\' + suffix.lstrip('\\/'))
+
+        return resolve_path
@@ -4,10 +4,10 @@
 #========================================================
 import os
 import re
+import json
 import arcpy
 import fiona 
 import datetime
-import win32wnet
 import pandas as pd
 import geopandas as gpd
 import arcgisscripting
@@ -17,8 +17,10 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 
 from twobilliontoolkit.Logger.Logger import Logger
 from twobilliontoolkit.GeoAttachmentSeeker.geo_attachment_seeker import find_attachments
+from twobilliontoolkit.RippleUnzipple.ripple_unzipple import ARCHIVE_EXTENSIONS, SKIPPED_MEMBERS_FILE, MANIFEST_FILE, ALIASES_FILE
 from twobilliontoolkit.SpatialTransformer.Datatracker import Datatracker2BT
 from twobilliontoolkit.SpatialTransformer.Parameters import Parameters
+from twobilliontoolkit.SpatialTransformer.PathResolver import DrivePathResolver
 
 fiona.drvsupport.supported_drivers['LIBKML'] = 'rw'
 fiona.drvsupport.supported_drivers['OpenFileGDB'] = 'rw'
@@ -31,6 +33,7 @@ DATA_SHEET_EXTENSIONS = ('.xlsx', '.csv', 'xls', 'docx')
 LAYOUT_FILE_EXTENSIONS = ('.mxd', '.aprx', '.pagx', '.qgs', '.qgz', '.qlr')
 IMAGE_FILE_EXTENSIONS = ('pdf', '.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif','.tiff','.heic', '.mp4')
 IGNORE_EXTENSIONS = ('.lock', '.cpg', '.dbf', '.prj', '.sbn', '.sbx', '.shx', '.qpj', '.qix', '.shp.xml')
+GDAL_SUPPORTS_7Z = tuple(int(part) for part in fiona.__gdal_version__.split('.')[:2]) >= (3, 7)
 
 #========================================================
 # Helper Class
@@ -45,6 +48,12 @@ class Processor:
         """
         self.params = params
         
+        # Create the resolver that converts mapped drive paths to network paths
+        self.path_resolver = DrivePathResolver(logger=params.logger)
+        
+        # The files Ripple Unzipple found to be duplicates of other files in the output
+        self.aliases = {}
+        
         # Create the Data class to hold any data tracker information
         self.data = Datatracker2BT(params.datatracker, params.logger, params.load_from, params.save_to, params.database_config, params.year)
        
@@ -62,6 +71,12 @@ class Processor:
         This function walks through the specified output directory, processes different file types, and creates entries in the data tracker. It handles geodatabases, shapefiles, KML/KMZ files,
         GeoJSON files, GeoPackages, and other file types, ensuring that they are correctly added to the data tracker.
         """  
+        # Load the duplicate files found by Ripple Unzipple so each dataset is only converted once
+        self.aliases = self.load_aliases()
+        
+        # Resolve the network path of the output once, the paths found in it are resolved from it when checking for existing entries
+        resolve_output = self.path_resolver.resolve_under(self.params.output)
+        
         # Step through unzip output path
         for root, dirs, files in os.walk(self.params.output):
             for dir in dirs:
@@ -70,7 +85,7 @@ class Processor:
                 
                 # Skip over entiries if in resume mode
                 if self.params.resume:
-                    (_, data_entry) = self.data.find_matching_data(absolute_file_path=convert_drive_path(directory_path))
+                    (_, data_entry) = self.data.find_matching_data(absolute_file_path=resolve_output(directory_path))
                     if data_entry:
                         continue
                 
@@ -96,87 +111,252 @@ class Processor:
                 # Built full file path
                 file_path = f"{root}\{file}"
 
-                # Ignore specified file extensions
+                # Ignore specified file extensions and the records written by Ripple Unzipple
                 lowercase_file = file.lower()
-                if lowercase_file.endswith(IGNORE_EXTENSIONS):
+                if lowercase_file.endswith(IGNORE_EXTENSIONS) or file in (SKIPPED_MEMBERS_FILE, MANIFEST_FILE, ALIASES_FILE):
+                    continue
+                
+                # Archives are read in place through the archive catalog when not extracting
+                if self.params.archive_catalog is not None and lowercase_file.endswith(ARCHIVE_EXTENSIONS):
                     continue
                      
                 # Skip over entiries if in resume mode
                 if self.params.resume:
-                    (_, data_entry) = self.data.find_matching_data(absolute_file_path=convert_drive_path(file_path))
+                    (_, data_entry) = self.data.find_matching_data(absolute_file_path=resolve_output(file_path))
                     if data_entry:
                         continue
                      
-                if lowercase_file.endswith(LAYOUT_FILE_EXTENSIONS):
-                    project_spatial_id = self.create_entry(feature_path=file_path, entry_type='Aspatial', processed=True)
-                    
-                    # Log it
-                    self.params.logger.log(message=f'- Project Spatial ID: {project_spatial_id} - Layout file: {file_path} will be added to data tracker but not resulting gdb.', tag='WARNING')   
+                self.create_file_entry(file_path)
+        
+        # Add the archive members that Ripple Unzipple catalogued instead of extracting
+        self.create_skipped_member_entries()
+        
+        # Add the members of the archives that are being read in place
+        if self.params.archive_catalog is not None:
+            self.create_catalog_entries()
+    
+    def create_file_entry(self, file_path: str) -> None:
+        """
+        Creates the data tracker entries for a single file, based on its file type.
+
+        Args:
+            file_path (str): The path to the file, either on disk or a GDAL virtual file system path inside of an archive.
+        """
+        lowercase_file = file_path.lower()
+        project_spatial_id = None
+        
+        # Only convert a spatial dataset once when it was delivered in several archives
+        if lowercase_file.endswith(SPATIAL_FILE_EXTENSIONS):
+            original_path = self.find_duplicate_dataset(file_path)
+            if original_path:
+                project_spatial_id = self.create_entry(feature_path=file_path, processed=True)
+
+                # Log it
+                self.params.logger.log(message=f'- Project Spatial ID: {project_spatial_id} - Duplicate dataset: {file_path} is identical to {original_path}, it will be added to data tracker but not converted again.', tag='WARNING')
+                return
+        
+        if lowercase_file.endswith(LAYOUT_FILE_EXTENSIONS):
+            project_spatial_id = self.create_entry(feature_path=file_path, entry_type='Aspatial', processed=True)
+
+            # Log it
+            self.params.logger.log(message=f'- Project Spatial ID: {project_spatial_id} - Layout file: {file_path} will be added to data tracker but not resulting gdb.', tag='WARNING')   
+
+        elif lowercase_file.endswith(DATA_SHEET_EXTENSIONS):
+            project_spatial_id = self.create_entry(feature_path=file_path, entry_type='Aspatial', processed=True)
+
+            # Log it
+            self.params.logger.log(message=f'- Project Spatial ID: {project_spatial_id} - Datasheet: {file_path} will be added to data tracker but not resulting gdb.', tag='WARNING')
+
+        elif lowercase_file.endswith(IMAGE_FILE_EXTENSIONS):
+            if lowercase_file.endswith('.pdf'):
+                project_spatial_id = self.create_entry(feature_path=file_path, contains_pdf=True, entry_type='Aspatial', processed=True)                
+            else:
+                project_spatial_id = self.create_entry(feature_path=file_path, contains_image=True, entry_type='Aspatial', processed=True)
+
+            # Log it
+            self.params.logger.log(message=f'- Project Spatial ID: {project_spatial_id} - Image/PDF file: {file_path} will be added to data tracker but not resulting gdb.', tag='WARNING')
+
+        elif lowercase_file.endswith('.shp'):
+            project_spatial_id = self.create_entry(feature_path=file_path)
+
+        elif lowercase_file.endswith(('.kml', '.kmz')):
+            try:
+                contain_point = False
+                contain_polygon = False
+                contain_linestring = False
+                layers = fiona.listlayers(file_path) 
+
+                # Iterate through layers and check their geometry type
+                for layer in layers:
+                    with fiona.open(file_path, 'r', driver='LIBKML', layer=layer) as src:
+                        for feat in src:
+                            if contain_point and contain_polygon and contain_linestring:
+                                break
+
+                            geom_type = feat.geometry.type
+                            if geom_type == 'Point':
+                                contain_point = True
+                            elif geom_type == 'Polygon' or geom_type == 'MultiPolygon':
+                                contain_polygon = True
+                            elif geom_type == 'LineString':
+                                contain_linestring = True
+
+                if contain_point:
+                    project_spatial_id = self.create_entry(f"{file_path}\Points")
+                if contain_polygon:
+                    project_spatial_id = self.create_entry(f"{file_path}\Polygons")
+                if contain_linestring:
+                    project_spatial_id = self.create_entry(f"{file_path}\Lines")
+            except Exception as error:
+                message = f'KML/KMZ file: {file_path} has encountered an error when making a datatracker entry. {error}'
+                if project_spatial_id:
+                    message = f'- Project Spatial ID: {project_spatial_id} - ' + message
+                self.params.logger.log(message=message, tag='ERROR')
+
+        elif lowercase_file.endswith('.geojson'):
+            project_spatial_id = self.create_entry(file_path)
+
+        elif lowercase_file.endswith(('.gpkg', '.sqlite')):
+            project_spatial_id = self.create_entry(feature_path=file_path, processed=True)
+
+            # Log it
+            self.params.logger.log(message=f'- Project Spatial ID: {project_spatial_id} - GeoPackage/SQLite file: {file_path} will be added to data tracker but not resulting gdb.', tag='WARNING')
+
+        else:                    
+            # Log it
+            self.params.logger.log(message=f'Unsupported Filetype: {file_path} has been found and logged but not added to the datatracker or the geodatabase because it is not implemented or supported.', tag='WARNING')
+
+    def load_aliases(self) -> dict:
+        """
+        Loads the duplicate files recorded by Ripple Unzipple's deduplication from the output.
+
+        Returns:
+            dict: The normalized path of each duplicate file relative to the output, mapped to the relative path of the file it duplicates.
+        """
+        aliases_path = os.path.join(self.params.output, ALIASES_FILE)
+        if not os.path.exists(aliases_path):
+            return {}
+        
+        with open(aliases_path, 'r') as file:
+            aliases = json.load(file)
+        
+        return {os.path.normpath(duplicate): os.path.normpath(original) for duplicate, original in aliases.items()}
+    
+    def find_duplicate_dataset(self, file_path: str) -> str:
+        """
+        Finds the dataset that a file in the output is a duplicate of.
+        
+        A shapefile is only a duplicate when each of its sidecar files (.shx, .dbf, .prj, .cpg) is a duplicate of the matching sidecar of the same shapefile.
+
+        Args:
+            file_path (str): The path to the main file of the dataset.
+
+        Returns:
+            str: The path to the original dataset, or None if the dataset is not a duplicate.
+        """
+        if not self.aliases or file_path.startswith('/vsi'):
+            return None
+        
+        relative_path = os.path.normpath(os.path.relpath(file_path, self.params.output))
+        original = self.aliases.get(relative_path)
+        if original is None:
+            return None
+        
+        if relative_path.lower().endswith('.shp'):
+            stem, original_stem = relative_path[:-4], original[:-4]
+            for extension in ('.shx', '.dbf', '.prj', '.cpg'):
+                sidecar_exists = os.path.exists(os.path.join(self.params.output, stem + extension))
+                original_sidecar_exists = os.path.exists(os.path.join(self.params.output, original_stem + extension))
                 
-                elif lowercase_file.endswith(DATA_SHEET_EXTENSIONS):
-                    project_spatial_id = self.create_entry(feature_path=file_path, entry_type='Aspatial', processed=True)
-                                        
-                    # Log it
-                    self.params.logger.log(message=f'- Project Spatial ID: {project_spatial_id} - Datasheet: {file_path} will be added to data tracker but not resulting gdb.', tag='WARNING')
-                                                            
-                elif lowercase_file.endswith(IMAGE_FILE_EXTENSIONS):
-                    if lowercase_file.endswith('.pdf'):
-                        project_spatial_id = self.create_entry(feature_path=file_path, contains_pdf=True, entry_type='Aspatial', processed=True)                
-                    else:
-                        project_spatial_id = self.create_entry(feature_path=file_path, contains_image=True, entry_type='Aspatial', processed=True)
-                                           
-                    # Log it
-                    self.params.logger.log(message=f'- Project Spatial ID: {project_spatial_id} - Image/PDF file: {file_path} will be added to data tracker but not resulting gdb.', tag='WARNING')
-                     
-                elif lowercase_file.endswith('.shp'):
-                    project_spatial_id = self.create_entry(feature_path=file_path)
-                      
-                elif lowercase_file.endswith(('.kml', '.kmz')):
-                    try:
-                        contain_point = False
-                        contain_polygon = False
-                        contain_linestring = False
-                        layers = fiona.listlayers(file_path) 
-
-                        # Iterate through layers and check their geometry type
-                        for layer in layers:
-                            with fiona.open(file_path, 'r', driver='LIBKML', layer=layer) as src:
-                                for feat in src:
-                                    if contain_point and contain_polygon and contain_linestring:
-                                        break
-                                                
-                                    geom_type = feat.geometry.type
-                                    if geom_type == 'Point':
-                                        contain_point = True
-                                    elif geom_type == 'Polygon' or geom_type == 'MultiPolygon':
-                                        contain_polygon = True
-                                    elif geom_type == 'LineString':
-                                        contain_linestring = True
-                                        
-                        if contain_point:
-                            project_spatial_id = self.create_entry(f"{file_path}\Points")
-                        if contain_polygon:
-                            project_spatial_id = self.create_entry(f"{file_path}\Polygons")
-                        if contain_linestring:
-                            project_spatial_id = self.create_entry(f"{file_path}\Lines")
-                    except Exception as error:
-                        message = f'KML/KMZ file: {file_path} has encountered an error when making a datatracker entry. {error}'
-                        if project_spatial_id:
-                            message = f'- Project Spatial ID: {project_spatial_id} - ' + message
-                        self.params.logger.log(message=message, tag='ERROR')
-                                            
-                elif lowercase_file.endswith('.geojson'):
-                    project_spatial_id = self.create_entry(file_path)
+                if sidecar_exists != original_sidecar_exists:
+                    return None
+                if sidecar_exists and self.aliases.get(stem + extension) != original_stem + extension:
+                    return None
+        
+        return os.path.join(self.params.output, original)
+    
+    def create_catalog_entries(self) -> None:
+        """
+        Creates data tracker entries for the members of the archives in the Ripple Unzipple archive catalog, pointing at their GDAL virtual file system paths so nothing has to be extracted.
+        """
+        geodatabases = []
+        for member in self.params.archive_catalog:
+            file_path = member['virtual_path']
+            lowercase_file = file_path.lower()
+            
+            # Archives are catalogued member by member and geodatabases are handled as a whole
+            if member['is_dir'] or lowercase_file.endswith(ARCHIVE_EXTENSIONS) or lowercase_file.endswith(IGNORE_EXTENSIONS):
+                continue
+            
+            if '.gdb/' in lowercase_file:
+                gdb_path = file_path[:lowercase_file.index('.gdb/') + len('.gdb')]
+                if gdb_path not in geodatabases:
+                    geodatabases.append(gdb_path)
+                continue
+            
+            # GDAL can only read from inside of .7z files from version 3.7
+            if '/vsi7z/' in file_path and not GDAL_SUPPORTS_7Z:
+                self.params.logger.log(message=f"Archive member: {member['member']} in {member['archive']} can not be read in place because GDAL {fiona.__gdal_version__} does not support .7z files, extract the archive to process it.", tag='WARNING')
+                continue
+            
+            # Skip over entiries if in resume mode
+            if self.params.resume:
+                (_, data_entry) = self.data.find_matching_data(absolute_file_path=self.path_resolver.resolve(file_path))
+                if data_entry:
+                    continue
+            
+            self.create_file_entry(file_path)
+        
+        for gdb_path in geodatabases:
+            try:
+                # Only the layers with a geometry are feature classes
+                for layer in fiona.listlayers(gdb_path):
+                    with fiona.open(gdb_path, layer=layer) as src:
+                        if src.schema['geometry'] in (None, 'None'):
+                            continue
                     
-                elif lowercase_file.endswith(('.gpkg', '.sqlite')):
-                    project_spatial_id = self.create_entry(feature_path=file_path, processed=True)
-                                        
-                    # Log it
-                    self.params.logger.log(message=f'- Project Spatial ID: {project_spatial_id} - GeoPackage/SQLite file: {file_path} will be added to data tracker but not resulting gdb.', tag='WARNING')
+                    feature_path = f"{gdb_path}\\{layer}"
+                    if self.params.resume:
+                        (_, data_entry) = self.data.find_matching_data(absolute_file_path=self.path_resolver.resolve(feature_path))
+                        if data_entry:
+                            continue
                     
-                else:                    
-                    # Log it
-                    self.params.logger.log(message=f'Unsupported Filetype: {file_path} has been found and logged but not added to the datatracker or the geodatabase because it is not implemented or supported.', tag='WARNING')
+                    self.create_entry(feature_path)
+            except Exception as error:
+                self.params.logger.log(message=f'Geodatabase: {gdb_path} has encountered an error when making a datatracker entry from inside of its archive. {error}', tag='ERROR')
+    
+    def create_skipped_member_entries(self) -> None:
+        """
+        Creates aspatial data tracker entries for the archive members that were listed by Ripple Unzipple's extraction policy instead of being extracted.
+        """
+        skipped_members_path = os.path.join(self.params.output, SKIPPED_MEMBERS_FILE)
+        if not os.path.exists(skipped_members_path):
+            return
+        
+        with open(skipped_members_path, 'r') as file:
+            skipped_members = json.load(file)
+        
+        for member in skipped_members:
+            # The path the member would have been extracted to
+            file_path = member['path']
+            
+            # Ignore specified file extensions
+            lowercase_file = file_path.lower()
+            if lowercase_file.endswith(IGNORE_EXTENSIONS):
+                continue
+            
+            # Skip over entiries if in resume mode
+            if self.params.resume:
+                (_, data_entry) = self.data.find_matching_data(absolute_file_path=self.path_resolver.resolve(file_path))
+                if data_entry:
+                    continue
+            
+            contains_pdf = lowercase_file.endswith('.pdf')
+            contains_image = lowercase_file.endswith(IMAGE_FILE_EXTENSIONS) and not contains_pdf
+            project_spatial_id = self.create_entry(feature_path=file_path, contains_pdf=contains_pdf, contains_image=contains_image, entry_type='Aspatial', processed=True)
+            
+            # Log it
+            self.params.logger.log(message=f"- Project Spatial ID: {project_spatial_id} - Archive member: {member['member']} ({member['size']} bytes) in {member['archive']} was not extracted ({member['reason']}), it will be added to data tracker but not resulting gdb.", tag='WARNING')
     
     def create_entry(self, feature_path: str, in_raw_gdb: bool = False, contains_pdf: bool = False, contains_image: bool = False, entry_type: str = 'Spatial', processed: bool = False) -> str:
         """
@@ -208,7 +388,7 @@ class Processor:
             self.params.logger.log(message=formatted_project_spatial_id, tag='INFO')
         
         # Convert the absolute path to the correct drive path format
-        absolute_file_path = convert_drive_path(feature_path)
+        absolute_file_path = self.path_resolver.resolve(feature_path)
 
         # Call a method to process raw data matching
         self.call_find_match(formatted_project_spatial_id, absolute_file_path)
@@ -218,7 +398,7 @@ class Processor:
             project_spatial_id=formatted_project_spatial_id,
             project_number=formatted_result, 
             dropped=False,
-            raw_gdb_path=convert_drive_path(self.params.gdb_path),
+            raw_gdb_path=self.path_resolver.resolve(self.params.gdb_path),
             absolute_file_path=absolute_file_path,
             in_raw_gdb=in_raw_gdb, 
             contains_pdf=contains_pdf, 
@@ -261,7 +441,11 @@ class Processor:
                 entry_data_basename = os.path.basename(entry_absolute_path)
                 
                 # Check the file type and export features accordingly
-                if os.path.dirname(entry_absolute_path).endswith('.gdb'):
+                if entry_absolute_path.startswith('/vsi') and not os.path.dirname(entry_absolute_path).endswith(('.kml', '.kmz')):
+                    # Read the features from inside of the archive through GDAL, arcpy can not open virtual file system paths
+                    self.export_virtual_features(entry_absolute_path, gdb_entry_name)
+                    
+                elif os.path.dirname(entry_absolute_path).endswith('.gdb'):
                     # Export features from one geodatabase to the output geodatabase
                     if os.path.exists(os.path.join(self.params.output, entry_data_basename)):
                         arcpy.conversion.ExportFeatures( # Used for old implementation (still used in case an edge case will use this)
@@ -354,6 +538,27 @@ class Processor:
                 self.params.logger.log(message=f'- Project Spatial ID: {entry} - An uncaught error occurred when processing the layer for {entry_absolute_path}', tag='ERROR')
                 raise Exception(error)
                           
+    def export_virtual_features(self, virtual_path: str, gdb_entry_name: str) -> None:
+        """
+        Export the features of a dataset inside of an archive to the local geodatabase, reading it through a GDAL virtual file system path.
+
+        Args:
+            virtual_path (str): The virtual file system path (ie. /vsizip/{archive.zip}/site.shp) of the dataset, or of a feature class in a geodatabase.
+            gdb_entry_name (str): The name of the feature class to create in the local geodatabase.
+        """
+        layer = None
+        if os.path.dirname(virtual_path).endswith('.gdb'):
+            layer = os.path.basename(virtual_path)
+            virtual_path = os.path.dirname(virtual_path)
+            
+        data = gpd.read_file(virtual_path, layer=layer)
+        
+        # Rename the 'OBJECTID' column if it exists
+        if 'OBJECTID' in data.columns:
+            data.rename(columns={'OBJECTID': 'OBJECTID_STRING'}, inplace=True)
+            
+        data.to_file(self.params.local_gdb_path, driver='OpenFileGDB', layer=gdb_entry_name)
+                          
     def check_project_numbers(self, file_path: str) -> str:
         """
         Check project numbers against a master data sheet.
@@ -407,7 +612,7 @@ class Processor:
         Call the GeoAttachmentSeeker module function to find, extract and note down any attachments in the result GDB.
         """        
         # Find and process attachments from the gdb
-        attachment_dict = find_attachments(self.params.local_gdb_path, self.params.attachments)
+        attachment_dict = find_attachments(self.params.local_gdb_path, self.params.attachments, logger=self.params.logger, pack=self.params.pack_attachments)
         
         # Print file information if debugging is enabled
         if self.params.debug:
@@ -452,26 +657,8 @@ class Processor:
         except Exception as error:
             self.params.logger.log(message=f'An error has been caught while trying to enable editor tracking for {feature_class} in resulting gdb, {error}', tag='ERROR')
         
-def convert_drive_path(file_path):
+def convert_drive_path(file_path: str) -> str:
     """
     Converts a path with a mapped drive (ie. M:\, V:\) to the actual network drive name.
     """
-    abs_file_path = os.path.abspath(file_path)
-    actual_drive_path = abs_file_path
-
-    if actual_drive_path.startswith('C:'):
-        # If the path starts with C:\, it is already in UNC format
-        return actual_drive_path
-
-    try:
-        # Extract drive letter from absolute file path
-        drive_letter, _ = os.path.splitdrive(abs_file_path)
-
-        # Check if the path contains a drive letter
-        if re.match(r"[A-Za-z]{1}:{1}", drive_letter):
-            # Convert mapped drive path to UNC path
-            actual_drive_path = win32wnet.WNetGetUniversalName(actual_drive_path, 1)
-    except Exception as e:
-        print(f"Error: {e}")
-
-    return actual_drive_path
\ No newline at end of file
+    return DrivePathResolver().resolve(file_path)
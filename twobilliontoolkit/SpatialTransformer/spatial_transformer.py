@@ -22,7 +22,7 @@ Description:
     The spatial_transformer.py script is a Python tool for processing spatial data. It handles tasks like geodatabase creation, file validation, and checking project numbers against a master data sheet. 
 
 Usage:
-    python path/to/spatial_transformer.py [-h] --input_path input_path --output_path output_path --gdb_path gdb_path --master master_data_path --load {datatracker,database} --save {datatracker,database} [--datatracker datatracker_path] [--attachments attachments_path] [--year YYYY] [--debug] [--suppress] [--resume]
+    python path/to/spatial_transformer.py [-h] --input_path input_path --output_path output_path --gdb_path gdb_path --master master_data_path --load {datatracker,database} --save {datatracker,database} [--datatracker datatracker_path] [--attachments attachments_path] [--year YYYY] [--debug] [--suppress] [--resume] [--skip_unzip] [--no_extract] [--dedupe {link,alias}] [--pack_attachments]
 """
 #========================================================
 # Imports
@@ -39,12 +39,12 @@ from twobilliontoolkit.Logger.Logger import Logger
 from twobilliontoolkit.SpatialTransformer.Parameters import Parameters
 from twobilliontoolkit.SpatialTransformer.Processor import Processor
 from twobilliontoolkit.RecordReviser.record_reviser import record_reviser
-from twobilliontoolkit.NetworkTransfer.network_transfer import network_transfer
+from twobilliontoolkit.NetworkTransfer.network_transfer import network_transfer, network_transfer_background
        
 #========================================================
 # Entry Function
 #========================================================  
-def spatial_transformer(input_path: str, output_path: str, load_from: str, save_to: str, gdb_path: str, datatracker: str, attachments: str, master_data_path: str, logger: Logger, database_config: str = None, year: str = None, debug: bool = False, resume: bool = False, skip_unzip: bool = False) -> None:
+def spatial_transformer(input_path: str, output_path: str, load_from: str, save_to: str, gdb_path: str, datatracker: str, attachments: str, master_data_path: str, logger: Logger, database_config: str = None, year: str = None, debug: bool = False, resume: bool = False, skip_unzip: bool = False, no_extract: bool = False, dedupe: str = None, pack_attachments: bool = False) -> None:
     """
     The spatial_transformer function serves as the main entry point for the spatial transformation script. Its primary purpose is to handle various tasks related to spatial data processing, such as starting the ripple_unzipple tool and geodatabase creation.
 
@@ -62,9 +62,14 @@ def spatial_transformer(input_path: str, output_path: str, load_from: str, save_
         year (str): Year of the entry being planted.
         debug (bool, optional): Determines if the program is in debug mode. Defaults False.
         resume (bool, optional): Determines if the program should resume from where a crash happened. Defaults False.
+        skip_unzip (bool, optional): Skip Ripple Unzipple and use the input as the output. Defaults False.
+        no_extract (bool, optional): Read spatial data straight from the archives in the input through GDAL's virtual file systems instead of extracting them. Defaults False.
+        dedupe (str, optional): Hard link ('link') or only record ('alias') the extracted files with identical contents, so each duplicated dataset is only converted once. Defaults None.
+        pack_attachments (bool, optional): Pack the attachments of each project into a single indexed .zip file, the extracted_attachments_path of the entries points to the pack. Defaults False.
     """
-    # Initialize a variable for the processor in case an error occurs beforehand
+    # Initialize variables for the processor and the background transfer in case an error occurs beforehand
     spatial_processor = None
+    transfer = None
     
     try:       
         if database_config == "...":
@@ -73,12 +78,15 @@ def spatial_transformer(input_path: str, output_path: str, load_from: str, save_
             raise("The database config file path you provided does not exist.")
             
         # Initialize Parameters class
-        setup_parameters = Parameters(input_path, output_path, gdb_path, master_data_path, datatracker, attachments, logger, load_from, save_to, database_config, year,debug, resume)
+        setup_parameters = Parameters(input_path, output_path, gdb_path, master_data_path, datatracker, attachments, logger, load_from, save_to, database_config, year,debug, resume, no_extract, dedupe, pack_attachments)
 
         # Start the unzip tool 
         if skip_unzip:
             setup_parameters.output = setup_parameters.input
             logger.log(message=f'Skipping Ripple Unzipple, output is being set as the input. Now starting to create the datatracker entries from the files. Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
+        elif no_extract:
+            setup_parameters.handle_unzip()
+            logger.log(message=f'Ripple Unzipple has catalogued the archives so they can be read without extracting them. Now starting to create the datatracker entries from the files. Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
         else:
             setup_parameters.handle_unzip()
             logger.log(message=f'Ripple Unzipple has completed extracted the files. Now starting to create the datatracker entries from the files. Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
@@ -100,25 +108,30 @@ def spatial_transformer(input_path: str, output_path: str, load_from: str, save_
         
         # Extract attachments from the Geodatabase
         spatial_processor.extract_attachments()
-        logger.log(message=f'The Attachments Seeker has completed extracting the attachments from the geodatabase. Now starting to transfer over the files from the local directory to the specified output. Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
+        logger.log(message=f'The Attachments Seeker has completed extracting the attachments from the geodatabase. Now saving the data. Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
+                                      
+        # Save the data tracker before it is transferred
+        spatial_processor.data.save_data(True if resume else False)
+        logger.log(message=f'The changes have successfully been saved to the specified datatracker. Now starting to transfer over the files from the local directory to the specified output in the background and opening Record Reviser. Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
 
-        # Move the local files to the specified output except logs
-        _ = network_transfer(
+        # Move the local files to the specified output except logs in the background, a resumed run only transfers the files that changed
+        transfer = network_transfer_background(
             local_path=spatial_processor.params.local_dir,
             network_path=os.path.dirname(spatial_processor.params.gdb_path),
             logger=logger,
-            list_files=[os.path.basename(spatial_processor.params.gdb_path), os.path.basename(spatial_processor.params.datatracker), os.path.basename(spatial_processor.params.attachments)]
+            list_files=[os.path.basename(spatial_processor.params.gdb_path), os.path.basename(spatial_processor.params.datatracker), os.path.basename(spatial_processor.params.attachments)],
+            delta='stat' if resume else None
         )
-        logger.log(message=f'The Network Transfer has completed moving the files from local to the network. Now saving the data. Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
-                                      
-        # Save the data tracker before returning
-        spatial_processor.data.save_data(True if resume else False)
-        logger.log(message=f'The changes have successfully been saved to the specified datatracker. Now opening Record Reviser. Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
         
-        # Open the record reviser
+        # Open the record reviser while the transfer runs, it waits for the transfer before saving any changes
         filter = {'created_at': datetime.datetime.now()}
-        record_reviser(logger=logger, data=spatial_processor.data, gdb=spatial_processor.params.gdb_path, filter=filter)
+        record_reviser(logger=logger, data=spatial_processor.data, gdb=spatial_processor.params.gdb_path, filter=filter, transfer=transfer)
         logger.log(message='The Record Reviser has completed editing any entries and is closing.', tag='INFO')
+        
+        # Wait for the transfer so any of its errors are committed with the rest of the logs, it is only waited on once
+        pending_transfer, transfer = transfer, None
+        transferred = pending_transfer.result()
+        logger.log(message=f'The Network Transfer has completed moving the files from local to the network. Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
 
         # Commit all messages that have been posted to logger
         logger.commit(close=True)
@@ -128,10 +141,10 @@ def spatial_transformer(input_path: str, output_path: str, load_from: str, save_
             local_path=spatial_processor.params.local_dir,
             network_path=os.path.dirname(spatial_processor.params.gdb_path),
             logger=logger,
-            list_files=[os.path.basename(logger.log_file)[:-4] + '_WARNING.txt', os.path.basename(logger.log_file)[:-4] + '_ERROR.txt']
+            list_files=[os.path.basename(logger.log_file)[:-4] + '_WARNING.txt', os.path.basename(logger.log_file)[:-4] + '_ERROR.txt', os.path.basename(logger.log_file)[:-4] + '_METRICS.jsonl']
         )
 
-        if not debug and success:
+        if not debug and success and transferred:
             # Remove the local contents
             spatial_processor.del_gdb()
             os.mkdir(setup_parameters.local_dir)
@@ -141,6 +154,10 @@ def spatial_transformer(input_path: str, output_path: str, load_from: str, save_
         # Log the error
         logger.log(message=traceback.format_exc(), tag='ERROR')
         
+        # Let a background transfer finish before making the checkpoint, it may be copying the datatracker
+        if transfer:
+            transfer.result()
+        
         # Save the data to the datatracker in case of crashing
         if spatial_processor:
             spatial_processor.data.save_data(True if resume else False)
@@ -173,6 +190,9 @@ def main():
     parser.add_argument('--debug', action='store_true', default=False, help='Enable debug mode.')
     parser.add_argument('--resume', action='store_true', default=False, help='Resume from where a crash happened.')
     parser.add_argument('--skip_unzip', action='store_true', default=False, help='Skip the recursive unzipping process if your input is already processed or unzipped. This will also overwrite your output location with the input.')
+    parser.add_argument('--no_extract', action='store_true', default=False, help='Read spatial data straight from the archives in the input (through GDAL /vsizip/ and /vsi7z/) instead of extracting them. The output is set as the input.')
+    parser.add_argument('--dedupe', choices=['link', 'alias'], default=None, help='Hard link (link) or only record (alias) the extracted files with identical contents, so each duplicated dataset is only converted once.')
+    parser.add_argument('--pack_attachments', action='store_true', default=False, help='Pack the attachments of each project into a single indexed .zip file instead of a folder of files.')
     parser.add_argument('--suppress', action='store_true', default=False, help='Suppress Warnings in the command-line and only show Errors.')
     parser.add_argument('--ps_script', default='', help='The location of the script to run commands if used.')
     
@@ -190,7 +210,7 @@ def main():
     logger.log(message=f'Tool is starting... Time: {datetime.datetime.now().strftime("%H:%M:%S")}', tag='INFO')
         
     # Call the entry function
-    spatial_transformer(input_path=args.input_path, output_path=args.output_path, load_from=args.load, save_to=args.save, gdb_path=args.gdb_path, datatracker=args.datatracker, attachments=args.attachments, master_data_path=args.master, logger=logger, database_config=args.ini, year=args.year, debug=args.debug, resume=args.resume, skip_unzip=args.skip_unzip)
+    spatial_transformer(input_path=args.input_path, output_path=args.output_path, load_from=args.load, save_to=args.save, gdb_path=args.gdb_path, datatracker=args.datatracker, attachments=args.attachments, master_data_path=args.master, logger=logger, database_config=args.ini, year=args.year, debug=args.debug, resume=args.resume, skip_unzip=args.skip_unzip, no_extract=args.no_extract, dedupe=args.dedupe, pack_attachments=args.pack_attachments)
     
     # Get the end time of the script and calculate the elapsed time
     end_time = time.time()
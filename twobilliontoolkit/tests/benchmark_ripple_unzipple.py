@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+import argparse
+from tempfile import TemporaryDirectory
+from py7zr import SevenZipFile
+
+from twobilliontoolkit.Logger.Logger import Logger
+from twobilliontoolkit.RippleUnzipple import ripple_unzipple
+from twobilliontoolkit.tests.test_ripple_unzipple import build_nested_archive
+
+def count_walks(function, *args, **kwargs) -> int:
+    """
+    Run a function while counting the os.walk calls made by the ripple_unzipple module.
+    """
+    calls = []
+    original_walk = ripple_unzipple.os.walk
+
+    def counting_walk(*walk_args, **walk_kwargs):
+        calls.append(walk_args[0])
+        return original_walk(*walk_args, **walk_kwargs)
+
+    ripple_unzipple.os.walk = counting_walk
+    try:
+        function(*args, **kwargs)
+    finally:
+        ripple_unzipple.os.walk = original_walk
+
+    return len(calls)
+
+def build_7z_fixture(directory: str, name: str, size: int) -> str:
+    """
+    Build a .7z file holding a few compressible text files adding up to about size bytes.
+    """
+    archive_path = os.path.join(directory, f'{name}.7z')
+    line = b'POLYGON ((-75.69 45.42, -75.68 45.42, -75.68 45.43, -75.69 45.42)) ' + os.urandom(16).hex().encode() + b'\n'
+    
+    with SevenZipFile(archive_path, 'w') as archive:
+        for index in range(4):
+            archive.writestr(line * (size // (4 * len(line))), f'{name}/part_{index}.txt')
+    
+    return archive_path
+
+def compare_backends(archives: int, size: int, repeat: int) -> None:
+    """
+    Time each installed extractor backend on the same .7z fixtures.
+    """
+    with TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, 'input')
+        os.makedirs(input_path)
+        for index in range(archives):
+            build_7z_fixture(input_path, f'fixture{index}', size)
+        
+        logger = Logger(log_file=os.path.join(temp_dir, 'benchmark_log.txt'))
+        
+        for name, backend in ripple_unzipple.EXTRACTOR_BACKENDS.items():
+            if not backend.available():
+                print(f'{name}: not installed')
+                continue
+            
+            timings = []
+            for run in range(repeat):
+                output_path = os.path.join(temp_dir, f'output_{name}_{run}')
+                
+                start_time = time.perf_counter()
+                ripple_unzipple.ripple_unzip(input_path, output_path, logger, single_pass=True, backend=name)
+                timings.append(time.perf_counter() - start_time)
+            
+            print(f'{name}: {archives} .7z archives of {size / (1024 * 1024):.0f} MB, best {min(timings):.3f}s, mean {sum(timings) / len(timings):.3f}s')
+
+def main():
+    """ Benchmark Ripple Unzipple on deeply nested zip-in-7z-in-zip fixtures """
+    parser = argparse.ArgumentParser(description='Ripple Unzipple benchmark on nested archive fixtures.')
+    parser.add_argument('--depth', type=int, default=8, help='Levels of nesting in each fixture archive.')
+    parser.add_argument('--archives', type=int, default=20, help='Number of fixture archives in the input directory.')
+    parser.add_argument('--workers', type=int, default=1, help='Number of archives to extract concurrently.')
+    parser.add_argument('--memory_threshold', type=int, default=0, help='Size in bytes under which nested archives are extracted in memory.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs.')
+    parser.add_argument('--backends', action='store_true', default=False, help='Compare the extractor backends on flat .7z fixtures instead.')
+    parser.add_argument('--size', type=int, default=32, help='Uncompressed size in MB of each .7z fixture when comparing backends.')
+    args = parser.parse_args()
+    
+    if args.backends:
+        return compare_backends(args.archives, args.size * 1024 * 1024, args.repeat)
+
+    with TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, 'input')
+        os.makedirs(input_path)
+        for index in range(args.archives):
+            build_nested_archive(input_path, f'fixture{index}', args.depth)
+
+        logger = Logger(log_file=os.path.join(temp_dir, 'benchmark_log.txt'))
+
+        timings = []
+        for run in range(args.repeat):
+            output_path = os.path.join(temp_dir, f'output{run}')
+
+            start_time = time.perf_counter()
+            walks = count_walks(ripple_unzipple.ripple_unzip, input_path, output_path, logger, args.workers, memory_threshold=args.memory_threshold)
+            timings.append(time.perf_counter() - start_time)
+
+        print(f'{args.archives} archives nested {args.depth} deep with {args.workers} worker(s): best {min(timings):.3f}s, mean {sum(timings) / len(timings):.3f}s, {walks} os.walk call(s) per run')
+
+if __name__ == "__main__":
+    sys.exit(main())
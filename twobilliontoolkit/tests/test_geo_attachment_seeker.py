@@ -2,9 +2,14 @@ import unittest
 import os
 import sys
 import shutil
+from zipfile import ZipFile
+import hashlib
+import threading
+from unittest import mock
 from tempfile import TemporaryDirectory
 
-from twobilliontoolkit.GeoAttachmentSeeker.geo_attachment_seeker import find_attachments, process_attachment 
+from twobilliontoolkit.GeoAttachmentSeeker import geo_attachment_seeker
+from twobilliontoolkit.GeoAttachmentSeeker.geo_attachment_seeker import find_attachments, process_attachment, AttachmentWriter, arcpy, pack_attachments, read_attachment, load_pack_index
 
 class TestGeoAttachmentSeeker(unittest.TestCase):
     
@@ -55,6 +60,103 @@ class TestGeoAttachmentSeeker(unittest.TestCase):
         find_attachments(geodatabase, self.output_path)
         self.assertTrue(os.path.exists(os.path.join(self.output_path, 'proj_test20')), "proj_test20 attachments were not extracted to their path correctly.")
 
+    def test_parallel_attachments(self):
+        # Test exporting the tables and writing the attachments concurrently gives the same files and dictionary
+        geodatabase = os.path.join(self.input_path, 'TestGDB1.gdb')
+        sequential_path = os.path.join(self.temp_dir.name, 'sequential')
+        sequential_result = find_attachments(geodatabase, sequential_path, table_workers=1, write_workers=1)
+        parallel_result = find_attachments(geodatabase, self.output_path, table_workers=4, write_workers=4)
+        
+        self.assertEqual(list(parallel_result), list(sequential_result))
+        for project_id in sequential_result:
+            self.assertEqual(sorted(os.listdir(parallel_result[project_id])), sorted(os.listdir(sequential_result[project_id])))
+
+    def test_arcpy_tables_one_at_a_time(self):
+        # Test the arcpy backend reads its tables from a single thread, since arcpy is not thread safe, and warns that table_workers was ignored
+        geodatabase = os.path.join(self.temp_dir.name, 'project.gdb')
+        os.makedirs(geodatabase)
+        fake_arcpy = mock.Mock()
+        fake_arcpy.ListTables.return_value = ['proj_a__ATTACH', 'proj_b__ATTACH', 'proj_c__ATTACH']
+        threads = set()
+        logger = mock.Mock()
+        
+        with mock.patch.object(geo_attachment_seeker, 'arcpy', fake_arcpy), mock.patch.object(geo_attachment_seeker, 'process_attachment', side_effect=lambda *args: threads.add(threading.get_ident())) as processing:
+            result = find_attachments(geodatabase, self.output_path, table_workers=4, write_workers=4, backend='arcpy', logger=logger)
+        
+        self.assertEqual(sorted(result), ['proj_a', 'proj_b', 'proj_c'])
+        self.assertEqual(processing.call_count, 3)
+        self.assertEqual(len(threads), 1)
+        self.assertEqual(processing.call_args.args[2], 4)
+        self.assertIn('table_workers=4', logger.log.call_args_list[0].kwargs['message'])
+
+    @unittest.skipIf(arcpy is None, "arcpy is needed to compare against the GDAL backend.")
+    def test_gdal_backend(self):
+        # Test the GDAL backend writes the same attachment files, byte for byte, as arcpy
+        geodatabase = os.path.join(self.input_path, 'TestGDB1.gdb')
+        arcpy_path = os.path.join(self.temp_dir.name, 'arcpy')
+        arcpy_result = find_attachments(geodatabase, arcpy_path, backend='arcpy')
+        gdal_result = find_attachments(geodatabase, self.output_path, backend='gdal')
+        
+        self.assertEqual(sorted(gdal_result), sorted(arcpy_result))
+        for project_id in arcpy_result:
+            file_names = sorted(os.listdir(arcpy_result[project_id]))
+            self.assertEqual(sorted(os.listdir(gdal_result[project_id])), file_names)
+            for file_name in file_names:
+                with open(os.path.join(arcpy_result[project_id], file_name), 'rb') as arcpy_file, open(os.path.join(gdal_result[project_id], file_name), 'rb') as gdal_file:
+                    self.assertEqual(gdal_file.read(), arcpy_file.read())
+        
+    def test_attachment_writer(self):
+        # Test attachments are written from their buffer, hashed while written, and identical ones are linked
+        os.makedirs(self.output_path)
+        blob = memoryview(bytearray(os.urandom(3 * 1024 * 1024 + 5)))
+        
+        writer = AttachmentWriter(skip_duplicates=True)
+        first_digest = writer.write(os.path.join(self.output_path, 'ATT1_photo.jpg'), blob)
+        second_digest = writer.write(os.path.join(self.output_path, 'ATT2_photo.jpg'), blob)
+        
+        with open(os.path.join(self.output_path, 'ATT1_photo.jpg'), 'rb') as file:
+            self.assertEqual(file.read(), blob.tobytes())
+        self.assertEqual(first_digest, hashlib.sha256(blob).hexdigest())
+        self.assertEqual(second_digest, first_digest)
+        self.assertEqual(writer.duplicates, 1)
+        self.assertTrue(os.path.samefile(os.path.join(self.output_path, 'ATT1_photo.jpg'), os.path.join(self.output_path, 'ATT2_photo.jpg')))
+        
+        # Test the streaming hash matches when duplicates are not skipped
+        self.assertEqual(AttachmentWriter('md5').write(os.path.join(self.output_path, 'ATT3_photo.jpg'), blob), hashlib.md5(blob).hexdigest())
+
+    def test_incremental_writer(self):
+        # Test attachments already exported with the same size are skipped, and changed ones are written again
+        os.makedirs(self.output_path)
+        filename = os.path.join(self.output_path, 'ATT1_photo.jpg')
+        
+        writer = AttachmentWriter()
+        writer.write(filename, memoryview(b'first'))
+        writer.write(filename, memoryview(b'first'))
+        writer.write(filename, memoryview(b'changed'))
+        self.assertEqual((writer.written, writer.skipped), (2, 1))
+        with open(filename, 'rb') as file:
+            self.assertEqual(file.read(), b'changed')
+        
+        writer = AttachmentWriter(incremental=False)
+        writer.write(filename, memoryview(b'changed'))
+        self.assertEqual((writer.written, writer.skipped), (1, 0))
+
+    def test_pack_attachments(self):
+        # Test attachments are packed into one file and read back by their ID, with duplicates stored once
+        os.makedirs(self.output_path)
+        pack_path = os.path.join(self.output_path, 'proj_test1.zip')
+        rows = [(memoryview(b'photo one'), 'one.jpg', 1), (memoryview(b'photo two'), 'two.jpg', 2), (memoryview(b'photo one'), 'copy.jpg', 3)]
+        
+        writer = AttachmentWriter(skip_duplicates=True)
+        pack_attachments(pack_path, rows, writer)
+        
+        self.assertEqual(read_attachment(pack_path, 2), b'photo two')
+        self.assertEqual(read_attachment(pack_path, '3'), b'photo one')
+        self.assertEqual(load_pack_index(pack_path)['3']['name'], 'ATT3_copy.jpg')
+        self.assertEqual((writer.written, writer.duplicates), (2, 1))
+        with ZipFile(pack_path) as pack:
+            self.assertEqual(pack.read('ATT1_one.jpg'), b'photo one')
+
 if __name__ == '__main__':
     unittest.main()
     
\ No newline at end of file
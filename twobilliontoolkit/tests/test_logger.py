@@ -0,0 +1,128 @@
+import unittest
+import os
+import time
+from tempfile import TemporaryDirectory
+from concurrent.futures import ProcessPoolExecutor
+
+from twobilliontoolkit.Logger.Logger import Logger, LogWriter, QueueLogger
+
+# The logger of each worker process, made by the initializer of the pool
+worker_logger = None
+
+def init_worker(log_queue) -> None:
+    global worker_logger
+    worker_logger = QueueLogger(log_queue)
+
+def log_from_worker(index: int) -> int:
+    worker_logger.log(message=f'warning from worker {index}', tag='WARNING')
+    worker_logger.log(message=f'error from worker {index}', tag='ERROR')
+    worker_logger.metric('worker', index=index)
+    return os.getpid()
+
+class TestLogWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.log_file = os.path.join(self.temp_dir.name, 'logs', 'log.txt')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def read(self, log_file: str) -> str:
+        with open(log_file) as file:
+            return file.read()
+
+    def test_drain(self):
+        # Test a drain flushes what was written while keeping the file open for the next write
+        writer = LogWriter(flush_interval=60)
+        writer.write(self.log_file, 'first\n')
+        writer.drain()
+        self.assertEqual(self.read(self.log_file), 'first\n')
+        self.assertFalse(writer.handles[self.log_file].closed)
+
+        writer.write(self.log_file, 'second\n')
+        writer.close()
+        self.assertEqual(self.read(self.log_file), 'first\nsecond\n')
+
+    def test_flush_size(self):
+        # Test the files are flushed once enough text is written, without waiting for a drain
+        writer = LogWriter(flush_size=10, flush_interval=60)
+        writer.write(self.log_file, 'a' * 20)
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and not (os.path.exists(self.log_file) and self.read(self.log_file)):
+            time.sleep(0.01)
+        self.assertEqual(self.read(self.log_file), 'a' * 20)
+        writer.close()
+
+    def test_close(self):
+        # Test a close writes everything, releases the files and stops the thread, and can be called again
+        writer = LogWriter(flush_interval=60)
+        writer.write(self.log_file, 'entry\n')
+        handle = writer._get_handle(self.log_file)
+        writer.close()
+        writer.close()
+        writer.drain()
+
+        self.assertTrue(writer.closed)
+        self.assertTrue(handle.closed)
+        self.assertEqual(writer.handles, {})
+        self.assertFalse(writer.thread.is_alive())
+        self.assertEqual(self.read(self.log_file), 'entry\n')
+
+    def test_commit_close(self):
+        # Test committing with close releases the log files so they can be removed, and the next write opens them again
+        logger = Logger(log_file=self.log_file, seperate_logs=True)
+        logger.log(message='first warning', tag='WARNING')
+        logger.commit(close=True)
+
+        self.assertTrue(logger.writer.closed)
+        warning_file = self.log_file[:-4] + '_WARNING.txt'
+        self.assertIn('first warning', self.read(warning_file))
+        os.remove(warning_file)
+
+        logger.log(message='second warning', tag='WARNING')
+        logger.commit(close=True)
+        self.assertIn('second warning', self.read(warning_file))
+        self.assertNotIn('first warning', self.read(warning_file))
+
+class TestQueueLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.log_file = os.path.join(self.temp_dir.name, 'log.txt')
+        self.logger = Logger(log_file=self.log_file, seperate_logs=True)
+
+    def tearDown(self):
+        self.logger.stop_listener()
+        self.temp_dir.cleanup()
+
+    def read(self, log_file: str) -> str:
+        with open(log_file) as file:
+            return file.read()
+
+    def test_worker_processes(self):
+        # Test the records logged in worker processes reach the right files once the listener is stopped
+        log_queue = self.logger.start_listener()
+        with ProcessPoolExecutor(max_workers=2, initializer=init_worker, initargs=(log_queue,)) as pool:
+            pids = list(pool.map(log_from_worker, range(4)))
+        self.assertNotIn(os.getpid(), pids)
+
+        self.logger.stop_listener()
+        warnings = self.read(self.log_file[:-4] + '_WARNING.txt')
+        errors = self.read(self.log_file[:-4] + '_ERROR.txt')
+        for index in range(4):
+            self.assertIn(f'warning from worker {index}', warnings)
+            self.assertNotIn(f'error from worker {index}', warnings)
+            self.assertIn(f'error from worker {index}', errors)
+            self.assertNotIn(f'warning from worker {index}', errors)
+        self.assertEqual(len(self.read(self.log_file[:-4] + '_METRICS.jsonl').splitlines()), 4)
+
+    def test_stop_without_listener(self):
+        # Test stopping a listener that was never started does nothing
+        self.logger.stop_listener()
+        self.assertIsNone(self.logger.listener)
+        self.assertIsNone(self.logger.writer)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,243 @@
+import unittest
+import os
+import json
+import time
+from unittest import mock
+from tempfile import TemporaryDirectory
+
+from twobilliontoolkit.Logger.Logger import Logger
+from twobilliontoolkit.NetworkTransfer import network_transfer
+from twobilliontoolkit.NetworkTransfer.network_transfer import TokenBucket, TransferEngine, merge_directories, merge_gdbs
+
+class TestTransferEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.src_dir = os.path.join(self.temp_dir.name, 'source')
+        self.dst_dir = os.path.join(self.temp_dir.name, 'destination')
+        os.makedirs(self.src_dir)
+        os.makedirs(self.dst_dir)
+        for index in range(4):
+            with open(os.path.join(self.src_dir, f'file_{index}.txt'), 'w') as file:
+                file.write(f'file {index}')
+        self.logger = mock.Mock()
+
+        # Retry straight away
+        patcher = mock.patch.object(network_transfer, 'RETRY_DELAY', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def transfer(self, **kwargs) -> TransferEngine:
+        # Copy every file of the source with an engine
+        with TransferEngine(self.logger, workers=2, **kwargs) as engine:
+            for name in sorted(os.listdir(self.src_dir)):
+                engine.submit(os.path.join(self.src_dir, name), os.path.join(self.dst_dir, name))
+        return engine
+
+    def test_transient_error_retried(self):
+        # Test a copy that fails once is retried and counted as copied
+        copy2 = network_transfer.shutil.copy2
+        attempts = []
+
+        def flaky_copy(src_path, dst_path):
+            attempts.append(src_path)
+            if attempts.count(src_path) == 1 and src_path.endswith('file_1.txt'):
+                raise OSError('The specified network name is no longer available')
+            return copy2(src_path, dst_path)
+
+        with mock.patch.object(network_transfer.shutil, 'copy2', side_effect=flaky_copy):
+            engine = self.transfer(retries=2)
+
+        self.assertTrue(engine.success)
+        self.assertEqual(engine.files, 4)
+        self.assertEqual(attempts.count(os.path.join(self.src_dir, 'file_1.txt')), 2)
+        self.assertEqual(sorted(os.listdir(self.dst_dir)), sorted(os.listdir(self.src_dir)))
+
+    def test_failed_after_retries(self):
+        # Test a copy that keeps failing is tried once more for every retry, then counted as failed
+        copy2 = network_transfer.shutil.copy2
+        attempts = []
+
+        def broken_copy(src_path, dst_path):
+            if src_path.endswith('file_2.txt'):
+                attempts.append(src_path)
+                raise OSError('Access is denied')
+            return copy2(src_path, dst_path)
+
+        with mock.patch.object(network_transfer.shutil, 'copy2', side_effect=broken_copy):
+            engine = self.transfer(retries=2)
+
+        self.assertFalse(engine.success)
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(engine.failed, [os.path.join(self.src_dir, 'file_2.txt')])
+        self.assertEqual(engine.files, 3)
+        self.assertIn('after 3 attempt(s)', self.logger.log.call_args_list[0].kwargs['message'])
+
+    def test_delta_modes(self):
+        # Test a re-run only copies the files that changed, by size and modified time or by contents
+        self.transfer()
+        changed_path = os.path.join(self.src_dir, 'file_1.txt')
+        with open(changed_path, 'w') as file:
+            file.write('FILE 1')
+        dst_stat = os.stat(os.path.join(self.dst_dir, 'file_1.txt'))
+        os.utime(changed_path, (dst_stat.st_atime, dst_stat.st_mtime))
+
+        engine = self.transfer(delta='stat')
+        self.assertEqual((engine.files, engine.skipped), (0, 4))
+        self.assertEqual(engine.skipped_bytes, 4 * len('file 0'))
+
+        engine = self.transfer(delta='hash')
+        self.assertEqual((engine.files, engine.skipped), (1, 3))
+        with open(os.path.join(self.dst_dir, 'file_1.txt')) as file:
+            self.assertEqual(file.read(), 'FILE 1')
+
+    def test_pool_shut_down_on_error(self):
+        # Test the worker threads are shut down when a copy raises an error that is not retried
+        engine = TransferEngine(self.logger)
+        with mock.patch.object(network_transfer.shutil, 'copy2', side_effect=RuntimeError('unexpected')), self.assertRaises(RuntimeError):
+            with engine:
+                engine.submit(os.path.join(self.src_dir, 'file_0.txt'), os.path.join(self.dst_dir, 'file_0.txt'))
+        self.assertTrue(engine.pool._shutdown)
+
+class TestChunkedCopy(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.src_path = os.path.join(self.temp_dir.name, 'source.bin')
+        self.dst_path = os.path.join(self.temp_dir.name, 'destination.bin')
+        self.contents = os.urandom(5000)
+        with open(self.src_path, 'wb') as file:
+            file.write(self.contents)
+        self.logger = mock.Mock()
+        self.engine = TransferEngine(self.logger, chunked=True)
+
+        # Copy in small chunks
+        patcher = mock.patch.object(network_transfer, 'CHUNK_SIZE', 1024)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def interrupt(self, partial_contents: bytes) -> None:
+        # Leave a partial copy behind as if the network dropped after it was written
+        with open(self.dst_path + network_transfer.PARTIAL_EXTENSION, 'wb') as file:
+            file.write(partial_contents)
+        src_stat = os.stat(self.src_path)
+        with open(self.dst_path + network_transfer.PROGRESS_EXTENSION, 'w') as file:
+            json.dump({'source': [src_stat.st_size, int(src_stat.st_mtime)], 'offset': len(partial_contents)}, file)
+
+    def test_resume(self):
+        # Test an interrupted copy resumes from the recorded offset and the temporary files are removed
+        self.interrupt(self.contents[:2048])
+
+        written = []
+        with mock.patch.object(self.engine, 'throttle', side_effect=written.append):
+            self.engine.copy_chunked(self.src_path, self.dst_path)
+
+        self.assertEqual(sum(written), 5000 - 2048)
+        self.assertIn('Resuming the copy', self.logger.log.call_args.kwargs['message'])
+        with open(self.dst_path, 'rb') as file:
+            self.assertEqual(file.read(), self.contents)
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['destination.bin', 'source.bin'])
+
+    def test_checksum_mismatch(self):
+        # Test a copy that does not match the source is rejected and started over, leaving the destination alone
+        self.interrupt(b'x' * 2048)
+
+        with self.assertRaises(OSError):
+            self.engine.copy_chunked(self.src_path, self.dst_path)
+        self.assertEqual(os.listdir(self.temp_dir.name), ['source.bin'])
+
+        self.engine.copy_chunked(self.src_path, self.dst_path)
+        with open(self.dst_path, 'rb') as file:
+            self.assertEqual(file.read(), self.contents)
+
+class TestBandwidth(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.src_path = os.path.join(self.temp_dir.name, 'source.bin')
+        with open(self.src_path, 'wb') as file:
+            file.write(b'0' * 512 * 1024)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_token_bucket(self):
+        # Test the bucket holds the bytes consumed to its rate
+        bucket = TokenBucket(1024 * 1024)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.consume(128 * 1024)
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
+
+    def test_throttled_copy(self):
+        # Test a capped copy takes as long as its size at the cap, and its throughput is written to the _METRICS file
+        log_file = os.path.join(self.temp_dir.name, 'log.txt')
+        logger = Logger(log_file=log_file)
+        dst_path = os.path.join(self.temp_dir.name, 'destination.bin')
+
+        start = time.monotonic()
+        with TransferEngine(logger, bandwidth=1) as engine:
+            engine.submit(self.src_path, dst_path, item='source')
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
+        self.assertEqual(os.path.getsize(dst_path), 512 * 1024)
+
+        logger.commit(close=True)
+        with open(log_file[:-4] + '_METRICS.jsonl') as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['metric'], 'transfer_item')
+        self.assertEqual(records[0]['item'], 'source')
+        self.assertEqual((records[0]['files'], records[0]['bytes'], records[0]['failed']), (1, 512 * 1024, 0))
+        self.assertLessEqual(records[0]['mb_per_s'], 1.1)
+
+    def test_bandwidth_with_engine(self):
+        # Test a cap cannot be given to a merge into an engine, which has its own cap
+        with TransferEngine(mock.Mock()) as engine:
+            with self.assertRaises(ValueError):
+                merge_directories(self.temp_dir.name, os.path.join(self.temp_dir.name, 'copy'), engine.logger, engine, bandwidth=1)
+            with self.assertRaises(ValueError):
+                merge_gdbs(self.temp_dir.name, os.path.join(self.temp_dir.name, 'copy.gdb'), engine.logger, engine, bandwidth=1)
+
+class TestMergeGdbs(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.src_gdb = os.path.join(self.temp_dir.name, 'source.gdb')
+        self.dest_gdb = os.path.join(self.temp_dir.name, 'destination.gdb')
+        os.makedirs(self.src_gdb)
+        os.makedirs(self.dest_gdb)
+        self.logger = mock.Mock()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_failed_feature_class(self):
+        # Test a failed copy is counted, the other feature classes are still copied and the merge is not logged as completed
+        def copy(src, dst):
+            if os.path.basename(src) == 'proj_2':
+                raise OSError('schema lock')
+
+        with mock.patch.object(network_transfer, 'plan_gdb_merge', return_value=['proj_1', 'proj_2', 'proj_3']), mock.patch.object(network_transfer.arcpy.management, 'Copy', side_effect=copy) as arcpy_copy:
+            self.assertFalse(merge_gdbs(self.src_gdb, self.dest_gdb, self.logger))
+
+        self.assertEqual(arcpy_copy.call_count, 3)
+        messages = [call.kwargs['message'] for call in self.logger.log.call_args_list]
+        self.assertFalse([message for message in messages if 'completed' in message])
+        self.assertIn('failed for 1 of them: proj_2', messages[-1])
+        self.logger.metric.assert_called_once_with('gdb_merge', item=self.src_gdb, feature_classes=2, failed=1, seconds=mock.ANY)
+
+    def test_merged_feature_classes(self):
+        # Test a merge where every copy succeeds is logged as completed
+        with mock.patch.object(network_transfer, 'plan_gdb_merge', return_value=['proj_1', 'proj_2']), mock.patch.object(network_transfer.arcpy.management, 'Copy'):
+            self.assertTrue(merge_gdbs(self.src_gdb, self.dest_gdb, self.logger))
+
+        self.assertIn('has completed', self.logger.log.call_args.kwargs['message'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import os
+
+from twobilliontoolkit.SpatialTransformer.PathResolver import DrivePathResolver
+
+class TestDrivePathResolver(unittest.TestCase):
+    
+    def setUp(self):
+        # Count how many times the lookup gets called
+        self.lookups = []
+        
+        def lookup(drive):
+            self.lookups.append(drive)
+            return r'\\server\share' if drive == 'M:' else None
+        
+        self.resolver = DrivePathResolver(lookup=lookup)
+        
+    def test_mapped_drive(self):
+        # Test a mapped drive is substituted with its network path
+        self.assertEqual(self.resolver.resolve(r'M:\data\file.shp'), r'\\server\share\data\file.shp')
+        self.assertEqual(self.resolver.resolve(r'm:\data\sub\..\file.shp'), r'\\server\share\data\file.shp')
+
+    def test_unmapped_drive(self):
+        # Test local and unmapped drives are left as they are
+        self.assertEqual(self.resolver.resolve(r'C:\LocalTwoBillionToolkit\file.shp'), r'C:\LocalTwoBillionToolkit\file.shp')
+        self.assertEqual(self.resolver.resolve(r'V:\data\file.shp'), r'V:\data\file.shp')
+        self.assertNotIn('C:', self.lookups)
+        
+    def test_lookup_cached(self):
+        # Test each drive is only looked up once
+        paths = [rf'M:\data\file_{index}.shp' for index in range(100)] + [r'V:\a.shp', r'V:\b.shp']
+        result = self.resolver.resolve_all(paths)
+        self.assertEqual(len(result), len(paths))
+        self.assertEqual(result[r'M:\data\file_5.shp'], r'\\server\share\data\file_5.shp')
+        self.assertEqual(sorted(self.lookups), ['M:', 'V:'])
+        
+    def test_resolve_under(self):
+        # Test a walk of a directory is resolved from a single resolve of the directory
+        resolve_path = self.resolver.resolve_under(r'M:\output')
+        self.assertEqual(resolve_path(r'M:\output\project\site.shp'), r'\\server\share\output\project\site.shp')
+        self.assertEqual(resolve_path(r'M:\output'), r'\\server\share\output')
+        self.assertEqual(resolve_path(r'M:\output_2\site.shp'), r'\\server\share\output_2\site.shp')
+        self.assertEqual(self.lookups, ['M:'])
+        
+    def test_lookup_error(self):
+        # Test a failed lookup is raised without a logger and logged with one
+        def lookup(drive):
+            raise OSError('The network is unreachable')
+        
+        with self.assertRaises(OSError):
+            DrivePathResolver(lookup=lookup).resolve(r'M:\file.shp')
+        
+        messages = []
+        class ListLogger:
+            def log(self, message, tag='ERROR'):
+                messages.append(tag)
+        
+        self.assertEqual(DrivePathResolver(lookup=lookup, logger=ListLogger()).resolve(r'M:\file.shp'), r'M:\file.shp')
+        self.assertEqual(messages, ['WARNING'])
+        
+    def test_static_mapping(self):
+        # Test a static mapping table is used without calling the lookup
+        resolver = DrivePathResolver(lookup=lambda drive: self.fail('lookup should not be called'), mapping={'m:': '\\\\other\\share\\'})
+        self.assertEqual(resolver.resolve(r'M:\file.shp'), r'\\other\share\file.shp')
+        
+    def test_virtual_path(self):
+        # Test only the archive on disk inside of a GDAL virtual path is resolved
+        virtual_path = r'/vsizip/{/vsi7z/{M:\data\delivery.7z}/inner.zip}/layers/site.shp'
+        self.assertEqual(self.resolver.resolve(virtual_path), r'/vsizip/{/vsi7z/{\\server\share\data\delivery.7z}/inner.zip}/layers/site.shp')
+        
+    def test_relative_path(self):
+        # Test paths without a drive are made absolute
+        self.assertEqual(self.resolver.resolve('file.shp'), os.path.abspath('file.shp'))
+
+if __name__ == '__main__':
+    unittest.main()
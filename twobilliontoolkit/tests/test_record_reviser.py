@@ -0,0 +1,58 @@
+import unittest
+import os
+from zipfile import ZipFile
+from unittest import mock
+from tempfile import TemporaryDirectory
+
+from twobilliontoolkit.RecordReviser import record_reviser
+from twobilliontoolkit.RecordReviser.record_reviser import update_records
+
+class TestUpdateRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.gdb = os.path.join(self.temp_dir.name, 'project.gdb')
+        self.attachments = os.path.join(self.temp_dir.name, 'Attachments')
+        os.makedirs(self.attachments)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def rename_project(self, attachments_path: str) -> mock.Mock:
+        # Change the project number of a project whose attachments were extracted to the given path
+        entry = {'in_raw_gdb': True, 'extracted_attachments_path': attachments_path}
+        data = mock.Mock()
+        data.database_connection.read.return_value = [('2024-001',)]
+        data.get_data.return_value = entry
+
+        with mock.patch.object(record_reviser, 'create_duplicate', return_value='2024_001_NEW'), mock.patch.object(record_reviser.arcpy.management, 'Rename'):
+            update_records(data, {'2024_001_OLD': {'project_number': '2024-001'}}, self.gdb)
+
+        return data
+
+    def test_rename_packed_project(self):
+        # Test the pack of a project keeps its .zip extension when the project is renamed
+        pack_path = os.path.join(self.attachments, 'proj_2024_001_OLD.zip')
+        with ZipFile(pack_path, 'w') as pack:
+            pack.writestr('attachment_index.json', '{}')
+
+        data = self.rename_project(pack_path)
+
+        new_pack_path = os.path.join(self.attachments, 'proj_2024_001_NEW.zip')
+        self.assertTrue(os.path.isfile(new_pack_path))
+        self.assertFalse(os.path.exists(pack_path))
+        data.set_data.assert_any_call('2024_001_NEW', extracted_attachments_path=new_pack_path)
+
+    def test_rename_attachment_folder(self):
+        # Test a folder of attachments is renamed without an extension
+        folder_path = os.path.join(self.attachments, 'proj_2024_001_OLD')
+        os.makedirs(folder_path)
+
+        data = self.rename_project(folder_path)
+
+        new_folder_path = os.path.join(self.attachments, 'proj_2024_001_NEW')
+        self.assertTrue(os.path.isdir(new_folder_path))
+        data.set_data.assert_any_call('2024_001_NEW', extracted_attachments_path=new_folder_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,17 @@
 import unittest
 import os
 import sys
+import json
 import shutil
+from zipfile import ZipFile
+from py7zr import SevenZipFile
 from tempfile import TemporaryDirectory
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
 
 
-from twobilliontoolkit.RippleUnzipple.ripple_unzipple import ripple_unzip 
+from twobilliontoolkit.Logger.Logger import Logger
+from twobilliontoolkit.RippleUnzipple.ripple_unzipple import ripple_unzip, catalog_archives, catalog_index, ExtractionPolicy, ExtractionManifest, ArchiveExtractor, SKIPPED_MEMBERS_FILE, MANIFEST_FILE, ALIASES_FILE, EXTRACTOR_BACKENDS, CommandBackend, PythonBackend
 
 class TestRecursiveUnzip(unittest.TestCase):
     
@@ -86,6 +92,348 @@ class TestRecursiveUnzip(unittest.TestCase):
         self.assertTrue(os.path.exists(self.output_path + path4))
         self.assertTrue(os.path.exists(self.output_path + path5))
 
+def build_nested_archive(directory, name, depth):
+    """
+    Build an archive that alternates between .zip and .7z for each level of nesting (zip-in-7z-in-zip...).
+    
+    Returns the path of the outermost archive.
+    """
+    inner_path = None
+    for level in range(depth, 0, -1):
+        extension = '.zip' if level % 2 else '.7z'
+        archive_path = os.path.join(directory, f'{name}_{level}{extension}')
+        
+        if extension == '.zip':
+            with ZipFile(archive_path, 'w') as archive:
+                archive.writestr(f'level_{level}.txt', f'level {level}')
+                if inner_path:
+                    archive.write(inner_path, os.path.basename(inner_path))
+        else:
+            with SevenZipFile(archive_path, 'w') as archive:
+                archive.writestr(f'level {level}', f'level_{level}.txt')
+                if inner_path:
+                    archive.write(inner_path, os.path.basename(inner_path))
+        
+        if inner_path:
+            os.remove(inner_path)
+        inner_path = archive_path
+        
+    return inner_path
+
+class TestNestedUnzip(unittest.TestCase):
+    
+    def setUp(self):
+        # Create a temporary directory with nested archive fixtures
+        self.temp_dir = TemporaryDirectory()
+        self.input_path = os.path.join(self.temp_dir.name, 'input')
+        self.output_path = os.path.join(self.temp_dir.name, 'output')
+        os.makedirs(self.input_path)
+        build_nested_archive(self.input_path, 'first', 4)
+        build_nested_archive(self.input_path, 'second', 3)
+        os.makedirs(os.path.join(self.input_path, 'sub'))
+        with open(os.path.join(self.input_path, 'sub', 'plain.txt'), 'w') as file:
+            file.write('not an archive')
+        self.logger = Logger(log_file=os.path.join(self.temp_dir.name, 'log.txt'))
+
+    def tearDown(self):
+        # Clean up the temporary directory
+        self.temp_dir.cleanup()
+        
+    def test_nested_directory(self):
+        # Test every level of a nested archive is extracted and the archives are removed
+        ripple_unzip(self.input_path, self.output_path, self.logger)
+        
+        deepest = os.path.join(self.output_path, 'first_1', 'first_2', 'first_3', 'first_4', 'level_4.txt')
+        self.assertTrue(os.path.exists(deepest))
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'second_1', 'second_2', 'second_3', 'level_3.txt')))
+        
+        for root, dirs, files in os.walk(self.output_path):
+            self.assertFalse([file for file in files if file.endswith(('.zip', '.7z'))], f'Archives were left in {root}')
+            
+        # Test the input archives were not touched
+        self.assertTrue(os.path.exists(os.path.join(self.input_path, 'first_1.zip')))
+            
+    def test_parallel_directory(self):
+        # Test extracting with several workers gives the same result as extracting serially
+        serial_output = os.path.join(self.temp_dir.name, 'serial')
+        ripple_unzip(self.input_path, serial_output, self.logger)
+        ripple_unzip(self.input_path, self.output_path, self.logger, workers=3)
+        
+        list_tree = lambda path: sorted(os.path.relpath(os.path.join(root, file), path) for root, _, files in os.walk(path) for file in files)
+        self.assertEqual(list_tree(serial_output), list_tree(self.output_path))
+        
+    def test_parallel_process_pool(self):
+        # Test the worker processes are only started when a .7z file is queued
+        zip_input = os.path.join(self.temp_dir.name, 'zip_input')
+        os.makedirs(zip_input)
+        build_nested_archive(zip_input, 'only', 1)
+        
+        with mock.patch('twobilliontoolkit.RippleUnzipple.ripple_unzipple.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as process_pool:
+            ripple_unzip(zip_input, self.output_path, self.logger, workers=2)
+            process_pool.assert_not_called()
+            
+            ripple_unzip(self.input_path, os.path.join(self.temp_dir.name, 'mixed'), self.logger, workers=2)
+            process_pool.assert_called_once()
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'only_1', 'level_1.txt')))
+        
+    def test_parallel_bad_archive(self):
+        # Test a corrupt archive is logged and left in place without stopping the other extractions
+        with open(os.path.join(self.input_path, 'corrupt.7z'), 'wb') as file:
+            file.write(b'not a 7z file')
+            
+        ripple_unzip(self.input_path, self.output_path, self.logger, workers=2)
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'corrupt.7z')))
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'first_1', 'first_2', 'first_3', 'first_4', 'level_4.txt')))
+            
+    def test_single_pass_directory(self):
+        # Test the single pass mode gives the same result as copying the directory first
+        copy_output = os.path.join(self.temp_dir.name, 'copied')
+        ripple_unzip(self.input_path, copy_output, self.logger)
+        ripple_unzip(self.input_path, self.output_path, self.logger, single_pass=True)
+        
+        list_tree = lambda path: sorted(os.path.relpath(os.path.join(root, file), path) for root, _, files in os.walk(path) for file in files)
+        self.assertEqual(list_tree(copy_output), list_tree(self.output_path))
+        self.assertTrue(os.path.exists(os.path.join(self.input_path, 'first_1.zip')))
+        
+    def test_single_pass_link(self):
+        # Test the non-archive files are hard linked and bad archives are still placed in the output
+        with open(os.path.join(self.input_path, 'corrupt.zip'), 'wb') as file:
+            file.write(b'not a zip file')
+            
+        ripple_unzip(self.input_path, self.output_path, self.logger, single_pass=True, link_files=True)
+        self.assertTrue(os.path.samefile(os.path.join(self.input_path, 'sub', 'plain.txt'), os.path.join(self.output_path, 'sub', 'plain.txt')))
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'corrupt.zip')))
+        
+    def test_in_memory_nested(self):
+        # Test extracting nested archives in memory gives the same result without writing the nested archives out
+        disk_output = os.path.join(self.temp_dir.name, 'disk')
+        ripple_unzip(self.input_path, disk_output, self.logger, single_pass=True)
+        
+        removed = []
+        original_remove = os.remove
+        os.remove = lambda path: (removed.append(path), original_remove(path))
+        try:
+            ripple_unzip(self.input_path, self.output_path, self.logger, single_pass=True, memory_threshold=1024 * 1024)
+        finally:
+            os.remove = original_remove
+        
+        list_tree = lambda path: sorted(os.path.relpath(os.path.join(root, file), path) for root, _, files in os.walk(path) for file in files)
+        self.assertEqual(list_tree(disk_output), list_tree(self.output_path))
+        self.assertEqual(removed, [])
+        
+    def test_in_memory_bad_nested(self):
+        # Test a corrupt nested archive read in memory is written out for manual extraction
+        with ZipFile(os.path.join(self.input_path, 'outer.zip'), 'w') as archive:
+            archive.writestr('inner/corrupt.7z', b'not a 7z file')
+            
+        ripple_unzip(self.input_path, self.output_path, self.logger, single_pass=True, memory_threshold=1024)
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'outer', 'inner', 'corrupt.7z')))
+        
+    def test_in_memory_disabled(self):
+        # Test a threshold of 0 keeps even empty nested archives off the in-memory path
+        archive_path = os.path.join(self.temp_dir.name, 'outer.zip')
+        with ZipFile(archive_path, 'w') as archive:
+            archive.writestr('empty.zip', b'')
+        
+        with mock.patch.object(ZipFile, 'read', autospec=True, side_effect=ZipFile.read) as read:
+            nested_archives, _ = ArchiveExtractor(memory_threshold=0).unzip_file(archive_path, self.output_path, remove=False)
+        read.assert_not_called()
+        self.assertEqual(nested_archives, [(os.path.join(self.output_path, 'empty.zip'), os.path.join(self.output_path, 'empty'), True)])
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'empty.zip')))
+        
+    def test_worker_process_logging(self):
+        # Test a warning logged in an extraction worker process reaches the log file once the pool is done
+        with SevenZipFile(os.path.join(self.input_path, 'outer.7z'), 'w') as archive:
+            archive.writestr(b'not a zip file', 'corrupt.zip')
+        
+        ripple_unzip(self.input_path, self.output_path, self.logger, workers=2, memory_threshold=1024)
+        self.assertIsNone(self.logger.listener)
+        with open(self.logger.log_file) as file:
+            self.assertIn(f"{os.path.join(self.output_path, 'outer', 'corrupt.zip')} could not be read from memory", file.read())
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'outer', 'corrupt.zip')))
+        
+    def test_extraction_policy(self):
+        # Test excluded and large non-spatial members are skipped and recorded instead of extracted
+        with ZipFile(os.path.join(self.input_path, 'delivery.zip'), 'w') as archive:
+            archive.writestr('data/site.shp', b'0' * 2048)
+            archive.writestr('data/video.mp4', b'0' * 2048)
+            archive.writestr('data/notes.docx', b'0' * 10)
+            archive.writestr('data/photo.jpg', b'0' * 10)
+            
+        policy = ExtractionPolicy(exclude=['*.jpg'], catalog_only_size=1024)
+        skipped_members = ripple_unzip(self.input_path, self.output_path, self.logger, single_pass=True, memory_threshold=1024 * 1024, policy=policy)
+        
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'delivery', 'data', 'site.shp')))
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'delivery', 'data', 'notes.docx')))
+        self.assertFalse(os.path.exists(os.path.join(self.output_path, 'delivery', 'data', 'video.mp4')))
+        self.assertFalse(os.path.exists(os.path.join(self.output_path, 'delivery', 'data', 'photo.jpg')))
+        
+        # Nested archives are still extracted even when not matched by the policy
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'first_1', 'first_2', 'first_3', 'first_4', 'level_4.txt')))
+        
+        reasons = {member['member']: (member['reason'], member['size']) for member in skipped_members}
+        self.assertEqual(reasons, {'data/video.mp4': ('catalog_only', 2048), 'data/photo.jpg': ('excluded', 10)})
+        
+        with open(os.path.join(self.output_path, SKIPPED_MEMBERS_FILE)) as file:
+            self.assertEqual(json.load(file), skipped_members)
+            
+    def test_include_policy(self):
+        # Test only the included members are extracted
+        policy = ExtractionPolicy(include=['level_4.txt'])
+        ripple_unzip(os.path.join(self.input_path, 'first_1.zip'), self.output_path, self.logger, policy=policy)
+        self.assertFalse(os.path.exists(os.path.join(self.output_path, 'level_1.txt')))
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'first_2', 'first_3', 'first_4', 'level_4.txt')))
+        
+    def test_catalog_archives(self):
+        # Test every member of the nested archives is catalogued with a chained virtual path and nothing is extracted
+        catalog = catalog_archives(os.path.join(self.input_path, 'second_1.zip'), self.logger)
+        archive_path = os.path.abspath(os.path.join(self.input_path, 'second_1.zip'))
+        
+        members = {record['member']: record for record in catalog}
+        self.assertEqual(sorted(members), ['level_1.txt', 'second_2.7z', 'second_2.7z/level_2.txt', 'second_2.7z/second_3.zip', 'second_2.7z/second_3.zip/level_3.txt'])
+        self.assertEqual(members['second_2.7z/second_3.zip/level_3.txt']['depth'], 3)
+        self.assertEqual(members['second_2.7z/second_3.zip/level_3.txt']['size'], len('level 3'))
+        self.assertEqual(members['second_2.7z/second_3.zip/level_3.txt']['virtual_path'], '/vsizip/{/vsi7z/{/vsizip/{' + archive_path + '}/second_2.7z}/second_3.zip}/level_3.txt')
+        self.assertFalse(os.path.exists(self.output_path))
+        
+    def test_manifest_rerun(self):
+        # Test a re-run only extracts the archives that changed since the last run
+        for single_pass in (False, True):
+            output_path = os.path.join(self.temp_dir.name, f'output_{single_pass}')
+            ripple_unzip(self.input_path, output_path, self.logger, single_pass=single_pass)
+            
+            with open(os.path.join(output_path, MANIFEST_FILE)) as file:
+                manifest = json.load(file)
+            self.assertEqual({key: entry['status'] for key, entry in manifest.items()}, {'first_1.zip': 'extracted', 'second_1.zip': 'extracted'})
+            
+            # Change one archive, then remove a file extracted from each archive to see which ones are extracted again
+            os.utime(os.path.join(self.input_path, 'first_1.zip'), (single_pass, single_pass))
+            os.remove(os.path.join(output_path, 'first_1', 'level_1.txt'))
+            os.remove(os.path.join(output_path, 'second_1', 'level_1.txt'))
+            
+            ripple_unzip(self.input_path, output_path, self.logger, single_pass=single_pass)
+            self.assertTrue(os.path.exists(os.path.join(output_path, 'first_1', 'level_1.txt')))
+            self.assertFalse(os.path.exists(os.path.join(output_path, 'second_1', 'level_1.txt')))
+            self.assertFalse(os.path.exists(os.path.join(output_path, 'second_1.zip')))
+        
+    def test_manifest_saves(self):
+        # Test the manifest is saved once for the queued archives and once as each archive finishes
+        with open(os.path.join(self.input_path, 'notes.txt'), 'w') as file:
+            file.write('notes')
+        
+        with mock.patch.object(ExtractionManifest, 'save', autospec=True, side_effect=ExtractionManifest.save) as save:
+            ripple_unzip(self.input_path, self.output_path, self.logger, single_pass=True)
+        self.assertEqual(save.call_count, 3)
+        
+        # Test a re-run leaves the unchanged files in the output alone
+        inode = os.stat(os.path.join(self.output_path, 'notes.txt')).st_ino
+        with mock.patch('twobilliontoolkit.RippleUnzipple.ripple_unzipple.place_file') as place_file:
+            ripple_unzip(self.input_path, self.output_path, self.logger, single_pass=True)
+        place_file.assert_not_called()
+        self.assertEqual(os.stat(os.path.join(self.output_path, 'notes.txt')).st_ino, inode)
+        
+    def test_manifest_resume(self):
+        # Test an archive left pending by an interrupted run is extracted again
+        ripple_unzip(self.input_path, self.output_path, self.logger, single_pass=True)
+        
+        manifest_path = os.path.join(self.output_path, MANIFEST_FILE)
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        manifest['first_1.zip']['status'] = 'pending'
+        with open(manifest_path, 'w') as file:
+            json.dump(manifest, file)
+        os.remove(os.path.join(self.output_path, 'first_1', 'level_1.txt'))
+        os.remove(os.path.join(self.output_path, 'second_1', 'level_1.txt'))
+        
+        ripple_unzip(self.input_path, self.output_path, self.logger, single_pass=True)
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'first_1', 'level_1.txt')))
+        self.assertFalse(os.path.exists(os.path.join(self.output_path, 'second_1', 'level_1.txt')))
+        
+    def test_dedupe_link(self):
+        # Test a file delivered in two archives is stored once and recorded as an alias
+        for name in ('delivery', 'resubmission'):
+            with ZipFile(os.path.join(self.input_path, f'{name}.zip'), 'w') as archive:
+                archive.writestr('site.kml', 'same contents')
+                archive.writestr('notes.txt', name)
+        
+        ripple_unzip(self.input_path, self.output_path, self.logger, dedupe='link')
+        
+        with open(os.path.join(self.output_path, ALIASES_FILE)) as file:
+            aliases = json.load(file)
+        self.assertEqual(aliases[os.path.join('resubmission', 'site.kml')], os.path.join('delivery', 'site.kml'))
+        self.assertNotIn(os.path.join('resubmission', 'notes.txt'), aliases)
+        self.assertTrue(os.path.samefile(os.path.join(self.output_path, 'delivery', 'site.kml'), os.path.join(self.output_path, 'resubmission', 'site.kml')))
+        
+        # Test re-extracting a changed archive does not write through the link
+        with ZipFile(os.path.join(self.input_path, 'resubmission.zip'), 'w') as archive:
+            archive.writestr('site.kml', 'new contents')
+        os.utime(os.path.join(self.input_path, 'resubmission.zip'), (0, 0))
+        
+        ripple_unzip(self.input_path, self.output_path, self.logger, dedupe='link')
+        with open(os.path.join(self.output_path, 'delivery', 'site.kml')) as file:
+            self.assertEqual(file.read(), 'same contents')
+        
+    def test_backends(self):
+        # Test every installed extractor backend gives the same output as the Python libraries
+        expected_files = None
+        for name, backend in EXTRACTOR_BACKENDS.items():
+            if not backend.available():
+                continue
+            
+            output_path = os.path.join(self.temp_dir.name, f'output_{name}')
+            ripple_unzip(self.input_path, output_path, self.logger, backend=name)
+            
+            extracted_files = sorted(os.path.relpath(os.path.join(root, file), output_path) for root, _, files in os.walk(output_path) for file in files if file != MANIFEST_FILE)
+            expected_files = expected_files or extracted_files
+            self.assertEqual(extracted_files, expected_files, name)
+        
+    def test_backend_failure(self):
+        # Test an archive the binary fails on is extracted again with the Python libraries, so their errors are still raised
+        class FailingBackend(CommandBackend):
+            name = 'failing'
+            executables = (sys.executable,)
+            
+            def command(self, executable, file_path, extract_path):
+                return [executable, '-c', 'import sys; sys.exit(2)']
+        
+        archive_path = os.path.join(self.input_path, 'second_1.zip')
+        with ZipFile(archive_path) as archive_ref:
+            FailingBackend().extract(archive_ref, archive_path, self.output_path)
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'level_1.txt')))
+        
+        with ZipFile(archive_path) as archive_ref, mock.patch.object(PythonBackend, 'extract', side_effect=FileNotFoundError(2, 'No such file or directory')):
+            with self.assertRaises(FileNotFoundError):
+                FailingBackend().extract(archive_ref, archive_path, self.output_path)
+        
+        # Test the base class has to be given a command line
+        with self.assertRaises(TypeError):
+            CommandBackend()
+        
+    def test_backend_not_installed(self):
+        # Test asking for an unknown backend raises an error
+        with self.assertRaises(ValueError):
+            ripple_unzip(self.input_path, self.output_path, self.logger, backend='unknown')
+        
+    def test_catalog_index(self):
+        # Test the catalog of the whole input is written to a JSON index with a summary of it
+        index_path = os.path.join(self.temp_dir.name, 'index', 'catalog.json')
+        summary = catalog_index(self.input_path, index_path, self.logger)
+        
+        with open(index_path) as index_file:
+            index = json.load(index_file)
+        self.assertEqual(index['summary'], summary)
+        self.assertEqual(len(index['members']), 12)
+        self.assertEqual(summary['members'], 12)
+        self.assertEqual(summary['archives'], 7)
+        self.assertEqual(summary['max_depth'], 4)
+        self.assertEqual(summary['file_types']['.txt']['count'], 7)
+        self.assertFalse(os.path.exists(self.output_path))
+        
+    def test_nested_archive(self):
+        # Test unzipping a nested compressed file directly
+        ripple_unzip(os.path.join(self.input_path, 'second_1.zip'), self.output_path, self.logger)
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'level_1.txt')))
+        self.assertTrue(os.path.exists(os.path.join(self.output_path, 'second_2', 'second_3', 'level_3.txt')))
+
 if __name__ == '__main__':
     unittest.main()
-    
\ No newline at end of file